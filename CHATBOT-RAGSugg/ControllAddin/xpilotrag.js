@@ -100,23 +100,59 @@ submitBtn.addEventListener("click", async () => {
   spinner.style.display = "inline-block";
 
   try {
-    const res = await fetch("http://localhost:8000/copilot/rag-process", {
+    const res = await fetch("http://localhost:8000/copilot/rag-process-stream", {
       method: "POST",
       body: formData,
     });
 
-    const result = await res.json();
-    spinner.style.display = "none";
+    if (!res.ok || !res.body) {
+      const result = await res.json();
+      throw new Error(result.error || `HTTP ${res.status}`);
+    }
 
-    if (result.success) {
-      responseText.innerText = result.response_text || "✅ Done!";
-      if (result.filename) {
-        downloadLink.href = `http://localhost:8000/copilot/download-docx/${result.filename}`;
-        downloadContainer.style.display = "block";
+    // Read Server-Sent Events from the response body as they arrive
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+    let finished = false;
+
+    const handleEvent = (event) => {
+      if (event.type === "token") {
+        spinner.style.display = "none";
+        responseText.innerText += event.token;
+      } else if (event.type === "done") {
+        finished = true;
+        spinner.style.display = "none";
+        responseText.innerText = event.response || responseText.innerText || "✅ Done!";
+        if (event.filename) {
+          downloadLink.href = `http://localhost:8000/copilot/download-docx/${event.filename}`;
+          downloadContainer.style.display = "block";
+        }
+      } else if (event.type === "error") {
+        finished = true;
+        spinner.style.display = "none";
+        responseText.innerText = `❌ Error: ${event.error}`;
+        downloadContainer.style.display = "none";
       }
-    } else {
-      responseText.innerText = `❌ Error: ${result.error}`;
-      downloadContainer.style.display = "none";
+    };
+
+    while (true) {
+      const { value, done } = await reader.read();
+      if (done) break;
+
+      buffer += decoder.decode(value, { stream: true });
+      const messages = buffer.split("\n\n");
+      buffer = messages.pop();
+
+      for (const message of messages) {
+        const dataLine = message.split("\n").find((line) => line.startsWith("data: "));
+        if (dataLine) handleEvent(JSON.parse(dataLine.slice(6)));
+      }
+    }
+
+    spinner.style.display = "none";
+    if (!finished) {
+      responseText.innerText += "\n❌ Stream ended unexpectedly";
     }
   } catch (err) {
     spinner.style.display = "none";
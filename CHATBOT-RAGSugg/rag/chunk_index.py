@@ -0,0 +1,167 @@
+"""
+Chunk Adjacency Index for RAG System
+Maps each parent document to its ordered chunks so retrieved hits can be
+expanded to their neighbours or whole parent record without extra vector queries
+"""
+
+import os
+import json
+from typing import List, Dict, Any, Optional, Tuple
+from langchain.docstore.document import Document
+
+
+# Shortest suffix/prefix match taken as a real chunk overlap; shorter matches
+# (a space, "the ") are usually coincidence and would cut text from the chunk
+MIN_OVERLAP = 16
+
+
+def _overlap_length(previous: str, current: str, max_overlap: int, min_overlap: int = MIN_OVERLAP) -> int:
+    """
+    Length of the longest suffix of previous that is also a prefix of current,
+    or 0 if it is shorter than min_overlap
+    """
+    limit = min(len(previous), len(current), max_overlap)
+    for length in range(limit, max(min_overlap, 1) - 1, -1):
+        if previous.endswith(current[:length]):
+            return length
+    return 0
+
+
+class ChunkAdjacencyIndex:
+    """
+    parent_doc_id -> ordered chunk ids, texts and overlaps with the previous chunk
+    """
+
+    def __init__(self, max_overlap: int = 200, min_overlap: int = MIN_OVERLAP):
+        """
+        Initialize an empty index
+
+        Args:
+            max_overlap: Largest overlap between consecutive chunks (chunk_overlap)
+            min_overlap: Shortest match counted as an overlap
+        """
+        self.max_overlap = max_overlap
+        self.min_overlap = min(min_overlap, max_overlap)
+        self.parents: Dict[str, Dict[str, List[Any]]] = {}
+        self.positions: Dict[str, Tuple[str, int]] = {}
+
+    def add_documents(self, documents: List[Document]) -> None:
+        """
+        Index chunks by parent document
+
+        Args:
+            documents: Chunks produced by DocumentChunkProcessor
+        """
+        touched = set()
+        for doc in documents:
+            parent_id = doc.metadata.get('parent_doc_id')
+            if parent_id is None:
+                continue
+            entry = self.parents.setdefault(parent_id, {"chunks": {}})
+            entry["chunks"][doc.metadata.get('chunk_index', 0)] = (
+                doc.metadata.get('chunk_id', f"{parent_id}_chunk_{doc.metadata.get('chunk_index', 0)}"),
+                doc.page_content
+            )
+            touched.add(parent_id)
+
+        for parent_id in touched:
+            self._finalize(parent_id)
+
+    def _finalize(self, parent_id: str) -> None:
+        """Order a parent's chunks and precompute overlaps and positions"""
+        entry = self.parents[parent_id]
+        ordered = [entry["chunks"][i] for i in sorted(entry["chunks"])]
+
+        entry["chunk_ids"] = [chunk_id for chunk_id, _ in ordered]
+        entry["texts"] = [text for _, text in ordered]
+        entry["overlaps"] = [0] + [
+            _overlap_length(entry["texts"][i - 1], entry["texts"][i], self.max_overlap, self.min_overlap)
+            for i in range(1, len(ordered))
+        ]
+
+        for position, chunk_id in enumerate(entry["chunk_ids"]):
+            self.positions[chunk_id] = (parent_id, position)
+
+    def remove_parents(self, parent_ids: List[str]) -> None:
+        """Drop every chunk of the given parent documents"""
+        for parent_id in parent_ids:
+            entry = self.parents.pop(parent_id, None)
+            if entry:
+                for chunk_id in entry["chunk_ids"]:
+                    self.positions.pop(chunk_id, None)
+
+    def locate(self, chunk_id: str) -> Optional[Tuple[str, int]]:
+        """Return (parent_doc_id, position) of a chunk, or None if unknown"""
+        return self.positions.get(chunk_id)
+
+    def chunk_count(self, parent_id: str) -> int:
+        entry = self.parents.get(parent_id)
+        return len(entry["chunk_ids"]) if entry else 0
+
+    def merged_text(self, parent_id: str, start: int, end: int) -> Tuple[str, List[str]]:
+        """
+        Join chunks [start, end] of a parent, sending each overlap only once
+
+        Returns:
+            Tuple of (merged text, chunk ids covered)
+        """
+        entry = self.parents[parent_id]
+        texts = entry["texts"]
+        overlaps = entry["overlaps"]
+
+        parts = [texts[start]]
+        for i in range(start + 1, end + 1):
+            if overlaps[i]:
+                parts.append(texts[i][overlaps[i]:])
+            else:
+                parts.append("\n" + texts[i])
+
+        return "".join(parts), entry["chunk_ids"][start:end + 1]
+
+    def save(self, path: str) -> None:
+        """Persist the index as JSON"""
+        data = {
+            "max_overlap": self.max_overlap,
+            "min_overlap": self.min_overlap,
+            "parents": {
+                parent_id: {
+                    "chunk_ids": entry["chunk_ids"],
+                    "texts": entry["texts"],
+                    "overlaps": entry["overlaps"]
+                }
+                for parent_id, entry in self.parents.items()
+            }
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["ChunkAdjacencyIndex"]:
+        """
+        Load a persisted index
+
+        Returns:
+            ChunkAdjacencyIndex, or None if the file is missing or unreadable
+        """
+        if not os.path.exists(path):
+            return None
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error loading chunk adjacency index: {str(e)}")
+            return None
+
+        index = cls(max_overlap=data["max_overlap"], min_overlap=data.get("min_overlap", MIN_OVERLAP))
+        for parent_id, entry in data["parents"].items():
+            entry["chunks"] = {
+                i: (chunk_id, text)
+                for i, (chunk_id, text) in enumerate(zip(entry["chunk_ids"], entry["texts"]))
+            }
+            index.parents[parent_id] = entry
+            for position, chunk_id in enumerate(entry["chunk_ids"]):
+                index.positions[chunk_id] = (parent_id, position)
+        return index
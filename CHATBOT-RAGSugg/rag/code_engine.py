@@ -4,11 +4,21 @@ Handles LLM interaction with Ollama and response generation
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+import httpx
+import asyncio
+import functools
 import json
-from typing import Dict, Any, Optional, List
+import time
+import logging
+from concurrent.futures import Executor, ThreadPoolExecutor, Future, as_completed
+from typing import Dict, Any, Optional, List, Tuple, Iterator, AsyncIterator, Callable
 from context_retriever import ContextRetriever
+from token_budget import TokenCounter
 from vector_store import VectorStoreManager
 
+logger = logging.getLogger(__name__)
+
 
 class OllamaQueryEngine:
     """
@@ -19,7 +29,13 @@ class OllamaQueryEngine:
                  context_retriever: ContextRetriever,
                  model_name: str = "mistral:latest",
                  ollama_url: str = "http://localhost:11434",
-                 system_prompt: str = None):
+                 system_prompt: str = None,
+                 pool_size: int = 10,
+                 connect_timeout: float = 10,
+                 read_timeout: float = 120,
+                 context_window: int = 8192,
+                 tokenizer_name: Optional[str] = None,
+                 token_counter: Optional[TokenCounter] = None):
         """
         Initialize the query engine
         
@@ -28,12 +44,35 @@ class OllamaQueryEngine:
             model_name: Name of the Ollama model
             ollama_url: URL of the Ollama server
             system_prompt: System prompt for the model
+            pool_size: Number of keep-alive connections kept to Ollama
+            connect_timeout: Seconds to wait for a connection to Ollama
+            read_timeout: Seconds to wait for data from Ollama (generation)
+            context_window: Model context window in tokens (sent as num_ctx);
+                            the prompt is fitted into it with max_tokens reserved
+                            for generation
+            tokenizer_name: Hugging Face tokenizer of the model for exact token
+                            counts (a calibrated estimate is used otherwise)
+            token_counter: Existing counter to share (e.g. with the context
+                           compressor); built from tokenizer_name if omitted
         """
         self.context_retriever = context_retriever
         self.model_name = model_name
         self.ollama_url = ollama_url
         self.system_prompt = system_prompt or self._get_default_system_prompt()
         
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        
+        self.context_window = context_window
+        self.token_counter = token_counter or TokenCounter(tokenizer_name)
+        
+        # Pooled keep-alive session shared by all queries and threads
+        self.session = self._create_session()
+        
+        # Async HTTP client, created on first use by the async query path
+        self._async_client = None
+        
         # Test connection
         self._test_ollama_connection()
     
@@ -55,10 +94,18 @@ Guidelines:
 Context Information:
 The context provided contains information about various financial topics including self-employment, investments, tax implications, and financial planning. Use this information to provide relevant and helpful responses."""
     
+    def _create_session(self) -> requests.Session:
+        """Create a requests session with a connection pool sized for concurrent queries"""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+    
     def _test_ollama_connection(self):
         """Test connection to Ollama server"""
         try:
-            response = requests.get(f"{self.ollama_url}/api/tags", timeout=10)
+            response = self.session.get(f"{self.ollama_url}/api/tags", timeout=(self.connect_timeout, 10))
             if response.status_code == 200:
                 models = response.json().get("models", [])
                 model_names = [model["name"] for model in models]
@@ -74,17 +121,68 @@ The context provided contains information about various financial topics includi
         except requests.exceptions.RequestException as e:
             raise ConnectionError(f"Cannot connect to Ollama at {self.ollama_url}: {str(e)}")
     
-    def _build_prompt(self, query: str, context: str) -> str:
+    def _build_prompt(self, query: str, context: str, max_tokens: int = 2000) -> Tuple[str, Dict[str, Any]]:
         """
         Build the complete prompt with context and query
         
+        The context gets whatever the context window leaves after the system
+        prompt, the question and the max_tokens reserved for generation, and
+        is cut (at a chunk boundary when possible) if it does not fit.
+        
         Args:
             query: User query
             context: Retrieved context
+            max_tokens: Tokens reserved for the generated answer
             
         Returns:
-            Complete prompt string
+            Tuple of (complete prompt string, token budget stats)
+        """
+        context_budget = self._context_budget(query, max_tokens)
+        
+        context_tokens = self.token_counter.count(context)
+        truncated = context_tokens > context_budget
+        if truncated:
+            print(f"Context truncated from {context_tokens} to {context_budget} tokens to fit the context window")
+            context = self.token_counter.truncate(context, context_budget)
+            context_tokens = self.token_counter.count(context)
+        
+        prompt = self._format_prompt(query, context)
+        return prompt, {
+            "prompt_tokens": self.token_counter.count(prompt),
+            "context_tokens": context_tokens,
+            "context_budget_tokens": context_budget,
+            "context_truncated": truncated,
+            "reserved_generation_tokens": max_tokens,
+            "context_window": self.context_window,
+            "token_counts_exact": self.token_counter.exact
+        }
+    
+    def _context_budget(self, query: str, max_tokens: int = 2000) -> int:
+        """Tokens left for context after the prompt template, the question and the response reserve"""
+        fixed_tokens = self.token_counter.count(self._format_prompt(query, ""))
+        return max(0, self.context_window - max_tokens - fixed_tokens)
+    
+    def _retrieval_options(self, 
+                           query: str, 
+                           context_options: Dict[str, Any], 
+                           generation_options: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Context options with the retrieval limits derived from the token budget
+        
+        Unless set explicitly, max_context_length (characters) is the context
+        token budget converted with the counter's characters per token, and
+        the compression budget is the context token budget itself. The prompt
+        is still fitted exactly by _build_prompt.
         """
+        context_budget = self._context_budget(query, generation_options.get("max_tokens", 2000))
+        options = dict(context_options)
+        options.setdefault("max_context_length", int(context_budget * self.token_counter.chars_per_token))
+        if options.get("compress"):
+            options.setdefault("token_budget", context_budget)
+        return options
+    
+    def _format_prompt(self, query: str, context: str) -> str:
+        """Fill the prompt template"""
         prompt_template = f"""System: {self.system_prompt}
 
 Context:
@@ -96,6 +194,32 @@ Please provide a helpful response based on the context above. If the context doe
         
         return prompt_template
     
+    def _build_payload(self, prompt: str, temperature: float = 0.7, max_tokens: int = 2000,
+                       stream: bool = False) -> Dict[str, Any]:
+        """Build the Ollama /api/generate request payload"""
+        return {
+            "model": self.model_name,
+            "prompt": prompt,
+            "stream": stream,
+            "options": {
+                "temperature": temperature,
+                "num_predict": max_tokens,
+                "num_ctx": self.context_window
+            }
+        }
+    
+    def _parse_generation(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Extract the fields we use from an Ollama generate response"""
+        return {
+            "response": result.get("response", ""),
+            "done": result.get("done", False),
+            "context": result.get("context", []),
+            "prompt_eval_count": result.get("prompt_eval_count", 0),
+            "eval_count": result.get("eval_count", 0),
+            "eval_duration": result.get("eval_duration", 0),
+            "total_duration": result.get("total_duration", 0)
+        }
+    
     def _call_ollama(self, prompt: str, temperature: float = 0.7, max_tokens: int = 2000) -> Dict[str, Any]:
         """
         Call Ollama API to generate response
@@ -110,33 +234,17 @@ Please provide a helpful response based on the context above. If the context doe
         """
         try:
             # Prepare request payload
-            payload = {
-                "model": self.model_name,
-                "prompt": prompt,
-                "stream": False,
-                "options": {
-                    "temperature": temperature,
-                    "num_predict": max_tokens
-                }
-            }
+            payload = self._build_payload(prompt, temperature, max_tokens)
             
             # Make request
-            response = requests.post(
+            response = self.session.post(
                 f"{self.ollama_url}/api/generate",
                 json=payload,
-                timeout=120  # 2 minute timeout
+                timeout=(self.connect_timeout, self.read_timeout)
             )
             
             if response.status_code == 200:
-                result = response.json()
-                return {
-                    "response": result.get("response", ""),
-                    "done": result.get("done", False),
-                    "context": result.get("context", []),
-                    "eval_count": result.get("eval_count", 0),
-                    "eval_duration": result.get("eval_duration", 0),
-                    "total_duration": result.get("total_duration", 0)
-                }
+                return self._parse_generation(response.json())
             else:
                 raise Exception(f"Ollama API error: {response.status_code} - {response.text}")
                 
@@ -145,6 +253,122 @@ Please provide a helpful response based on the context above. If the context doe
         except requests.exceptions.RequestException as e:
             raise Exception(f"Request to Ollama failed: {str(e)}")
     
+    def _call_ollama_stream(self, prompt: str, temperature: float = 0.7, max_tokens: int = 2000) -> Iterator[Dict[str, Any]]:
+        """
+        Call Ollama API in streaming mode
+        
+        Args:
+            prompt: Complete prompt to send
+            temperature: Response randomness (0-1)
+            max_tokens: Maximum tokens to generate
+            
+        Yields:
+            Raw Ollama chunks as they arrive (the last one has done=True and the stats)
+        """
+        payload = self._build_payload(prompt, temperature, max_tokens, stream=True)
+        
+        try:
+            with self.session.post(
+                f"{self.ollama_url}/api/generate",
+                json=payload,
+                stream=True,
+                timeout=(self.connect_timeout, self.read_timeout)  # read timeout applies between chunks
+            ) as response:
+                if response.status_code != 200:
+                    raise Exception(f"Ollama API error: {response.status_code} - {response.text}")
+                
+                for line in response.iter_lines():
+                    if line:
+                        yield json.loads(line)
+                        
+        except requests.exceptions.Timeout:
+            raise TimeoutError("Request to Ollama timed out")
+        except requests.exceptions.RequestException as e:
+            raise Exception(f"Request to Ollama failed: {str(e)}")
+    
+    def _get_async_client(self) -> httpx.AsyncClient:
+        """Get (or lazily create) the async HTTP client used for Ollama calls"""
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+                limits=httpx.Limits(
+                    max_connections=self.pool_size,
+                    max_keepalive_connections=self.pool_size
+                )
+            )
+        return self._async_client
+    
+    async def _acall_ollama(self, prompt: str, temperature: float = 0.7, max_tokens: int = 2000) -> Dict[str, Any]:
+        """
+        Async version of _call_ollama that does not block the event loop
+        
+        Args:
+            prompt: Complete prompt to send
+            temperature: Response randomness (0-1)
+            max_tokens: Maximum tokens to generate
+            
+        Returns:
+            Dictionary with response and metadata
+        """
+        payload = self._build_payload(prompt, temperature, max_tokens)
+        
+        try:
+            response = await self._get_async_client().post(
+                f"{self.ollama_url}/api/generate",
+                json=payload
+            )
+        except httpx.TimeoutException:
+            raise TimeoutError("Request to Ollama timed out")
+        except httpx.HTTPError as e:
+            raise Exception(f"Request to Ollama failed: {str(e)}")
+        
+        if response.status_code == 200:
+            return self._parse_generation(response.json())
+        raise Exception(f"Ollama API error: {response.status_code} - {response.text}")
+    
+    async def _acall_ollama_stream(self, prompt: str, temperature: float = 0.7, max_tokens: int = 2000) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Async version of _call_ollama_stream
+        
+        Args:
+            prompt: Complete prompt to send
+            temperature: Response randomness (0-1)
+            max_tokens: Maximum tokens to generate
+            
+        Yields:
+            Raw Ollama chunks as they arrive (the last one has done=True and the stats)
+        """
+        payload = self._build_payload(prompt, temperature, max_tokens, stream=True)
+        
+        try:
+            async with self._get_async_client().stream(
+                "POST",
+                f"{self.ollama_url}/api/generate",
+                json=payload
+            ) as response:
+                if response.status_code != 200:
+                    body = await response.aread()
+                    raise Exception(f"Ollama API error: {response.status_code} - {body.decode(errors='replace')}")
+                
+                async for line in response.aiter_lines():
+                    if line:
+                        yield json.loads(line)
+                        
+        except httpx.TimeoutException:
+            raise TimeoutError("Request to Ollama timed out")
+        except httpx.HTTPError as e:
+            raise Exception(f"Request to Ollama failed: {str(e)}")
+    
+    def close(self):
+        """Close the pooled HTTP session"""
+        self.session.close()
+    
+    async def aclose(self):
+        """Close the async HTTP client if it was created"""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+    
     def query(self, 
               user_query: str, 
               k: int = 5,
@@ -163,86 +387,396 @@ Please provide a helpful response based on the context above. If the context doe
             Dictionary with response and metadata
         """
         # Set defaults
-        context_options = context_options or {}
         generation_options = generation_options or {}
+        context_options = self._retrieval_options(user_query, context_options or {}, generation_options)
         
-        # Retrieve context
-        print(f"Retrieving context for query: {user_query}")
-        context_result = self.context_retriever.retrieve_context(
+        context_result = self._retrieve(user_query, k, context_options)
+        return self._generate(user_query, context_result, generation_options)
+    
+    def _retrieve(self, user_query: str, k: int, context_options: Dict[str, Any]) -> Dict[str, Any]:
+        """Retrieval half of query()"""
+        logger.debug("Retrieving context for a %d character query", len(user_query))
+        return self.context_retriever.retrieve_context(
             user_query, 
             k=k,
             **context_options
         )
-        
+    
+    def _generate(self, 
+                  user_query: str, 
+                  context_result: Dict[str, Any], 
+                  generation_options: Dict[str, Any]) -> Dict[str, Any]:
+        """Generation half of query()"""
         if not context_result["context"]:
-            return {
-                "query": user_query,
-                "response": "I couldn't find relevant information in the knowledge base to answer your question.",
-                "context_used": "",
-                "sources": [],
-                "success": False,
-                "error": "No relevant context found"
-            }
+            return self._no_context_result(user_query)
         
         # Build prompt
-        prompt = self._build_prompt(user_query, context_result["context"])
+        prompt, prompt_stats = self._build_prompt(
+            user_query, context_result["context"], generation_options.get("max_tokens", 2000)
+        )
         
         # Generate response
         print("Generating response...")
         try:
             llm_result = self._call_ollama(prompt, **generation_options)
+            return self._success_result(user_query, context_result, llm_result, prompt, prompt_stats)
             
-            return {
-                "query": user_query,
-                "response": llm_result["response"],
-                "context_used": context_result["context"],
-                "sources": context_result["sources"],
-                "context_length": context_result["context_length"],
-                "total_chunks": context_result["total_chunks"],
-                "success": True,
-                "generation_stats": {
-                    "eval_count": llm_result.get("eval_count", 0),
-                    "eval_duration": llm_result.get("eval_duration", 0),
-                    "total_duration": llm_result.get("total_duration", 0)
-                }
-            }
+        except Exception as e:
+            return self._error_result(user_query, context_result, e)
+    
+    async def aquery(self, 
+                     user_query: str, 
+                     k: int = 5,
+                     context_options: Dict[str, Any] = None,
+                     generation_options: Dict[str, Any] = None,
+                     executor: Optional[Executor] = None) -> Dict[str, Any]:
+        """
+        Async version of query: retrieval (embedding + vector search) runs in
+        an executor and generation uses the async Ollama client
+        
+        Args:
+            user_query: User's question
+            k: Number of context chunks to retrieve
+            context_options: Options for context retrieval
+            generation_options: Options for text generation
+            executor: Executor for the CPU-bound retrieval step
+                      (None uses the event loop's default executor)
+            
+        Returns:
+            Dictionary with response and metadata
+        """
+        generation_options = generation_options or {}
+        context_options = self._retrieval_options(user_query, context_options or {}, generation_options)
+        
+        context_result = await self._aretrieve_context(user_query, k, context_options, executor)
+        
+        if not context_result["context"]:
+            return self._no_context_result(user_query)
+        
+        prompt, prompt_stats = self._build_prompt(
+            user_query, context_result["context"], generation_options.get("max_tokens", 2000)
+        )
+        
+        print("Generating response...")
+        try:
+            llm_result = await self._acall_ollama(prompt, **generation_options)
+            return self._success_result(user_query, context_result, llm_result, prompt, prompt_stats)
             
         except Exception as e:
-            return {
-                "query": user_query,
-                "response": f"Error generating response: {str(e)}",
-                "context_used": context_result["context"],
-                "sources": context_result["sources"],
-                "success": False,
-                "error": str(e)
-            }
+            return self._error_result(user_query, context_result, e)
+    
+    async def _aretrieve_context(self, 
+                                 user_query: str, 
+                                 k: int, 
+                                 context_options: Dict[str, Any], 
+                                 executor: Optional[Executor]) -> Dict[str, Any]:
+        """Run context retrieval on an executor so the event loop stays free"""
+        logger.debug("Retrieving context for a %d character query", len(user_query))
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            executor,
+            functools.partial(
+                self.context_retriever.retrieve_context,
+                user_query,
+                k=k,
+                **context_options
+            )
+        )
+    
+    def query_stream(self, 
+                     user_query: str, 
+                     k: int = 5,
+                     context_options: Dict[str, Any] = None,
+                     generation_options: Dict[str, Any] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Process a user query with RAG and stream the answer token by token
+        
+        Args:
+            user_query: User's question
+            k: Number of context chunks to retrieve
+            context_options: Options for context retrieval
+            generation_options: Options for text generation
+            
+        Yields:
+            Event dictionaries with a "type" key:
+            "sources" (sent once, before generation), "token" (one per
+            generated piece of text), then "done" with the full result or
+            "error"
+        """
+        generation_options = generation_options or {}
+        context_options = self._retrieval_options(user_query, context_options or {}, generation_options)
+        
+        logger.debug("Retrieving context for a %d character query", len(user_query))
+        context_result = self.context_retriever.retrieve_context(
+            user_query, 
+            k=k,
+            **context_options
+        )
+        
+        if not context_result["context"]:
+            yield {"type": "error", **self._no_context_result(user_query)}
+            return
+        
+        yield self._sources_event(context_result)
+        
+        prompt, prompt_stats = self._build_prompt(
+            user_query, context_result["context"], generation_options.get("max_tokens", 2000)
+        )
+        
+        print("Streaming response...")
+        response_parts = []
+        final_chunk = {}
+        try:
+            for chunk in self._call_ollama_stream(prompt, **generation_options):
+                token = chunk.get("response", "")
+                if token:
+                    response_parts.append(token)
+                    yield {"type": "token", "token": token}
+                if chunk.get("done"):
+                    final_chunk = chunk
+            
+            yield self._done_event(user_query, context_result, "".join(response_parts), final_chunk,
+                                   prompt, prompt_stats)
+            
+        except Exception as e:
+            yield {"type": "error", **self._error_result(user_query, context_result, e)}
+    
+    async def aquery_stream(self, 
+                            user_query: str, 
+                            k: int = 5,
+                            context_options: Dict[str, Any] = None,
+                            generation_options: Dict[str, Any] = None,
+                            executor: Optional[Executor] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Async version of query_stream (retrieval runs on the executor)
+        
+        Args:
+            user_query: User's question
+            k: Number of context chunks to retrieve
+            context_options: Options for context retrieval
+            generation_options: Options for text generation
+            executor: Executor for the CPU-bound retrieval step
+            
+        Yields:
+            Same events as query_stream
+        """
+        generation_options = generation_options or {}
+        context_options = self._retrieval_options(user_query, context_options or {}, generation_options)
+        
+        context_result = await self._aretrieve_context(user_query, k, context_options, executor)
+        
+        if not context_result["context"]:
+            yield {"type": "error", **self._no_context_result(user_query)}
+            return
+        
+        yield self._sources_event(context_result)
+        
+        prompt, prompt_stats = self._build_prompt(
+            user_query, context_result["context"], generation_options.get("max_tokens", 2000)
+        )
+        
+        print("Streaming response...")
+        response_parts = []
+        final_chunk = {}
+        try:
+            async for chunk in self._acall_ollama_stream(prompt, **generation_options):
+                token = chunk.get("response", "")
+                if token:
+                    response_parts.append(token)
+                    yield {"type": "token", "token": token}
+                if chunk.get("done"):
+                    final_chunk = chunk
+            
+            yield self._done_event(user_query, context_result, "".join(response_parts), final_chunk,
+                                   prompt, prompt_stats)
+            
+        except Exception as e:
+            yield {"type": "error", **self._error_result(user_query, context_result, e)}
+    
+    def _sources_event(self, context_result: Dict[str, Any]) -> Dict[str, Any]:
+        """First streaming event: what context the answer is based on"""
+        return {
+            "type": "sources",
+            "sources": context_result["sources"],
+            "context_length": context_result["context_length"],
+            "total_chunks": context_result["total_chunks"]
+        }
+    
+    def _done_event(self, 
+                    user_query: str, 
+                    context_result: Dict[str, Any], 
+                    response_text: str, 
+                    final_chunk: Dict[str, Any],
+                    prompt: str,
+                    prompt_stats: Dict[str, Any]) -> Dict[str, Any]:
+        """Last streaming event: the complete result, same shape as query()"""
+        llm_result = self._parse_generation({**final_chunk, "response": response_text})
+        return {"type": "done", **self._success_result(user_query, context_result, llm_result, prompt, prompt_stats)}
+    
+    def _no_context_result(self, user_query: str) -> Dict[str, Any]:
+        """Result returned when retrieval finds nothing"""
+        return {
+            "query": user_query,
+            "response": "I couldn't find relevant information in the knowledge base to answer your question.",
+            "context_used": "",
+            "sources": [],
+            "success": False,
+            "error": "No relevant context found"
+        }
+    
+    def _success_result(self, 
+                        user_query: str, 
+                        context_result: Dict[str, Any], 
+                        llm_result: Dict[str, Any],
+                        prompt: str,
+                        prompt_stats: Dict[str, Any]) -> Dict[str, Any]:
+        """Result returned after a successful generation"""
+        # Ollama reports the prompt tokens it evaluated; use them to calibrate estimates
+        prompt_eval_count = llm_result.get("prompt_eval_count", 0)
+        self.token_counter.calibrate(prompt, prompt_eval_count)
+        
+        generation_stats = {
+            "eval_count": llm_result.get("eval_count", 0),
+            "eval_duration": llm_result.get("eval_duration", 0),
+            "total_duration": llm_result.get("total_duration", 0),
+            "prompt_eval_count": prompt_eval_count,
+            **prompt_stats
+        }
+        if context_result.get("compression"):
+            generation_stats["compression"] = context_result["compression"]
+        
+        return {
+            "query": user_query,
+            "response": llm_result["response"],
+            "context_used": context_result["context"],
+            "sources": context_result["sources"],
+            "context_length": context_result["context_length"],
+            "total_chunks": context_result["total_chunks"],
+            "success": True,
+            "generation_stats": generation_stats
+        }
+    
+    def _error_result(self, 
+                      user_query: str, 
+                      context_result: Dict[str, Any], 
+                      error: Exception) -> Dict[str, Any]:
+        """Result returned when generation fails"""
+        return {
+            "query": user_query,
+            "response": f"Error generating response: {str(error)}",
+            "context_used": context_result["context"],
+            "sources": context_result["sources"],
+            "success": False,
+            "error": str(error)
+        }
     
     def batch_query(self, 
                    queries: List[str], 
                    k: int = 5,
                    context_options: Dict[str, Any] = None,
-                   generation_options: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+                   generation_options: Dict[str, Any] = None,
+                   max_workers: int = 1,
+                   retrieval_workers: int = 1,
+                   retrieval_batch_size: int = 32,
+                   on_result: Optional[Callable[[int, Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
         """
         Process multiple queries
         
+        Queries are retrieved in blocks of retrieval_batch_size with one
+        batched embedding call per block. Retrieval for upcoming blocks runs
+        on its own pool while earlier queries are still generating (at least
+        one block ahead, even with a single generation worker). With
+        max_workers > 1 up to max_workers generations run at once.
+        
         Args:
             queries: List of user queries
             k: Number of context chunks to retrieve
             context_options: Options for context retrieval
             generation_options: Options for text generation
+            max_workers: Number of concurrent generations
+            retrieval_workers: Number of concurrent block retrievals
+            retrieval_batch_size: Number of queries embedded together
+            on_result: Called with (index, result) as soon as each query finishes
             
         Returns:
-            List of query results
+            List of query results, in input order
         """
-        results = []
+        generation_options = generation_options or {}
+        # One limit per batch, sized for the longest question
+        context_options = self._retrieval_options(
+            max(queries, key=len, default=""), context_options or {}, generation_options
+        )
+        
+        results = [None] * len(queries)
+        start_time = time.perf_counter()
+        blocks = [
+            (start, queries[start:start + retrieval_batch_size])
+            for start in range(0, len(queries), max(1, retrieval_batch_size))
+        ]
+        
+        if max_workers <= 1:
+            # Generation runs inline while the next blocks are retrieved in the background
+            prefetch = max(1, retrieval_workers)
+            with ThreadPoolExecutor(max_workers=prefetch, thread_name_prefix="rag-retrieve") as retrieval_pool:
+                retrievals = [retrieval_pool.submit(self._retrieve_block, block, k, context_options)
+                              for _, block in blocks[:prefetch]]
+                for n, (start, block) in enumerate(blocks):
+                    if n + prefetch < len(blocks):
+                        retrievals.append(retrieval_pool.submit(
+                            self._retrieve_block, blocks[n + prefetch][1], k, context_options
+                        ))
+                    for offset, query in enumerate(block):
+                        i = start + offset
+                        print(f"Processing query {i+1}/{len(queries)}")
+                        results[i] = self._generate_after(query, retrievals[n], offset, generation_options)
+                        if on_result:
+                            on_result(i, results[i])
+        else:
+            with ThreadPoolExecutor(max_workers=retrieval_workers, thread_name_prefix="rag-retrieve") as retrieval_pool, \
+                 ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="rag-generate") as generation_pool:
+                # Retrieval blocks are queued in input order and run ahead of generation
+                generations = {}
+                for start, block in blocks:
+                    retrieval = retrieval_pool.submit(self._retrieve_block, block, k, context_options)
+                    for offset, query in enumerate(block):
+                        future = generation_pool.submit(
+                            self._generate_after, query, retrieval, offset, generation_options
+                        )
+                        generations[future] = start + offset
+                
+                for completed, future in enumerate(as_completed(generations), start=1):
+                    i = generations[future]
+                    results[i] = future.result()
+                    print(f"Completed query {completed}/{len(queries)}")
+                    if on_result:
+                        on_result(i, results[i])
         
-        for i, query in enumerate(queries):
-            print(f"Processing query {i+1}/{len(queries)}: {query}")
-            result = self.query(query, k, context_options, generation_options)
-            results.append(result)
+        elapsed = time.perf_counter() - start_time
+        throughput = len(queries) / elapsed if elapsed > 0 else 0.0
+        print(f"Processed {len(queries)} queries in {elapsed:.1f}s "
+              f"({throughput:.2f} queries/s, {max_workers} generation workers)")
         
         return results
     
+    def _retrieve_block(self, 
+                        queries: List[str], 
+                        k: int, 
+                        context_options: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Retrieve context for a block of queries (batched embedding and re-ranking)"""
+        print(f"Retrieving context for {len(queries)} queries")
+        return self.context_retriever.retrieve_context_batch(queries, k=k, **context_options)
+    
+    def _generate_after(self, 
+                        query: str, 
+                        retrieval: Future, 
+                        offset: int,
+                        generation_options: Dict[str, Any]) -> Dict[str, Any]:
+        """Wait for a query's block retrieval, then generate its answer"""
+        try:
+            return self._generate(query, retrieval.result()[offset], generation_options)
+        except Exception as e:
+            return {"query": query, "error": f"Error processing query: {str(e)}", "success": False}
+    
     def interactive_session(self):
         """
         Start an interactive query session
@@ -278,7 +812,8 @@ Please provide a helpful response based on the context above. If the context doe
                 if result.get('sources'):
                     print(f"\nSources used ({len(result['sources'])} chunks):")
                     for i, source in enumerate(result['sources'][:3]):  # Show top 3
-                        print(f"  {i+1}. {source['source']} (Score: {source['similarity_score']:.3f})")
+                        score_type = source['score_type']
+                        print(f"  {i+1}. {source['source']} ({score_type} score: {source[f'{score_type}_score']:.3f})")
                 
             except KeyboardInterrupt:
                 print("\nSession interrupted. Goodbye!")
@@ -294,7 +829,7 @@ Please provide a helpful response based on the context above. If the context doe
             Dictionary with model information
         """
         try:
-            response = requests.get(f"{self.ollama_url}/api/tags")
+            response = self.session.get(f"{self.ollama_url}/api/tags", timeout=(self.connect_timeout, 10))
             if response.status_code == 200:
                 models = response.json().get("models", [])
                 for model in models:
@@ -0,0 +1,151 @@
+"""
+Collection Summary for RAG System
+Per-source and per-category chunk counts, chunk size histogram and embedding
+model of a vector store, maintained on every write so stats need no search
+"""
+
+import os
+import json
+import time
+from collections import Counter
+from typing import List, Dict, Any, Optional
+from langchain.docstore.document import Document
+
+
+# Lower edges (in characters) of the chunk size histogram bins
+CHUNK_SIZE_BINS = (0, 250, 500, 750, 1000, 1500, 2000, 4000)
+
+
+def size_bin(chars: int) -> str:
+    """Histogram bin label of a chunk length, e.g. "500-749" or "4000+" """
+    for lower, upper in zip(CHUNK_SIZE_BINS, CHUNK_SIZE_BINS[1:]):
+        if chars < upper:
+            return f"{lower}-{upper - 1}"
+    return f"{CHUNK_SIZE_BINS[-1]}+"
+
+
+class CollectionSummary:
+    """
+    Aggregate statistics of the chunks stored in a vector store
+
+    One [source, category, chars] entry is kept per stored id, so replacing
+    or deleting a chunk updates the counters exactly.
+    """
+
+    def __init__(self, embedding_model: str, embedding_dim: Optional[int] = None,
+                 entries: Optional[Dict[str, List[Any]]] = None):
+        """
+        Initialize the summary
+
+        Args:
+            embedding_model: Model (and encoder variant) of the stored embeddings
+            embedding_dim: Size of the stored embeddings
+            entries: Stored id -> [source, category, chars]
+        """
+        self.embedding_model = embedding_model
+        self.embedding_dim = embedding_dim
+        self.entries: Dict[str, List[Any]] = {}
+        self.sources = Counter()
+        self.categories = Counter()
+        self.size_histogram = Counter()
+        self.total_chars = 0
+        self.updated_at = None
+
+        for chunk_id, entry in (entries or {}).items():
+            self._add_entry(chunk_id, entry)
+
+    def _add_entry(self, chunk_id: str, entry: List[Any]) -> None:
+        source, category, chars = entry
+        self.entries[chunk_id] = entry
+        self.sources[source] += 1
+        self.categories[category] += 1
+        self.size_histogram[size_bin(chars)] += 1
+        self.total_chars += chars
+
+    def _remove_entry(self, chunk_id: str) -> None:
+        source, category, chars = self.entries.pop(chunk_id)
+        for counter, key in ((self.sources, source), (self.categories, category),
+                             (self.size_histogram, size_bin(chars))):
+            counter[key] -= 1
+            if counter[key] <= 0:
+                del counter[key]
+        self.total_chars -= chars
+
+    def add(self, ids: List[str], documents: List[Document]) -> None:
+        """Record chunks stored under ids (replacing what those ids held before)"""
+        for chunk_id, doc in zip(ids, documents):
+            if chunk_id in self.entries:
+                self._remove_entry(chunk_id)
+            self._add_entry(chunk_id, [
+                doc.metadata.get('source', 'unknown'),
+                doc.metadata.get('category', 'unknown'),
+                len(doc.page_content)
+            ])
+        self.updated_at = time.time()
+
+    def remove(self, ids: List[str]) -> None:
+        """Forget deleted chunks"""
+        for chunk_id in ids:
+            if chunk_id in self.entries:
+                self._remove_entry(chunk_id)
+        self.updated_at = time.time()
+
+    @classmethod
+    def from_documents(cls, ids: List[str], documents: List[Document],
+                       embedding_model: str, embedding_dim: Optional[int] = None) -> "CollectionSummary":
+        summary = cls(embedding_model, embedding_dim)
+        summary.add(ids, documents)
+        return summary
+
+    @property
+    def chunk_count(self) -> int:
+        return len(self.entries)
+
+    def to_stats(self) -> Dict[str, Any]:
+        """Statistics for get_collection_stats (no per-chunk data)"""
+        bin_order = {size_bin(lower): i for i, lower in enumerate(CHUNK_SIZE_BINS)}
+        return {
+            'chunks': self.chunk_count,
+            'embedding_model': self.embedding_model,
+            'embedding_dim': self.embedding_dim,
+            'source_counts': dict(self.sources.most_common()),
+            'category_counts': dict(self.categories.most_common()),
+            'chunk_size_histogram': dict(sorted(self.size_histogram.items(), key=lambda item: bin_order[item[0]])),
+            'mean_chunk_chars': self.total_chars / self.chunk_count if self.chunk_count else 0.0,
+            'updated_at': self.updated_at
+        }
+
+    def save(self, path: str) -> None:
+        """Persist the summary as JSON"""
+        data = {
+            "embedding_model": self.embedding_model,
+            "embedding_dim": self.embedding_dim,
+            "updated_at": self.updated_at,
+            "stats": self.to_stats(),
+            "entries": self.entries
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["CollectionSummary"]:
+        """
+        Load a persisted summary
+
+        Returns:
+            CollectionSummary, or None if the file is missing or unreadable
+        """
+        if not os.path.exists(path):
+            return None
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            summary = cls(data["embedding_model"], data.get("embedding_dim"), data["entries"])
+            summary.updated_at = data.get("updated_at")
+            return summary
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Error loading collection summary: {str(e)}")
+            return None
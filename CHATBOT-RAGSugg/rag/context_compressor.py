@@ -0,0 +1,130 @@
+"""
+Context Compressor for RAG System
+Keeps only the retrieved sentences most similar to the query, under a token budget
+"""
+
+import re
+from typing import List, Dict, Any, Tuple, Optional
+import numpy as np
+from langchain.docstore.document import Document
+from vector_store import VectorStoreManager, QueryEmbeddingCache
+from token_budget import TokenCounter
+
+
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text on sentence punctuation and line breaks"""
+    return [sentence.strip() for sentence in SENTENCE_PATTERN.split(text) if sentence.strip()]
+
+
+class ContextCompressor:
+    """
+    Extractive, query-aware compression of retrieved chunks
+    """
+
+    def __init__(self,
+                 vector_store_manager: VectorStoreManager,
+                 cache_size: int = 8192,
+                 token_counter: Optional[TokenCounter] = None):
+        """
+        Initialize the compressor
+
+        Args:
+            vector_store_manager: Provides the sentence encoder
+            cache_size: Number of sentence embeddings kept in memory; chunks
+                        recur across queries so their sentences are rarely
+                        encoded twice
+            token_counter: Counter the prompt is budgeted with, so the
+                           compressed context is measured the same way
+        """
+        self.vector_store = vector_store_manager
+        self.token_counter = token_counter or TokenCounter()
+        self.sentence_cache = QueryEmbeddingCache(max_entries=cache_size)
+
+    def _embed_sentences(self, sentences: List[str]) -> np.ndarray:
+        """Embed sentences, encoding only the cache misses in one batch"""
+        model_name = self.vector_store.embedding_model_name
+        keys = [QueryEmbeddingCache.make_key(sentence, model_name) for sentence in sentences]
+        embeddings = [self.sentence_cache.get(key) for key in keys]
+
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            new_embeddings = self.vector_store.embed_documents([sentences[i] for i in missing])
+            for i, embedding in zip(missing, new_embeddings):
+                embeddings[i] = embedding
+                self.sentence_cache.set(keys[i], embedding)
+
+        return np.asarray(embeddings, dtype=np.float32)
+
+    def compress(self,
+                 query: str,
+                 results: List[tuple],
+                 token_budget: int = 1000) -> Tuple[List[Tuple[Document, float]], Dict[str, Any]]:
+        """
+        Keep the sentences most similar to the query
+
+        Sentences are picked by cosine similarity until the token budget is
+        used; the kept sentences stay in their original order and chunks
+        keep their rank order.
+
+        Args:
+            query: User query
+            results: Ranked (document, score) pairs
+            token_budget: Maximum tokens of the kept sentences
+
+        Returns:
+            Tuple of (compressed (document, score) pairs, compression stats)
+        """
+        sentences = []
+        owners = []
+        for chunk_idx, (doc, _) in enumerate(results):
+            for sentence in split_sentences(doc.page_content):
+                sentences.append(sentence)
+                owners.append(chunk_idx)
+
+        original_tokens = sum(self.token_counter.count(doc.page_content) for doc, _ in results)
+        if not sentences:
+            return results, {
+                "original_tokens": original_tokens,
+                "compressed_tokens": original_tokens,
+                "compression_ratio": 1.0,
+                "sentences_kept": 0,
+                "sentences_total": 0
+            }
+
+        # Cosine similarity of every sentence to the query in one product
+        sentence_matrix = self._embed_sentences(sentences)
+        query_vector = np.asarray(self.vector_store.embed_query(query), dtype=np.float32)
+        sentence_matrix /= np.linalg.norm(sentence_matrix, axis=1, keepdims=True) + 1e-12
+        query_vector /= np.linalg.norm(query_vector) + 1e-12
+        similarities = sentence_matrix @ query_vector
+
+        kept = set()
+        used_tokens = 0
+        for i in np.argsort(-similarities):
+            tokens = self.token_counter.count(sentences[i])
+            if used_tokens + tokens > token_budget:
+                continue
+            kept.add(int(i))
+            used_tokens += tokens
+
+        compressed = []
+        for chunk_idx, (doc, score) in enumerate(results):
+            chunk_sentences = [sentences[i] for i in sorted(kept) if owners[i] == chunk_idx]
+            if not chunk_sentences:
+                continue
+            metadata = dict(doc.metadata)
+            metadata['original_length'] = len(doc.page_content)
+            compressed.append((Document(page_content=" ".join(chunk_sentences), metadata=metadata), score))
+
+        compressed_tokens = sum(self.token_counter.count(doc.page_content) for doc, _ in compressed)
+        stats = {
+            "original_tokens": original_tokens,
+            "compressed_tokens": compressed_tokens,
+            "compression_ratio": compressed_tokens / original_tokens if original_tokens else 1.0,
+            "sentences_kept": len(kept),
+            "sentences_total": len(sentences)
+        }
+        return compressed, stats
@@ -4,9 +4,33 @@ Handles document retrieval and context building
 """
 
 from typing import List, Dict, Any, Optional
+import numpy as np
 from langchain.docstore.document import Document
 from vector_store import VectorStoreManager
-import re
+from upload_index import UploadIndexCache
+from keyword_index import reciprocal_rank_fusion
+from reranker import CrossEncoderReranker
+from context_compressor import ContextCompressor
+from token_budget import TokenCounter
+
+
+# What the first-stage score of each retrieval mode is, as reported in sources
+SCORE_TYPES = {"dense": "similarity", "keyword": "bm25", "hybrid": "rrf"}
+
+
+def distance_to_similarity(distance: float) -> float:
+    """
+    Cosine similarity from a squared L2 distance (the convention of Chroma's
+    l2 space and the in-process backends), exact for unit-length embeddings
+    such as those of the sentence-transformer models used here
+    """
+    return 1.0 - float(distance) / 2.0
+
+
+def _label_hits(results: List[tuple], score_type: str) -> List[tuple]:
+    """Copy hits with their score type in metadata (stored documents are shared)"""
+    return [(Document(page_content=doc.page_content, metadata={**doc.metadata, 'score_type': score_type}), score)
+            for doc, score in results]
 
 
 class ContextRetriever:
@@ -14,44 +38,308 @@ class ContextRetriever:
     Retrieves relevant context for queries using vector similarity search
     """
     
-    def __init__(self, vector_store_manager: VectorStoreManager):
+    def __init__(self, 
+                 vector_store_manager: VectorStoreManager,
+                 reranker: Optional[CrossEncoderReranker] = None,
+                 token_counter: Optional[TokenCounter] = None):
         """
         Initialize the context retriever
         
         Args:
             vector_store_manager: VectorStoreManager instance
+            reranker: Optional cross-encoder applied between search and
+                      context assembly
+            token_counter: Token counter shared with the query engine, used
+                           for the compression budget
         """
         self.vector_store = vector_store_manager
+        self.reranker = reranker
+        self.upload_indexes = UploadIndexCache(vector_store_manager)
+        self.compressor = ContextCompressor(vector_store_manager, token_counter=token_counter)
         
     def retrieve_context(self, 
                         query: str, 
                         k: int = 5,
                         min_score_threshold: float = 0.0,
                         max_context_length: int = 4000,
-                        include_metadata: bool = True) -> Dict[str, Any]:
+                        include_metadata: bool = True,
+                        upload_text: Optional[str] = None,
+                        upload_id: Optional[str] = None,
+                        upload_k: int = 3,
+                        mode: str = "dense",
+                        rerank: bool = True,
+                        rerank_top_n: Optional[int] = None,
+                        expand: Optional[str] = None,
+                        window: int = 1,
+                        compress: bool = False,
+                        token_budget: Optional[int] = None) -> Dict[str, Any]:
         """
         Retrieve relevant context for a query
         
         Args:
             query: User query
             k: Number of documents to retrieve
-            min_score_threshold: Minimum similarity score threshold
+            min_score_threshold: Minimum cosine similarity of vector search
+                                 hits (knowledge base and upload chunks),
+                                 applied before fusion and re-ranking;
+                                 BM25 hits are not thresholded
             max_context_length: Maximum total context length
             include_metadata: Whether to include metadata in response
+            upload_text: Text of a document uploaded with the query; it is
+                         chunked and indexed on its own and its most relevant
+                         chunks come first in the context
+            upload_id: Stable identifier of the upload (e.g. file hash)
+            upload_k: Number of upload chunks to retrieve
+            mode: "dense" (vector search), "keyword" (BM25 only, no embedding)
+                  or "hybrid" (BM25 and vector rankings fused with RRF)
+            rerank: Whether to apply the re-ranker (if one is configured)
+            rerank_top_n: Chunks kept after re-ranking (defaults to the re-ranker's top_n)
+            expand: "neighbors" to add the window chunks around each hit, or
+                    "parent" to use each hit's whole parent record
+            window: Number of neighbouring chunks on each side ("neighbors")
+            compress: Keep only the sentences most similar to the query
+            token_budget: Token budget of the compressed context
+                          (defaults to max_context_length / 4)
             
         Returns:
             Dictionary containing context and metadata
         """
-        # Get documents with similarity scores
-        results = self.vector_store.similarity_search_with_score(query, k=k)
+        # One pipeline for single and batched retrieval, so both return the same context
+        return self.retrieve_context_batch(
+            [query], k=k, min_score_threshold=min_score_threshold, max_context_length=max_context_length,
+            include_metadata=include_metadata, upload_text=upload_text, upload_id=upload_id,
+            upload_k=upload_k, mode=mode, rerank=rerank, rerank_top_n=rerank_top_n,
+            expand=expand, window=window, compress=compress, token_budget=token_budget
+        )[0]
+    
+    def _resolve_mode(self, mode: str) -> str:
+        """Retrieval mode actually used (keyword modes need the keyword index)"""
+        if mode != "dense" and not self.vector_store.has_keyword_index():
+            print(f"Keyword index unavailable, using dense retrieval instead of '{mode}'")
+            return "dense"
+        return mode
+    
+    def _dense_hits(self, results: List[tuple], min_similarity: float) -> List[tuple]:
+        """Vector search hits as (document, cosine similarity), below min_similarity dropped"""
+        hits = [(doc, distance_to_similarity(distance)) for doc, distance in results]
+        return _label_hits([(doc, score) for doc, score in hits if score >= min_similarity], "similarity")
+    
+    def _search(self, 
+                query: str, 
+                k: int, 
+                mode: str = "dense",
+                filter_dict: Optional[Dict[str, Any]] = None,
+                fetch_k: Optional[int] = None,
+                rrf_k: int = 60,
+                min_similarity: float = 0.0) -> List[tuple]:
+        """
+        Run the first-stage search for a retrieval mode
         
-        # Filter by score threshold
-        filtered_results = [
-            (doc, score) for doc, score in results 
-            if score >= min_score_threshold
-        ]
+        Args:
+            query: User query
+            k: Number of documents to return
+            mode: "dense", "keyword" or "hybrid" (already resolved)
+            filter_dict: Optional metadata filter
+            fetch_k: Candidates taken from each ranking before fusion (hybrid)
+            rrf_k: Reciprocal rank fusion constant (hybrid)
+            min_similarity: Minimum cosine similarity of vector search hits
+            
+        Returns:
+            List of (document, score) pairs, scored as SCORE_TYPES[mode]
+            (the type is also in each document's metadata['score_type'])
+        """
+        if mode == "keyword":
+            return _label_hits(self.vector_store.keyword_search(query, k=k, filter_dict=filter_dict), "bm25")
+        
+        if mode == "hybrid":
+            fetch_k = fetch_k or max(k * 4, 20)
+            dense_results = self._dense_hits(
+                self.vector_store.similarity_search_with_score(query, k=fetch_k, filter_dict=filter_dict),
+                min_similarity
+            )
+            keyword_results = self.vector_store.keyword_search(query, k=fetch_k, filter_dict=filter_dict)
+            return _label_hits(reciprocal_rank_fusion([dense_results, keyword_results], k=k, rrf_k=rrf_k), "rrf")
         
-        if not filtered_results:
+        return self._dense_hits(
+            self.vector_store.similarity_search_with_score(query, k=k, filter_dict=filter_dict), min_similarity
+        )
+    
+    def retrieve_hybrid_context(self, 
+                                query: str, 
+                                k: int = 5,
+                                **kwargs) -> Dict[str, Any]:
+        """
+        Retrieve context by fusing BM25 keyword and vector rankings
+        
+        Args:
+            query: User query
+            k: Number of documents to retrieve
+            **kwargs: Additional arguments for retrieve_context
+            
+        Returns:
+            Dictionary containing context and metadata
+        """
+        context_result = self.retrieve_context(query, k=k, mode="hybrid", **kwargs)
+        context_result["search_type"] = "hybrid"
+        return context_result
+    
+    def _expand_results(self, results: List[tuple], expand: str, window: int = 1) -> List[tuple]:
+        """
+        Expand hits to their neighbouring chunks or whole parent record
+        
+        Hits of the same parent whose windows overlap or touch are merged into
+        one passage, so shared chunks and the chunk overlaps are sent once.
+        Hits unknown to the adjacency index (e.g. upload chunks) are kept as is.
+        
+        Args:
+            results: Ranked (document, score) pairs
+            expand: "neighbors" or "parent"
+            window: Number of neighbouring chunks on each side
+            
+        Returns:
+            Ranked (document, score) pairs with expanded passages
+        """
+        chunk_index = self.vector_store.chunk_index
+        if chunk_index is None:
+            return results
+        
+        # Collect the chunk range each hit expands to, per parent, in rank order
+        spans = {}
+        order = []
+        for rank, (doc, score) in enumerate(results):
+            location = chunk_index.locate(doc.metadata.get('chunk_id', ''))
+            if location is None:
+                order.append(("hit", rank))
+                continue
+            
+            parent_id, position = location
+            if expand == "parent":
+                start, end = 0, chunk_index.chunk_count(parent_id) - 1
+            else:
+                start = max(0, position - window)
+                end = min(chunk_index.chunk_count(parent_id) - 1, position + window)
+            
+            if parent_id not in spans:
+                spans[parent_id] = []
+                order.append(("parent", parent_id))
+            spans[parent_id].append([start, end, doc, score])
+        
+        expanded = []
+        for kind, key in order:
+            if kind == "hit":
+                expanded.append(results[key])
+                continue
+            
+            # Merge overlapping/adjacent ranges, keeping the best hit's metadata
+            ranges = sorted(spans[key], key=lambda span: span[0])
+            merged = [ranges[0]]
+            for start, end, doc, score in ranges[1:]:
+                last = merged[-1]
+                if start <= last[1] + 1:
+                    last[1] = max(last[1], end)
+                else:
+                    merged.append([start, end, doc, score])
+            
+            for start, end, doc, score in merged:
+                text, chunk_ids = chunk_index.merged_text(key, start, end)
+                metadata = dict(doc.metadata)
+                metadata['expanded_chunk_ids'] = chunk_ids
+                expanded.append((Document(page_content=text, metadata=metadata), score))
+        
+        return expanded
+    
+    def retrieve_context_batch(self, 
+                               queries: List[str], 
+                               k: int = 5,
+                               min_score_threshold: float = 0.0,
+                               max_context_length: int = 4000,
+                               include_metadata: bool = True,
+                               upload_text: Optional[str] = None,
+                               upload_id: Optional[str] = None,
+                               upload_k: int = 3,
+                               mode: str = "dense",
+                               rerank: bool = True,
+                               rerank_top_n: Optional[int] = None,
+                               expand: Optional[str] = None,
+                               window: int = 1,
+                               compress: bool = False,
+                               token_budget: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Retrieve context for several queries at once
+        
+        Dense queries are embedded in one batched call and searched together,
+        and all candidates are re-ranked with one cross-encoder call; each
+        result is the same as retrieve_context would return for its query.
+        
+        Args:
+            queries: User queries
+            (other arguments as in retrieve_context, applied to every query)
+            
+        Returns:
+            List of context dictionaries, in input order
+        """
+        use_reranker = rerank and self.reranker is not None
+        mode = self._resolve_mode(mode)
+        
+        # Over-fetch candidates when a re-ranker will pick the best ones
+        search_k = max(k, self.reranker.fetch_k) if use_reranker else k
+        
+        # First-stage hits; min_score_threshold is applied here only, to the
+        # vector search similarities (re-ranker relevance is reported
+        # separately as rerank_score)
+        if mode == "dense" and len(queries) > 1:
+            batch_results = [
+                self._dense_hits(results, min_score_threshold)
+                for results in self.vector_store.similarity_search_batch_with_score(queries, k=search_k)
+            ]
+        else:
+            batch_results = [self._search(query, search_k, mode, min_similarity=min_score_threshold)
+                             for query in queries]
+        
+        # Upload chunks share the same context budget as the knowledge base
+        if upload_text and upload_text.strip():
+            upload_index = self.upload_indexes.get_index(upload_text, upload_id)
+            batch_results = [
+                self._dense_hits(upload_index.search(embedding, k=upload_k), min_score_threshold) + results
+                for embedding, results in zip(self.vector_store.embed_queries(queries), batch_results)
+            ]
+        
+        if use_reranker:
+            batch_results = self.reranker.rerank_batch(queries, batch_results, top_n=rerank_top_n)
+        
+        if expand:
+            batch_results = [self._expand_results(results, expand, window) for results in batch_results]
+        
+        context_results = []
+        for query, results in zip(queries, batch_results):
+            compression = None
+            if compress:
+                results, compression = self.compressor.compress(
+                    query, results, token_budget or max_context_length // 4
+                )
+            
+            context_result = self._build_context_result(
+                query, results, max_context_length, include_metadata
+            )
+            context_result["reranked"] = use_reranker
+            if compression:
+                context_result["compression"] = compression
+            context_results.append(context_result)
+        
+        return context_results
+    
+    def _build_context_result(self, 
+                              query: str, 
+                              results: List[tuple],
+                              max_context_length: int,
+                              include_metadata: bool) -> Dict[str, Any]:
+        """
+        Assemble the context dictionary from ranked (document, score) hits
+        
+        Each source reports its first-stage score under the name of its type
+        ("similarity_score", "bm25_score" or "rrf_score", see score_type).
+        """
+        if not results:
             return {
                 "context": "",
                 "sources": [],
@@ -65,7 +353,7 @@ class ContextRetriever:
         sources = []
         current_length = 0
         
-        for doc, score in filtered_results:
+        for doc, score in results:
             content = doc.page_content.strip()
             
             # Check if adding this chunk would exceed max length
@@ -82,13 +370,17 @@ class ContextRetriever:
             current_length += len(content)
             
             # Collect source information
+            score_type = doc.metadata.get('score_type', 'similarity')
             source_info = {
                 "chunk_id": doc.metadata.get('chunk_id', 'unknown'),
                 "source": doc.metadata.get('source', 'unknown'),
                 "category": doc.metadata.get('category', 'unknown'),
-                "similarity_score": float(score),
+                "score_type": score_type,
+                f"{score_type}_score": float(score),
                 "chunk_size": len(content)
             }
+            if 'rerank_score' in doc.metadata:
+                source_info["rerank_score"] = doc.metadata['rerank_score']
             
             if include_metadata:
                 source_info.update({
@@ -204,6 +496,8 @@ class ContextRetriever:
                            query: str, 
                            k: int = 10,
                            diversity_threshold: float = 0.7,
+                           mmr_lambda: Optional[float] = None,
+                           top_n: int = 5,
                            **kwargs) -> Dict[str, Any]:
         """
         Retrieve diverse context by avoiding very similar chunks
@@ -211,46 +505,44 @@ class ContextRetriever:
         Args:
             query: User query
             k: Number of documents to retrieve initially
-            diversity_threshold: Similarity threshold for diversity
+            diversity_threshold: Similarity threshold for diversity (word-overlap mode)
+            mmr_lambda: When set, use maximal marginal relevance on the stored
+                        embeddings instead of word overlap. 1.0 ranks purely by
+                        relevance, 0.0 purely by diversity.
+            top_n: Number of diverse chunks to keep
             **kwargs: Additional arguments for retrieve_context
             
         Returns:
             Dictionary containing diverse context and metadata
         """
-        # Get more documents initially
-        results = self.vector_store.similarity_search_with_score(query, k=k)
-        
-        if not results:
-            return {
-                "context": "",
-                "sources": [],
-                "total_chunks": 0,
-                "query": query,
-                "message": "No relevant documents found"
-            }
-        
-        # Simple diversity filtering - avoid chunks with high content overlap
-        diverse_results = []
-        seen_contents = []
-        
-        for doc, score in results:
-            content = doc.page_content.strip()
+        if mmr_lambda is not None:
+            results, embeddings, query_embedding = self.vector_store.similarity_search_with_embeddings(query, k=k)
             
-            # Check similarity with already selected content
-            is_diverse = True
-            for seen_content in seen_contents:
-                # Simple overlap check
-                overlap = self._calculate_text_overlap(content, seen_content)
-                if overlap > diversity_threshold:
-                    is_diverse = False
-                    break
+            if not results:
+                return {
+                    "context": "",
+                    "sources": [],
+                    "total_chunks": 0,
+                    "query": query,
+                    "message": "No relevant documents found"
+                }
             
-            if is_diverse:
-                diverse_results.append((doc, score))
-                seen_contents.append(content)
+            selected = self._mmr_select(query_embedding, embeddings, mmr_lambda, top_n)
+            diverse_results = [results[i] for i in selected]
+        else:
+            diverse_results = self._overlap_filter(query, k, diversity_threshold)
+            
+            if diverse_results is None:
+                return {
+                    "context": "",
+                    "sources": [],
+                    "total_chunks": 0,
+                    "query": query,
+                    "message": "No relevant documents found"
+                }
         
         # Limit to reasonable number
-        diverse_results = diverse_results[:5]
+        diverse_results = diverse_results[:top_n]
         
         # Build context from diverse results
         context_parts = []
@@ -291,9 +583,87 @@ class ContextRetriever:
             "query": query,
             "context_length": len(context),
             "diversity_applied": True,
+            "diversity_mode": "mmr" if mmr_lambda is not None else "word_overlap",
             "max_context_length": max_context_length
         }
     
+    def _overlap_filter(self, query: str, k: int, diversity_threshold: float) -> Optional[List[tuple]]:
+        """
+        Word-overlap diversity filter: skip chunks too similar to an already
+        selected one (None when the search returns nothing)
+        """
+        # Get more documents initially
+        results = self.vector_store.similarity_search_with_score(query, k=k)
+        
+        if not results:
+            return None
+        
+        # Simple diversity filtering - avoid chunks with high content overlap
+        diverse_results = []
+        seen_contents = []
+        
+        for doc, score in results:
+            content = doc.page_content.strip()
+            
+            # Check similarity with already selected content
+            is_diverse = True
+            for seen_content in seen_contents:
+                # Simple overlap check
+                overlap = self._calculate_text_overlap(content, seen_content)
+                if overlap > diversity_threshold:
+                    is_diverse = False
+                    break
+            
+            if is_diverse:
+                diverse_results.append((doc, score))
+                seen_contents.append(content)
+        
+        return diverse_results
+    
+    @staticmethod
+    def _mmr_select(query_embedding: np.ndarray, 
+                    embeddings: np.ndarray, 
+                    mmr_lambda: float, 
+                    top_n: int) -> List[int]:
+        """
+        Maximal marginal relevance selection as matrix operations
+        
+        Args:
+            query_embedding: Query vector
+            embeddings: Candidate vectors (one row per candidate)
+            mmr_lambda: Relevance/diversity trade-off (0-1)
+            top_n: Number of candidates to select
+            
+        Returns:
+            Indices of the selected candidates, in selection order
+        """
+        n = embeddings.shape[0]
+        top_n = min(top_n, n)
+        if top_n <= 0:
+            return []
+        
+        # Cosine similarities: candidates vs query and candidates vs each other
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        candidates = embeddings / np.maximum(norms, 1e-12)
+        query = query_embedding / max(np.linalg.norm(query_embedding), 1e-12)
+        relevance = candidates @ query
+        pairwise = candidates @ candidates.T
+        
+        selected = [int(np.argmax(relevance))]
+        max_redundancy = pairwise[selected[0]].copy()
+        available = np.ones(n, dtype=bool)
+        available[selected[0]] = False
+        
+        while len(selected) < top_n:
+            scores = mmr_lambda * relevance - (1 - mmr_lambda) * max_redundancy
+            scores[~available] = -np.inf
+            best = int(np.argmax(scores))
+            selected.append(best)
+            available[best] = False
+            max_redundancy = np.maximum(max_redundancy, pairwise[best])
+        
+        return selected
+    
     def _calculate_text_overlap(self, text1: str, text2: str) -> float:
         """
         Calculate simple text overlap ratio
@@ -335,7 +705,8 @@ class ContextRetriever:
         # Create query from keywords
         query = " ".join(keywords)
         
-        # Get context
+        # Get context (BM25 only, the embedding model is not used)
+        kwargs.setdefault("mode", "keyword")
         context_result = self.retrieve_context(query, k=k, **kwargs)
         
         # Add keyword information
@@ -429,7 +800,8 @@ if __name__ == "__main__":
             # Print first source
             if context_result["sources"]:
                 first_source = context_result["sources"][0]
-                print(f"\nTop result (Score: {first_source['similarity_score']:.4f}):")
+                score_type = first_source['score_type']
+                print(f"\nTop result ({score_type} score: {first_source[f'{score_type}_score']:.4f}):")
                 print(f"Source: {first_source['source']}")
                 print(f"Category: {first_source['category']}")
                 print(f"Preview: {context_result['context'][:200]}...")
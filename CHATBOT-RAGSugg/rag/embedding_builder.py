@@ -0,0 +1,157 @@
+"""
+Embedding Builder for RAG System
+Batched, optionally multi-process document embedding for index builds
+"""
+
+import os
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Dict, Optional, Any
+from embedding_cache import EmbeddingCache
+from encoders import ONNXEmbeddings
+
+
+# Per worker process: the encoder loaded by _init_worker
+_worker_model = None
+
+
+def _init_worker(model_name: str, threads: int, onnx_options: Optional[Dict[str, Any]] = None) -> None:
+    """Load one encoder per worker process, with its share of the CPU threads"""
+    global _worker_model
+    if onnx_options is not None:
+        _worker_model = ONNXEmbeddings(model_name, threads=threads, **onnx_options)
+        return
+
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    torch.set_num_threads(threads)
+    _worker_model = SentenceTransformer(model_name, device="cpu")
+
+
+def _encode_batch(texts: List[str], batch_size: int) -> List[List[float]]:
+    """Encode a batch in a worker (same preprocessing as SentenceTransformerEmbeddings)"""
+    if isinstance(_worker_model, ONNXEmbeddings):
+        return _worker_model.embed_documents(texts)
+
+    texts = [text.replace("\n", " ") for text in texts]
+    embeddings = _worker_model.encode(texts, batch_size=batch_size, show_progress_bar=False)
+    return embeddings.tolist()
+
+
+class EmbeddingBuilder:
+    """
+    Embeds document chunks in batches, sharded across worker processes
+    """
+
+    def __init__(self,
+                 model_name: str,
+                 embeddings: Optional[Any] = None,
+                 batch_size: int = 64,
+                 workers: int = 1,
+                 progress_every: int = 10,
+                 cache: Optional[EmbeddingCache] = None,
+                 onnx_options: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the builder
+
+        Args:
+            model_name: Sentence-transformer model name
+            embeddings: In-process embedding model, used when workers <= 1
+            batch_size: Chunks per encoding batch
+            workers: Worker processes, each with its own copy of the model
+                     (1 embeds in this process)
+            progress_every: Print progress every this many batches
+            cache: Optional persistent cache; only texts missing from it are encoded
+            onnx_options: model_dir/quantized of the ONNX encoder when workers
+                          should run ONNX Runtime (None loads sentence-transformers)
+        """
+        self.model_name = model_name
+        self.embeddings = embeddings
+        self.batch_size = batch_size
+        self.workers = workers
+        self.progress_every = progress_every
+        self.cache = cache
+        self.onnx_options = onnx_options
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed texts, printing progress and throughput
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            Embeddings in input order
+        """
+        if not texts or self.cache is None:
+            return self._encode(texts)
+
+        embeddings = self.cache.get_many(texts)
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        print(f"Embedding cache: {len(texts) - len(missing)}/{len(texts)} chunks cached, encoding {len(missing)}")
+
+        if missing:
+            missing_texts = [texts[i] for i in missing]
+            new_embeddings = self._encode(missing_texts)
+            self.cache.put_many(missing_texts, new_embeddings)
+            for i, embedding in zip(missing, new_embeddings):
+                embeddings[i] = embedding
+
+        return embeddings
+
+    def _encode(self, texts: List[str]) -> List[List[float]]:
+        """Encode texts with the model (in this process or the worker pool)"""
+        if not texts:
+            return []
+
+        started = time.perf_counter()
+        batches = [texts[start:start + self.batch_size] for start in range(0, len(texts), self.batch_size)]
+
+        if self.workers > 1 and len(batches) > 1:
+            embeddings = self._embed_parallel(batches, started, len(texts))
+        else:
+            embeddings = []
+            for i, batch in enumerate(batches, start=1):
+                embeddings.extend(self.embeddings.embed_documents(batch))
+                self._report(i, len(batches), len(embeddings), len(texts), started)
+
+        elapsed = time.perf_counter() - started
+        print(f"Embedded {len(texts)} chunks in {elapsed:.1f}s "
+              f"({len(texts) / elapsed if elapsed else 0:.1f} chunks/s, {self.workers} worker(s))")
+        return embeddings
+
+    def _embed_parallel(self, batches: List[List[str]], started: float, total: int) -> List[List[float]]:
+        """Shard batches over a pool of spawned worker processes"""
+        workers = min(self.workers, len(batches))
+        threads = max(1, (os.cpu_count() or 1) // workers)
+
+        results = [None] * len(batches)
+        done_chunks = 0
+
+        # Spawned (not forked) workers so they do not inherit the loaded models
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.model_name, threads, self.onnx_options)
+        ) as pool:
+            futures = {
+                pool.submit(_encode_batch, batch, self.batch_size): i
+                for i, batch in enumerate(batches)
+            }
+            for done, future in enumerate(as_completed(futures), start=1):
+                i = futures[future]
+                results[i] = future.result()
+                done_chunks += len(batches[i])
+                self._report(done, len(batches), done_chunks, total, started)
+
+        return [embedding for batch in results for embedding in batch]
+
+    def _report(self, done_batches: int, total_batches: int, done_chunks: int, total: int, started: float) -> None:
+        if done_batches % self.progress_every and done_batches != total_batches:
+            return
+        elapsed = time.perf_counter() - started
+        print(f"Embedding progress: {done_chunks}/{total} chunks "
+              f"({done_chunks / elapsed if elapsed else 0:.1f} chunks/s)")
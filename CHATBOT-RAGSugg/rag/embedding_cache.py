@@ -0,0 +1,140 @@
+"""
+Embedding Cache for RAG System
+Persistent chunk embeddings keyed by (embedding model, text hash), so rebuilds
+only encode text that was never embedded before
+"""
+
+import os
+import re
+import json
+import threading
+from typing import List, Dict, Any, Optional
+import numpy as np
+from index_manifest import text_hash
+
+
+class EmbeddingCache:
+    """
+    Memory-mapped float32 matrix per model plus a text hash -> row index
+    """
+
+    def __init__(self, cache_dir: str, model_name: str):
+        """
+        Initialize the embedding cache
+
+        Args:
+            cache_dir: Directory holding the cache files (kept outside the
+                       vector store directory so it survives rebuilds)
+            model_name: Embedding model; each model has its own files
+        """
+        self.cache_dir = cache_dir
+        self.model_name = model_name
+
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", model_name)
+        self.data_path = os.path.join(cache_dir, f"{safe_name}.f32")
+        self.index_path = os.path.join(cache_dir, f"{safe_name}.index.json")
+
+        self._lock = threading.Lock()
+        self._matrix = None
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self.dim, self.rows = self._load_index()
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data["dim"], data["rows"]
+        except (OSError, ValueError, KeyError):
+            return None, {}
+
+    def _save_index(self) -> None:
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"model_name": self.model_name, "dim": self.dim, "rows": self.rows}, f)
+        os.replace(tmp_path, self.index_path)
+
+    def _get_matrix(self) -> Optional[np.memmap]:
+        """Map the data file (caller holds the lock)"""
+        if self._matrix is None and self.dim and os.path.exists(self.data_path):
+            row_count = os.path.getsize(self.data_path) // (self.dim * 4)
+            if row_count:
+                self._matrix = np.memmap(self.data_path, dtype=np.float32, mode="r",
+                                         shape=(row_count, self.dim))
+        return self._matrix
+
+    def get_many(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """
+        Look up the embeddings of several texts
+
+        Returns:
+            One embedding per text, None for texts not in the cache
+        """
+        hashes = [text_hash(text) for text in texts]
+        results = [None] * len(texts)
+
+        with self._lock:
+            matrix = self._get_matrix()
+            if matrix is None:
+                self.misses += len(texts)
+                return results
+
+            for i, digest in enumerate(hashes):
+                row = self.rows.get(digest)
+                if row is not None and row < matrix.shape[0]:
+                    results[i] = matrix[row].tolist()
+                    self.hits += 1
+                else:
+                    self.misses += 1
+        return results
+
+    def put_many(self, texts: List[str], embeddings: List[List[float]]) -> None:
+        """Append the embeddings of texts not already cached"""
+        if not texts:
+            return
+
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        with self._lock:
+            if self.dim is None:
+                self.dim = int(vectors.shape[1])
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Embedding size {vectors.shape[1]} does not match the cache ({self.dim})")
+
+            new_rows = {}
+            for vector_idx, text in enumerate(texts):
+                digest = text_hash(text)
+                if digest not in self.rows and digest not in new_rows:
+                    new_rows[digest] = vector_idx
+            if not new_rows:
+                return
+
+            # Rows are appended after the whole rows the data file holds
+            # (including rows written before a crash but never indexed)
+            row_bytes = self.dim * 4
+            first_row = 0
+            if os.path.exists(self.data_path):
+                first_row = os.path.getsize(self.data_path) // row_bytes
+            with open(self.data_path, "ab") as f:
+                f.truncate(first_row * row_bytes)
+                f.write(vectors[list(new_rows.values())].tobytes())
+
+            for offset, digest in enumerate(new_rows):
+                self.rows[digest] = first_row + offset
+            self._save_index()
+            self._matrix = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "model_name": self.model_name,
+                "entries": len(self.rows),
+                "dim": self.dim,
+                "size_bytes": os.path.getsize(self.data_path) if os.path.exists(self.data_path) else 0,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "cache_dir": self.cache_dir
+            }
@@ -0,0 +1,275 @@
+"""
+Embedding Encoders for RAG System
+Sentence-transformer models run with PyTorch, or exported to ONNX (optionally
+int8 quantized) and run with ONNX Runtime on CPU
+"""
+
+import os
+import re
+import json
+import time
+from typing import List, Dict, Any, Optional
+import numpy as np
+
+
+ONNX_MODEL_FILE = "model.onnx"
+ONNX_INT8_MODEL_FILE = "model_int8.onnx"
+ENCODER_CONFIG_FILE = "encoder_config.json"
+
+ENCODERS = ("torch", "onnx")
+
+
+def export_onnx_model(model_name: str, output_dir: str, quantize: bool = False) -> str:
+    """
+    Export a sentence-transformer model to ONNX (needs torch and
+    sentence-transformers; only done once per model)
+
+    The graph returns the token embeddings of the transformer; pooling and
+    normalization are applied by ONNXEmbeddings as recorded in the encoder config.
+
+    Args:
+        model_name: Sentence-transformer model name
+        output_dir: Directory receiving the model, tokenizer and encoder config
+        quantize: Also write a dynamically int8 quantized copy of the model
+
+    Returns:
+        Path of the exported (quantized if requested) model
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    os.makedirs(output_dir, exist_ok=True)
+    model_path = os.path.join(output_dir, ONNX_MODEL_FILE)
+
+    if not os.path.exists(model_path):
+        print(f"Exporting {model_name} to ONNX in {output_dir}...")
+        st_model = SentenceTransformer(model_name, device="cpu")
+        transformer = st_model[0]
+        tokenizer = transformer.tokenizer
+
+        dummy = tokenizer(["ONNX export"], return_tensors="pt")
+        input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in dummy]
+
+        class _TokenEmbeddings(torch.nn.Module):
+            def __init__(self, model):
+                super().__init__()
+                self.model = model
+
+            def forward(self, *inputs):
+                return self.model(**dict(zip(input_names, inputs)))[0]
+
+        dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+        dynamic_axes["token_embeddings"] = {0: "batch", 1: "sequence"}
+        torch.onnx.export(
+            _TokenEmbeddings(transformer.auto_model.eval()),
+            tuple(dummy[name] for name in input_names),
+            model_path,
+            input_names=input_names,
+            output_names=["token_embeddings"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14
+        )
+
+        tokenizer.save_pretrained(output_dir)
+        pooling = st_model[1]
+        config = {
+            "model_name": model_name,
+            "max_seq_length": st_model.max_seq_length,
+            "pooling": "cls" if getattr(pooling, "pooling_mode_cls_token", False) else "mean",
+            "normalize": any(type(module).__name__ == "Normalize" for module in st_model),
+            "pad_token": tokenizer.pad_token,
+            "pad_token_id": tokenizer.pad_token_id
+        }
+        with open(os.path.join(output_dir, ENCODER_CONFIG_FILE), "w", encoding="utf-8") as f:
+            json.dump(config, f, indent=2)
+
+    if not quantize:
+        return model_path
+
+    int8_path = os.path.join(output_dir, ONNX_INT8_MODEL_FILE)
+    if not os.path.exists(int8_path):
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+
+        print(f"Quantizing {model_path} to int8...")
+        quantize_dynamic(model_path, int8_path, weight_type=QuantType.QInt8)
+    return int8_path
+
+
+class ONNXEmbeddings:
+    """
+    Sentence embeddings with ONNX Runtime (same interface as the LangChain
+    embedding classes: embed_documents / embed_query)
+    """
+
+    def __init__(self,
+                 model_name: str,
+                 model_dir: str = "models/onnx",
+                 quantized: bool = False,
+                 threads: Optional[int] = None,
+                 batch_size: int = 32):
+        """
+        Initialize the encoder, exporting the model on first use
+
+        Args:
+            model_name: Sentence-transformer model name
+            model_dir: Directory of exported models (one subdirectory per model)
+            quantized: Run the int8 quantized model
+            threads: ONNX Runtime intra-op threads (None lets it use every core)
+            batch_size: Texts per inference call
+        """
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.model_name = model_name
+        self.quantized = quantized
+        self.threads = threads
+        self.batch_size = batch_size
+        self.model_dir = os.path.join(model_dir, re.sub(r"[^A-Za-z0-9_.-]", "_", model_name))
+
+        model_file = ONNX_INT8_MODEL_FILE if quantized else ONNX_MODEL_FILE
+        model_path = os.path.join(self.model_dir, model_file)
+        if not os.path.exists(model_path):
+            export_onnx_model(model_name, self.model_dir, quantize=quantized)
+
+        with open(os.path.join(self.model_dir, ENCODER_CONFIG_FILE), "r", encoding="utf-8") as f:
+            self.config = json.load(f)
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(model_path, sess_options=options,
+                                            providers=["CPUExecutionProvider"])
+        self.input_names = [model_input.name for model_input in self.session.get_inputs()]
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(self.model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=self.config["max_seq_length"])
+        self.tokenizer.enable_padding(pad_id=self.config["pad_token_id"], pad_token=self.config["pad_token"])
+
+        print(f"Loaded ONNX encoder: {model_path}")
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts
+
+        Returns:
+            float32 matrix, one row per text in input order
+        """
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        # Batches of similar length pad less
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        embeddings = [None] * len(texts)
+
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            encodings = self.tokenizer.encode_batch([texts[i] for i in batch])
+            attention_mask = np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64)
+            inputs = {
+                "input_ids": np.array([encoding.ids for encoding in encodings], dtype=np.int64),
+                "attention_mask": attention_mask,
+                "token_type_ids": np.array([encoding.type_ids for encoding in encodings], dtype=np.int64)
+            }
+            token_embeddings = self.session.run(None, {name: inputs[name] for name in self.input_names})[0]
+
+            if self.config["pooling"] == "cls":
+                pooled = token_embeddings[:, 0]
+            else:
+                mask = attention_mask[:, :, None].astype(np.float32)
+                pooled = (token_embeddings * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+            if self.config["normalize"]:
+                pooled = pooled / np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+
+            for i, embedding in zip(batch, pooled):
+                embeddings[i] = embedding
+
+        return np.asarray(embeddings, dtype=np.float32)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        # Same preprocessing as SentenceTransformerEmbeddings
+        return self.encode([text.replace("\n", " ") for text in texts]).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+def create_encoder(model_name: str,
+                   encoder: str = "torch",
+                   model_dir: str = "models/onnx",
+                   quantized: bool = False,
+                   threads: Optional[int] = None) -> Any:
+    """
+    Build an embedding model by encoder name
+
+    Args:
+        model_name: Sentence-transformer model name
+        encoder: "torch" (sentence-transformers) or "onnx" (ONNX Runtime)
+        model_dir: Directory of exported ONNX models
+        quantized: Use the int8 quantized ONNX model
+        threads: CPU threads of the ONNX Runtime session
+
+    Returns:
+        Embedding model with embed_documents / embed_query
+    """
+    if encoder == "torch":
+        from langchain_community.embeddings import SentenceTransformerEmbeddings
+        return SentenceTransformerEmbeddings(model_name=model_name)
+    if encoder == "onnx":
+        return ONNXEmbeddings(model_name, model_dir=model_dir, quantized=quantized, threads=threads)
+    raise ValueError(f"Unknown encoder '{encoder}' (expected one of {ENCODERS})")
+
+
+def embedding_variant(model_name: str, encoder: str = "torch", quantized: bool = False) -> str:
+    """
+    Key of the embeddings an encoder produces, for caches
+
+    The float32 ONNX export matches PyTorch to float precision and shares its
+    key; int8 quantized embeddings differ slightly and are cached separately.
+    """
+    if encoder == "onnx" and quantized:
+        return f"{model_name}@onnx-int8"
+    return model_name
+
+
+def compare_encoders(reference: Any, candidate: Any, texts: List[str], runs: int = 3) -> Dict[str, Any]:
+    """
+    Parity and latency of a candidate encoder against a reference encoder
+
+    Args:
+        reference: Embedding model the index was built with
+        candidate: Embedding model to compare
+        texts: Sample texts (e.g. queries)
+        runs: Timed passes over the texts, one text per call as in query serving
+
+    Returns:
+        Cosine similarity / absolute difference between the embeddings, and
+        per-text latency of both encoders
+    """
+    expected = np.asarray(reference.embed_documents(texts), dtype=np.float32)
+    actual = np.asarray(candidate.embed_documents(texts), dtype=np.float32)
+    cosine = np.sum(expected * actual, axis=1) / np.maximum(
+        np.linalg.norm(expected, axis=1) * np.linalg.norm(actual, axis=1), 1e-12)
+
+    def latencies(model):
+        timings = []
+        for _ in range(runs):
+            for text in texts:
+                started = time.perf_counter()
+                model.embed_query(text)
+                timings.append((time.perf_counter() - started) * 1000)
+        return np.asarray(timings)
+
+    reference_ms = latencies(reference)
+    candidate_ms = latencies(candidate)
+    return {
+        "texts": len(texts),
+        "cosine_min": float(cosine.min()),
+        "cosine_mean": float(cosine.mean()),
+        "max_abs_diff": float(np.abs(expected - actual).max()),
+        "reference_ms_p50": float(np.percentile(reference_ms, 50)),
+        "reference_ms_p95": float(np.percentile(reference_ms, 95)),
+        "candidate_ms_p50": float(np.percentile(candidate_ms, 50)),
+        "candidate_ms_p95": float(np.percentile(candidate_ms, 95)),
+        "speedup_p50": float(np.percentile(reference_ms, 50) / np.percentile(candidate_ms, 50))
+    }
@@ -0,0 +1,151 @@
+"""
+Index Builds for RAG System
+Blue/green vector database rebuilds: each build gets its own directory and the
+live path is a symlink that is switched atomically once the build is validated
+
+Where symlinks cannot be created (Windows without Developer Mode or admin
+rights) the live build is recorded in a CURRENT pointer file inside the
+builds directory instead; open the database through current_build() so
+both layouts work.
+"""
+
+import os
+import shutil
+from datetime import datetime
+from typing import List
+
+
+# Name given to a pre-existing (non-symlink) database when it is moved aside;
+# sorts before every timestamped build so it is pruned first
+LEGACY_BUILD_NAME = "00000000-000000-legacy"
+
+# Pointer file naming the live build when the live path cannot be a symlink
+POINTER_FILE_NAME = "CURRENT"
+
+
+def builds_directory(live_path: str) -> str:
+    """Directory holding every build of the database at live_path"""
+    return f"{os.path.normpath(live_path)}.builds"
+
+
+def pointer_file(live_path: str) -> str:
+    """Path of the CURRENT pointer file of the database at live_path"""
+    return os.path.join(builds_directory(live_path), POINTER_FILE_NAME)
+
+
+def current_build(live_path: str) -> str:
+    """
+    Directory the live path points to: the symlink target, else the build
+    named in the CURRENT pointer file, else live_path itself (plain directory)
+    """
+    if os.path.islink(live_path):
+        return os.path.realpath(live_path)
+
+    try:
+        with open(pointer_file(live_path), "r", encoding="utf-8") as f:
+            name = f.read().strip()
+    except OSError:
+        name = ""
+    if name and os.path.isdir(os.path.join(builds_directory(live_path), name)):
+        return os.path.realpath(os.path.join(builds_directory(live_path), name))
+
+    return os.path.realpath(live_path)
+
+
+def new_build_directory(live_path: str) -> str:
+    """
+    Create an empty staging directory for a rebuild
+
+    Returns:
+        Path of the new build directory
+    """
+    name = f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{os.getpid()}"
+    path = os.path.join(builds_directory(live_path), name)
+    os.makedirs(path)
+    return path
+
+
+def list_builds(live_path: str) -> List[str]:
+    """Build directories, oldest first"""
+    directory = builds_directory(live_path)
+    if not os.path.isdir(directory):
+        return []
+    return [os.path.join(directory, name) for name in sorted(os.listdir(directory))
+            if os.path.isdir(os.path.join(directory, name))]
+
+
+def swap_in(live_path: str, build_path: str, keep: int = 2) -> None:
+    """
+    Point the live path at a validated build
+
+    The symlink is replaced with os.replace, so readers see either the old or
+    the new build, never a missing or half-written one. Processes that opened
+    the old build keep using it; it is only deleted once `keep` newer builds
+    exist. A plain directory at live_path (from before blue/green rebuilds)
+    is first moved into the builds directory.
+
+    Symlinks need a POSIX system, or on Windows Developer Mode or admin
+    rights. If one cannot be created, the build name is written to the
+    CURRENT pointer file (also replaced atomically) and live_path is left
+    absent; readers must resolve the database with current_build().
+
+    Args:
+        live_path: Path the application opens (e.g. "chroma_db")
+        build_path: Build directory to make live
+        keep: Builds kept on disk, including the new one
+    """
+    live_path = os.path.normpath(live_path)
+
+    if os.path.isdir(live_path) and not os.path.islink(live_path):
+        legacy_path = os.path.join(builds_directory(live_path), LEGACY_BUILD_NAME)
+        if os.path.exists(legacy_path):
+            shutil.rmtree(legacy_path)
+        os.replace(live_path, legacy_path)
+        print(f"Moved existing vector database to {legacy_path}")
+
+    # Relative target, so the project directory can be moved
+    target = os.path.relpath(build_path, os.path.dirname(os.path.abspath(live_path)))
+    tmp_link = f"{live_path}.swap-{os.getpid()}"
+    try:
+        if os.path.lexists(tmp_link):
+            os.remove(tmp_link)
+        os.symlink(target, tmp_link, target_is_directory=True)
+        os.replace(tmp_link, live_path)
+    except (OSError, NotImplementedError) as e:
+        if os.path.lexists(tmp_link):
+            os.remove(tmp_link)
+        print(f"Could not symlink {live_path} ({e}); recording the live build in {pointer_file(live_path)}")
+        _write_pointer(live_path, build_path)
+        # current_build prefers a symlink, so an old one must not shadow the pointer
+        if os.path.islink(live_path):
+            os.remove(live_path)
+    else:
+        # A pointer left from an earlier fallback would be stale
+        if os.path.exists(pointer_file(live_path)):
+            os.remove(pointer_file(live_path))
+    print(f"Vector database {live_path} now points to {build_path}")
+
+    prune_builds(live_path, keep)
+
+
+def _write_pointer(live_path: str, build_path: str) -> None:
+    """Atomically record build_path as the live build in the CURRENT pointer file"""
+    path = pointer_file(live_path)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(os.path.basename(os.path.normpath(build_path)))
+    os.replace(tmp_path, path)
+
+
+def prune_builds(live_path: str, keep: int = 2) -> None:
+    """Delete all but the newest `keep` builds (never the live one)"""
+    live_build = current_build(live_path)
+    builds = list_builds(live_path)
+    for path in builds[:max(0, len(builds) - keep)]:
+        if os.path.realpath(path) == live_build:
+            continue
+        try:
+            shutil.rmtree(path)
+            print(f"Deleted old vector database build {path}")
+        except OSError as e:
+            print(f"Warning: could not delete old build {path}: {e}")
@@ -0,0 +1,103 @@
+"""
+Index Manifest for RAG System
+Records a content hash per chunk so the vector store can be updated incrementally
+"""
+
+import os
+import json
+import hashlib
+from typing import List, Dict, Optional
+from langchain.docstore.document import Document
+
+
+def text_hash(text: str) -> str:
+    """SHA-256 of a chunk's text (what the embedding depends on)"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def chunk_hashes(doc: Document) -> List[str]:
+    """[text hash, metadata hash] of a chunk"""
+    metadata = json.dumps(doc.metadata, sort_keys=True, ensure_ascii=False, default=str)
+    return [text_hash(doc.page_content), hashlib.sha256(metadata.encode("utf-8")).hexdigest()]
+
+
+class IndexManifest:
+    """
+    chunk_id -> [text hash, metadata hash] of everything stored in the vector store
+    """
+
+    def __init__(self, embedding_model: str, hashes: Optional[Dict[str, List[str]]] = None):
+        """
+        Initialize the manifest
+
+        Args:
+            embedding_model: Embedding variant (model and encoder) the stored
+                embeddings were computed with
+            hashes: chunk_id -> [text hash, metadata hash]
+        """
+        self.embedding_model = embedding_model
+        self.hashes = hashes or {}
+
+    @classmethod
+    def from_documents(cls, documents: List[Document], embedding_model: str) -> "IndexManifest":
+        return cls(embedding_model, {doc.metadata['chunk_id']: chunk_hashes(doc) for doc in documents})
+
+    def diff(self, documents: List[Document]) -> Dict[str, List[str]]:
+        """
+        Compare the manifest with a new set of chunks
+
+        Args:
+            documents: Chunks the store should contain
+
+        Returns:
+            Dictionary of chunk id lists: "added", "changed" (text changed, needs
+            re-embedding), "metadata_changed" (same text), "removed", "unchanged"
+        """
+        new_hashes = {doc.metadata['chunk_id']: chunk_hashes(doc) for doc in documents}
+
+        diff = {"added": [], "changed": [], "metadata_changed": [], "removed": [], "unchanged": []}
+        for chunk_id, digests in new_hashes.items():
+            old_digests = self.hashes.get(chunk_id)
+            if old_digests is None:
+                diff["added"].append(chunk_id)
+            elif old_digests[0] != digests[0]:
+                diff["changed"].append(chunk_id)
+            elif old_digests[1] != digests[1]:
+                diff["metadata_changed"].append(chunk_id)
+            else:
+                diff["unchanged"].append(chunk_id)
+
+        diff["removed"] = [chunk_id for chunk_id in self.hashes if chunk_id not in new_hashes]
+        return diff
+
+    def save(self, path: str) -> None:
+        """Persist the manifest as JSON"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"embedding_model": self.embedding_model, "chunks": self.hashes}, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["IndexManifest"]:
+        """
+        Load a persisted manifest
+
+        Returns:
+            IndexManifest, or None if the file is missing or unreadable
+        """
+        if not os.path.exists(path):
+            return None
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return cls(data["embedding_model"], data["chunks"])
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Error loading index manifest: {str(e)}")
+            return None
+
+
+def has_unique_chunk_ids(documents: List[Document]) -> bool:
+    """Whether every chunk has a distinct chunk_id (required for id-based upserts)"""
+    chunk_ids = [doc.metadata.get('chunk_id') for doc in documents]
+    return None not in chunk_ids and len(set(chunk_ids)) == len(chunk_ids)
@@ -0,0 +1,232 @@
+"""
+Keyword Index for RAG System
+In-process BM25 inverted index built from the same chunks as the vector store
+"""
+
+import os
+import re
+import json
+import math
+import heapq
+from collections import Counter
+from typing import List, Dict, Any, Optional, Tuple
+from langchain.docstore.document import Document
+
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase alphanumeric tokens (so "WACC" and "eToro" match exactly)"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """
+    BM25 inverted index over document chunks
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        """
+        Initialize an empty index
+
+        Args:
+            k1: Term frequency saturation
+            b: Document length normalization
+        """
+        self.k1 = k1
+        self.b = b
+        # Removed documents leave a None slot until the index is saved
+        self.documents: List[Optional[Document]] = []
+        self.doc_lengths: List[int] = []
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+        self.total_length = 0
+        # chunk_id -> document slots, for removals
+        self.positions: Dict[str, List[int]] = {}
+        self.live_count = 0
+
+    def __len__(self) -> int:
+        return self.live_count
+
+    def add_documents(self, documents: List[Document]) -> None:
+        """
+        Index documents
+
+        Args:
+            documents: Chunked documents (the same ones sent to the vector store)
+        """
+        for doc in documents:
+            doc_idx = len(self.documents)
+            tokens = tokenize(doc.page_content)
+
+            self.documents.append(doc)
+            self.doc_lengths.append(len(tokens))
+            self.total_length += len(tokens)
+            self.live_count += 1
+            chunk_id = doc.metadata.get('chunk_id')
+            if chunk_id is not None:
+                self.positions.setdefault(chunk_id, []).append(doc_idx)
+
+            for term, tf in Counter(tokens).items():
+                self.postings.setdefault(term, []).append((doc_idx, tf))
+
+    def remove(self, ids: List[str]) -> None:
+        """
+        Drop the documents stored under the given chunk ids
+
+        Only the posting lists of the removed documents' terms are touched.
+        Call before re-adding changed chunks, so they are not indexed twice.
+
+        Args:
+            ids: chunk_id values (unknown ids are ignored)
+        """
+        for chunk_id in ids:
+            for doc_idx in self.positions.pop(chunk_id, []):
+                doc = self.documents[doc_idx]
+                for term in set(tokenize(doc.page_content)):
+                    postings = [posting for posting in self.postings[term] if posting[0] != doc_idx]
+                    if postings:
+                        self.postings[term] = postings
+                    else:
+                        del self.postings[term]
+
+                self.total_length -= self.doc_lengths[doc_idx]
+                self.doc_lengths[doc_idx] = 0
+                self.documents[doc_idx] = None
+                self.live_count -= 1
+
+    def _compact(self) -> None:
+        """Renumber the documents without the slots of removed ones"""
+        live = [doc_idx for doc_idx, doc in enumerate(self.documents) if doc is not None]
+        if len(live) == len(self.documents):
+            return
+
+        new_idx = {old: new for new, old in enumerate(live)}
+        self.documents = [self.documents[doc_idx] for doc_idx in live]
+        self.doc_lengths = [self.doc_lengths[doc_idx] for doc_idx in live]
+        self.postings = {
+            term: [(new_idx[doc_idx], tf) for doc_idx, tf in postings]
+            for term, postings in self.postings.items()
+        }
+        self.positions = {
+            chunk_id: [new_idx[doc_idx] for doc_idx in slots]
+            for chunk_id, slots in self.positions.items()
+        }
+
+    def search(self, query: str, k: int = 5,
+               filter_dict: Optional[Dict[str, Any]] = None) -> List[Tuple[Document, float]]:
+        """
+        Rank documents against a query
+
+        Args:
+            query: Query text (or space separated keywords)
+            k: Number of documents to return
+            filter_dict: Optional metadata equality filter
+
+        Returns:
+            List of (document, BM25 score) pairs, best first
+        """
+        if not self.live_count:
+            return []
+
+        n_docs = self.live_count
+        avg_length = self.total_length / n_docs if n_docs else 0.0
+        scores: Dict[int, float] = {}
+
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_idx, tf in postings:
+                length_norm = 1 - self.b + self.b * self.doc_lengths[doc_idx] / (avg_length or 1)
+                scores[doc_idx] = scores.get(doc_idx, 0.0) + idf * tf * (self.k1 + 1) / (tf + self.k1 * length_norm)
+
+        if filter_dict:
+            scores = {
+                doc_idx: score for doc_idx, score in scores.items()
+                if all(self.documents[doc_idx].metadata.get(key) == value
+                       for key, value in filter_dict.items())
+            }
+
+        top = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [(self.documents[doc_idx], score) for doc_idx, score in top]
+
+    def save(self, path: str) -> None:
+        """Persist the index as JSON"""
+        self._compact()
+        data = {
+            "k1": self.k1,
+            "b": self.b,
+            "documents": [
+                {"content": doc.page_content, "metadata": doc.metadata}
+                for doc in self.documents
+            ],
+            "doc_lengths": self.doc_lengths,
+            "postings": self.postings
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["BM25Index"]:
+        """
+        Load a persisted index
+
+        Returns:
+            BM25Index, or None if the file is missing or unreadable
+        """
+        if not os.path.exists(path):
+            return None
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error loading keyword index: {str(e)}")
+            return None
+
+        index = cls(k1=data["k1"], b=data["b"])
+        index.documents = [
+            Document(page_content=item["content"], metadata=item["metadata"])
+            for item in data["documents"]
+        ]
+        index.doc_lengths = data["doc_lengths"]
+        index.postings = {term: [tuple(p) for p in postings] for term, postings in data["postings"].items()}
+        index.total_length = sum(index.doc_lengths)
+        index.live_count = len(index.documents)
+        for doc_idx, doc in enumerate(index.documents):
+            chunk_id = doc.metadata.get('chunk_id')
+            if chunk_id is not None:
+                index.positions.setdefault(chunk_id, []).append(doc_idx)
+        return index
+
+
+def reciprocal_rank_fusion(rankings: List[List[Tuple[Document, float]]],
+                           k: int = 5,
+                           rrf_k: int = 60) -> List[Tuple[Document, float]]:
+    """
+    Fuse several rankings with reciprocal rank fusion
+
+    Args:
+        rankings: Ranked (document, score) lists; the scores themselves are ignored
+        k: Number of documents to return
+        rrf_k: RRF damping constant
+
+    Returns:
+        List of (document, fused score) pairs, best first
+    """
+    fused: Dict[str, float] = {}
+    documents: Dict[str, Document] = {}
+
+    for ranking in rankings:
+        for rank, (doc, _) in enumerate(ranking, start=1):
+            key = doc.metadata.get('chunk_id') or doc.page_content
+            fused[key] = fused.get(key, 0.0) + 1.0 / (rrf_k + rank)
+            documents.setdefault(key, doc)
+
+    top = heapq.nlargest(k, fused.items(), key=lambda item: item[1])
+    return [(documents[key], score) for key, score in top]
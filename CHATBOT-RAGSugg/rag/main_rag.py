@@ -6,15 +6,25 @@ Integrates all components: document loading, chunking, vector storage, and query
 import os
 import sys
 import argparse
-from typing import Dict, Any, List, Optional
+import hashlib
+import shutil
+import time
+from typing import Dict, Any, List, Optional, Iterator, AsyncIterator
 from pathlib import Path
+from concurrent.futures import Executor
 
 # Import all components
+from langchain.docstore.document import Document
 from document_loader import load_training_data
 from chunking_processor import process_training_data
 from vector_store import VectorStoreManager, create_vector_database
 from context_retriever import ContextRetriever
 from code_engine import OllamaQueryEngine
+from response_cache import ResponseCache
+from reranker import CrossEncoderReranker
+from encoders import create_encoder, compare_encoders
+from index_builds import current_build, new_build_directory, swap_in
+from token_budget import TokenCounter
 
 
 class RAGSystem:
@@ -26,7 +36,23 @@ class RAGSystem:
                  data_path: str = "processed_data/training_data.json",
                  vector_db_path: str = "chroma_db",
                  model_name: str = "mistral:latest",
-                 ollama_url: str = "http://127.0.0.1:11434"):
+                 ollama_url: str = "http://127.0.0.1:11434",
+                 response_cache: Optional[ResponseCache] = None,
+                 ollama_pool_size: int = 10,
+                 ollama_connect_timeout: float = 10,
+                 ollama_read_timeout: float = 120,
+                 reranker_model: Optional[str] = None,
+                 rerank_top_n: int = 3,
+                 context_window: int = 8192,
+                 tokenizer_name: Optional[str] = None,
+                 embedding_workers: int = 1,
+                 embedding_batch_size: int = 64,
+                 embedding_cache_dir: Optional[str] = "cache/embeddings",
+                 vector_backend: str = "chroma",
+                 vector_quantization: str = "int8",
+                 encoder: str = "torch",
+                 encoder_int8: bool = False,
+                 encoder_threads: Optional[int] = None):
         """
         Initialize the RAG system
         
@@ -35,11 +61,51 @@ class RAGSystem:
             vector_db_path: Path to ChromaDB storage
             model_name: Ollama model name
             ollama_url: Ollama server URL
+            response_cache: Optional cache of query results
+            ollama_pool_size: Keep-alive connections kept to Ollama
+            ollama_connect_timeout: Seconds to wait for a connection to Ollama
+            ollama_read_timeout: Seconds to wait for data from Ollama
+            reranker_model: Cross-encoder used to re-rank retrieved chunks
+                            (None disables re-ranking)
+            rerank_top_n: Number of chunks kept after re-ranking
+            context_window: Model context window in tokens the prompt is fitted into
+            tokenizer_name: Hugging Face tokenizer of the model for exact
+                            token counts (None uses a calibrated estimate)
+            embedding_workers: Worker processes used to embed chunks when
+                               (re)building the vector database
+            embedding_batch_size: Chunks per embedding batch during builds
+            embedding_cache_dir: Persistent cache of chunk embeddings reused
+                                 across rebuilds (None disables it)
+            vector_backend: Vector index backend, "chroma", "hnsw" or "quantized"
+            vector_quantization: Code type of the quantized backend, "int8" or "float16"
+            encoder: Embedding runtime, "torch" (sentence-transformers) or
+                     "onnx" (ONNX Runtime, exported on first use)
+            encoder_int8: Run the int8 quantized ONNX model
+            encoder_threads: CPU threads of the ONNX Runtime session
         """
         self.data_path = data_path
         self.vector_db_path = vector_db_path
         self.model_name = model_name
         self.ollama_url = ollama_url
+        self.response_cache = response_cache
+        self.ollama_pool_size = ollama_pool_size
+        self.ollama_connect_timeout = ollama_connect_timeout
+        self.ollama_read_timeout = ollama_read_timeout
+        self.reranker_model = reranker_model
+        self.rerank_top_n = rerank_top_n
+        self.context_window = context_window
+        self.tokenizer_name = tokenizer_name
+        self.embedding_workers = embedding_workers
+        self.embedding_batch_size = embedding_batch_size
+        self.embedding_cache_dir = embedding_cache_dir
+        self.vector_backend = vector_backend
+        self.vector_quantization = vector_quantization
+        self.encoder = encoder
+        self.encoder_int8 = encoder_int8
+        self.encoder_threads = encoder_threads
+        
+        # Build directory behind vector_db_path this instance has open
+        self.index_path = None
         
         # Components
         self.vector_manager = None
@@ -49,9 +115,23 @@ class RAGSystem:
         # Status
         self.is_initialized = False
     
+    def _backend_options(self) -> dict:
+        """Options of the selected vector backend"""
+        if self.vector_backend == "quantized":
+            return {"quantization": self.vector_quantization}
+        return {}
+    
+    def _encoder_options(self) -> dict:
+        """Options of the selected embedding encoder"""
+        if self.encoder == "onnx":
+            return {"quantized": self.encoder_int8, "threads": self.encoder_threads}
+        return {}
+    
     def setup(self, force_recreate_db: bool = False, 
           chunk_size: int = 1000, 
-          chunk_overlap: int = 200) -> bool:
+          chunk_overlap: int = 200,
+          incremental: bool = False,
+          validation_queries: Optional[List[str]] = None) -> bool:
         """
         Set up the complete RAG system
         
@@ -59,6 +139,10 @@ class RAGSystem:
             force_recreate_db: Whether to recreate the vector database
             chunk_size: Size of text chunks
             chunk_overlap: Overlap between chunks
+            incremental: Sync the existing vector database with the training
+                         data, re-embedding only new or changed chunks
+            validation_queries: Queries a rebuilt database must answer before
+                                it replaces the live one
             
         Returns:
             True if setup successful, False otherwise
@@ -73,35 +157,54 @@ class RAGSystem:
             
             # Step 2: Create or load vector database
             print(" Setting up vector database...")
-            self.vector_manager = VectorStoreManager(
-                persist_directory=self.vector_db_path
-            )
-            
             if force_recreate_db:
-                print("Force recreate requested: deleting existing vector store...")
-                self.vector_manager.delete_collection()
-                print("Creating new vector database...")
-                self._create_new_database(chunk_size, chunk_overlap)
+                # The live database keeps serving until the new one is swapped in
+                print("Force recreate requested: rebuilding vector store in a staging directory...")
+                self.rebuild_index(chunk_size, chunk_overlap, validation_queries)
             else:
-                print("Attempting to load existing vector store...")
-                existing_db = self.vector_manager.load_vectorstore()
-                if existing_db:
-                    print("Using existing vector database")
+                # Open the build directory itself, so a later swap of
+                # vector_db_path cannot change files under this instance
+                self.index_path = current_build(self.vector_db_path)
+                self.vector_manager = self._new_vector_manager(self.index_path, chunk_overlap)
+                
+                if incremental:
+                    print("Incremental update requested: syncing vector store with training data...")
+                    self.vector_manager.load_vectorstore()
+                    self.update_index(chunk_size, chunk_overlap, validation_queries)
                 else:
-                    print("Existing vector store missing or incomplete, deleting and recreating...")
-                    self.vector_manager.delete_collection()
-                    self._create_new_database(chunk_size, chunk_overlap)
+                    print("Attempting to load existing vector store...")
+                    existing_db = self.vector_manager.load_vectorstore()
+                    if existing_db:
+                        print("Using existing vector database")
+                    else:
+                        print("Existing vector store missing or incomplete, rebuilding...")
+                        self.rebuild_index(chunk_size, chunk_overlap, validation_queries)
             
             # Step 3: Set up context retriever
             print("🔍 Setting up context retriever...")
-            self.context_retriever = ContextRetriever(self.vector_manager)
+            reranker = None
+            if self.reranker_model:
+                reranker = CrossEncoderReranker(
+                    model_name=self.reranker_model,
+                    top_n=self.rerank_top_n
+                )
+            # One token counter for the compression budget and the prompt budget
+            token_counter = TokenCounter(self.tokenizer_name)
+            self.context_retriever = ContextRetriever(self.vector_manager, reranker=reranker,
+                                                      token_counter=token_counter)
             
             # Step 4: Set up query engine
             print("🤖 Setting up query engine...")
             self.query_engine = OllamaQueryEngine(
                 context_retriever=self.context_retriever,
                 model_name=self.model_name,
-                ollama_url=self.ollama_url
+                ollama_url=self.ollama_url,
+                pool_size=self.ollama_pool_size,
+                connect_timeout=self.ollama_connect_timeout,
+                read_timeout=self.ollama_read_timeout,
+                context_window=self.context_window,
+                tokenizer_name=self.tokenizer_name,
+                token_counter=token_counter
             )
             
             self.is_initialized = True
@@ -113,8 +216,8 @@ class RAGSystem:
             return False
 
     
-    def _create_new_database(self, chunk_size: int, chunk_overlap: int):
-        """Create new vector database from training data"""
+    def _load_chunks(self, chunk_size: int, chunk_overlap: int) -> List[Document]:
+        """Load the training data and split it into chunks"""
         # Load and process training data
         print("Loading training data...")
         documents = load_training_data(self.data_path)
@@ -139,23 +242,202 @@ class RAGSystem:
             raise ValueError("No chunks created from documents")
         
         print(f" Created {len(chunks)} chunks")
+        return chunks
+    
+    def _new_vector_manager(self, persist_directory: str, chunk_overlap: int = 200) -> VectorStoreManager:
+        return VectorStoreManager(
+            persist_directory=persist_directory,
+            embedding_batch_size=self.embedding_batch_size,
+            embedding_workers=self.embedding_workers,
+            embedding_cache_dir=self.embedding_cache_dir,
+            backend=self.vector_backend,
+            backend_options=self._backend_options(),
+            encoder=self.encoder,
+            encoder_options=self._encoder_options(),
+            chunk_overlap=chunk_overlap
+        )
+    
+    def rebuild_index(self, chunk_size: int = 1000, chunk_overlap: int = 200,
+                      sample_queries: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Rebuild the vector database from the training data (blue/green)
+        
+        The new database is built and validated in its own directory, then
+        vector_db_path is switched to it atomically. Until then the live
+        database is untouched, and running API servers pick up the new one
+        on their next index check.
+        
+        Args:
+            chunk_size: Size of text chunks
+            chunk_overlap: Overlap between chunks
+            sample_queries: Queries that must return results from the new database
+            
+        Returns:
+            Validation report (see VectorStoreManager.validate_index)
+            
+        Raises:
+            RuntimeError: If the new database fails validation (it is discarded)
+        """
+        return self._rebuild_from_chunks(self._load_chunks(chunk_size, chunk_overlap), chunk_overlap, sample_queries)
+    
+    def _rebuild_from_chunks(self, chunks: List[Document], chunk_overlap: int,
+                             sample_queries: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Build, validate and swap in a new database from already chunked documents"""
+        build_path = new_build_directory(self.vector_db_path)
+        print(f" Creating embeddings and vector store in {build_path}...")
+        manager = self._new_vector_manager(build_path, chunk_overlap)
+        try:
+            manager.create_vectorstore(chunks)
+            report = manager.validate_index(chunks, sample_queries)
+        except Exception:
+            manager.delete_collection()
+            raise
+        
+        if not report["valid"]:
+            manager.delete_collection()
+            raise RuntimeError(f"New vector database failed validation: {'; '.join(report['errors'])}")
+        
+        print(f" Validated new vector store ({report['count']} chunks, "
+              f"self-retrieval {report['self_recall']:.0%})")
+        swap_in(self.vector_db_path, build_path)
+        self.vector_manager = manager
+        self.index_path = current_build(self.vector_db_path)
         
-        # Create vector store
-        print(" Creating embeddings and vector store...")
-        self.vector_manager.create_vectorstore(chunks)
+        # Cached answers were built from the old index
+        if self.response_cache:
+            self.response_cache.invalidate()
         
         # Get statistics
         stats = self.vector_manager.get_collection_stats()
         print(f" Vector store statistics:")
         print(f"   Total documents: {stats.get('total_documents', 0)}")
         print(f"   Embedding model: {stats.get('embedding_model', 'unknown')}")
+        print(f"   Sources: {len(stats.get('sources', []))}, categories: {len(stats.get('categories', []))}")
+        return report
     
-    def query(self, question: str, **kwargs) -> Dict[str, Any]:
+    def update_index(self, chunk_size: int = 1000, chunk_overlap: int = 200,
+                     sample_queries: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Sync the vector database with the training data incrementally (blue/green)
+        
+        The live build is copied to a new build directory and the copy is
+        synced: only chunks that are new or whose text changed are
+        re-embedded, and chunks of removed records are deleted. The copy is
+        validated and swapped in like a rebuild, so the live database is
+        never modified in place. When the database cannot be synced (no
+        store or manifest, another embedding model, chunks without unique
+        ids) it is rebuilt from scratch with rebuild_index instead.
+        
+        Args:
+            chunk_size: Size of text chunks
+            chunk_overlap: Overlap between chunks
+            sample_queries: Queries the new database must answer
+            
+        Returns:
+            Report of what changed (see VectorStoreManager.sync_documents)
+            
+        Raises:
+            RuntimeError: If the synced database fails validation (it is discarded)
+        """
+        chunks = self._load_chunks(chunk_size, chunk_overlap)
+        started = time.perf_counter()
+        diff = self.vector_manager.sync_diff(chunks)
+        if diff is None:
+            print("No usable index manifest; rebuilding the vector store in a staging directory...")
+            validation = self._rebuild_from_chunks(chunks, chunk_overlap, sample_queries)
+            return {
+                "mode": "full",
+                "added": len(chunks),
+                "changed": 0,
+                "metadata_changed": 0,
+                "removed": 0,
+                "unchanged": 0,
+                "embedded": len(chunks),
+                "elapsed_seconds": time.perf_counter() - started,
+                "validation": validation
+            }
+        
+        if len(diff["unchanged"]) == len(chunks) and not diff["removed"]:
+            print("Vector store is already up to date")
+            return {
+                "mode": "incremental",
+                **{key: len(ids) for key, ids in diff.items()},
+                "embedded": 0,
+                "elapsed_seconds": time.perf_counter() - started
+            }
+        
+        build_path = new_build_directory(self.vector_db_path)
+        print(f" Syncing a copy of the vector store in {build_path}...")
+        shutil.copytree(self.vector_manager.persist_directory, build_path, dirs_exist_ok=True)
+        manager = self._new_vector_manager(build_path, chunk_overlap)
+        try:
+            if not manager.load_vectorstore():
+                raise RuntimeError(f"Could not open the copied vector store in {build_path}")
+            report = manager.sync_documents(chunks)
+            validation = manager.validate_index(chunks, sample_queries)
+        except Exception:
+            manager.delete_collection()
+            raise
+        
+        if not validation["valid"]:
+            manager.delete_collection()
+            raise RuntimeError(f"Synced vector database failed validation: {'; '.join(validation['errors'])}")
+        
+        swap_in(self.vector_db_path, build_path)
+        self.vector_manager = manager
+        self.index_path = current_build(self.vector_db_path)
+        
+        # Cached answers may be based on chunks that changed
+        if self.response_cache:
+            self.response_cache.invalidate()
+        
+        report["validation"] = validation
+        report["elapsed_seconds"] = time.perf_counter() - started
+        return report
+    
+    def _response_cache_key(self, question: str, document_hash: Optional[str],
+                            options: Dict[str, Any]) -> Optional[str]:
+        """Cache key for a query, or None when caching is disabled"""
+        if not self.response_cache:
+            return None
+        
+        return ResponseCache.make_key(
+            question,
+            document_hash,
+            self.model_name,
+            options.get("k", 5),
+            {
+                "context_options": options.get("context_options"),
+                "generation_options": options.get("generation_options")
+            }
+        )
+    
+    def _with_upload(self, kwargs: Dict[str, Any], upload_text: Optional[str],
+                     document_hash: Optional[str]) -> Dict[str, Any]:
+        """Pass an uploaded document to the context retriever via context_options"""
+        if not upload_text:
+            return kwargs
+        
+        context_options = dict(kwargs.get("context_options") or {})
+        context_options["upload_text"] = upload_text
+        context_options["upload_id"] = document_hash
+        return {**kwargs, "context_options": context_options}
+    
+    def _upload_hash(self, upload_text: Optional[str], document_hash: Optional[str]) -> Optional[str]:
+        """Identify the uploaded document (file hash, or hash of its text)"""
+        if document_hash or not upload_text:
+            return document_hash
+        return hashlib.sha256(upload_text.encode("utf-8")).hexdigest()
+    
+    def query(self, question: str, document_hash: Optional[str] = None,
+              upload_text: Optional[str] = None, **kwargs) -> Dict[str, Any]:
         """
         Query the RAG system
         
         Args:
             question: User question
+            document_hash: SHA-256 of the uploaded document, part of the cache key
+            upload_text: Text of a document uploaded with the question
             **kwargs: Additional options for query processing
             
         Returns:
@@ -167,8 +449,18 @@ class RAGSystem:
                 "success": False
             }
         
+        document_hash = self._upload_hash(upload_text, document_hash)
+        cache_key = self._response_cache_key(question, document_hash, kwargs)
+        if cache_key:
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
         try:
+            kwargs = self._with_upload(kwargs, upload_text, document_hash)
             result = self.query_engine.query(question, **kwargs)
+            if cache_key and result.get("success"):
+                self.response_cache.set(cache_key, result)
             return result
             
         except Exception as e:
@@ -178,6 +470,141 @@ class RAGSystem:
                 "success": False
             }
     
+    async def aquery(self, question: str, executor: Optional[Executor] = None,
+                     document_hash: Optional[str] = None,
+                     upload_text: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+        """
+        Query the RAG system without blocking the event loop
+        
+        Args:
+            question: User question
+            executor: Executor for CPU-bound retrieval (None uses the loop default)
+            document_hash: SHA-256 of the uploaded document, part of the cache key
+            upload_text: Text of a document uploaded with the question
+            **kwargs: Additional options for query processing
+            
+        Returns:
+            Dictionary with response and metadata
+        """
+        if not self.is_initialized:
+            return {
+                "error": "RAG system not initialized. Call setup() first.",
+                "success": False
+            }
+        
+        document_hash = self._upload_hash(upload_text, document_hash)
+        cache_key = self._response_cache_key(question, document_hash, kwargs)
+        if cache_key:
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        try:
+            kwargs = self._with_upload(kwargs, upload_text, document_hash)
+            result = await self.query_engine.aquery(question, executor=executor, **kwargs)
+            if cache_key and result.get("success"):
+                self.response_cache.set(cache_key, result)
+            return result
+            
+        except Exception as e:
+            return {
+                "query": question,
+                "error": f"Error processing query: {str(e)}",
+                "success": False
+            }
+    
+    def query_stream(self, question: str, document_hash: Optional[str] = None,
+                     upload_text: Optional[str] = None,
+                     **kwargs) -> Iterator[Dict[str, Any]]:
+        """
+        Query the RAG system and stream the response
+        
+        Args:
+            question: User question
+            document_hash: SHA-256 of the uploaded document, part of the cache key
+            upload_text: Text of a document uploaded with the question
+            **kwargs: Additional options for query processing
+            
+        Yields:
+            Streaming events ("sources", "token", "done" or "error")
+        """
+        if not self.is_initialized:
+            yield {
+                "type": "error",
+                "error": "RAG system not initialized. Call setup() first.",
+                "success": False
+            }
+            return
+        
+        document_hash = self._upload_hash(upload_text, document_hash)
+        cache_key = self._response_cache_key(question, document_hash, kwargs)
+        if cache_key:
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                yield from self._replay_cached(cached)
+                return
+        
+        kwargs = self._with_upload(kwargs, upload_text, document_hash)
+        for event in self.query_engine.query_stream(question, **kwargs):
+            if cache_key and event["type"] == "done":
+                self.response_cache.set(cache_key, self._event_to_result(event))
+            yield event
+    
+    async def aquery_stream(self, question: str, executor: Optional[Executor] = None,
+                            document_hash: Optional[str] = None,
+                            upload_text: Optional[str] = None,
+                            **kwargs) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Async version of query_stream
+        
+        Args:
+            question: User question
+            executor: Executor for CPU-bound retrieval (None uses the loop default)
+            document_hash: SHA-256 of the uploaded document, part of the cache key
+            upload_text: Text of a document uploaded with the question
+            **kwargs: Additional options for query processing
+            
+        Yields:
+            Streaming events ("sources", "token", "done" or "error")
+        """
+        if not self.is_initialized:
+            yield {
+                "type": "error",
+                "error": "RAG system not initialized. Call setup() first.",
+                "success": False
+            }
+            return
+        
+        document_hash = self._upload_hash(upload_text, document_hash)
+        cache_key = self._response_cache_key(question, document_hash, kwargs)
+        if cache_key:
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                for event in self._replay_cached(cached):
+                    yield event
+                return
+        
+        kwargs = self._with_upload(kwargs, upload_text, document_hash)
+        async for event in self.query_engine.aquery_stream(question, executor=executor, **kwargs):
+            if cache_key and event["type"] == "done":
+                self.response_cache.set(cache_key, self._event_to_result(event))
+            yield event
+    
+    def _replay_cached(self, result: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """Turn a cached result into the same events a live stream produces"""
+        yield {
+            "type": "sources",
+            "sources": result.get("sources", []),
+            "context_length": result.get("context_length", 0),
+            "total_chunks": result.get("total_chunks", 0)
+        }
+        yield {"type": "token", "token": result.get("response", "")}
+        yield {"type": "done", **result}
+    
+    def _event_to_result(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        """Strip the streaming event type from a "done" event"""
+        return {k: v for k, v in event.items() if k != "type"}
+    
     def batch_query(self, questions: List[str], **kwargs) -> List[Dict[str, Any]]:
         """
         Process multiple queries
@@ -234,9 +661,10 @@ class RAGSystem:
                     if result.get('sources'):
                         print(f"\n📚 Sources ({len(result['sources'])} chunks):")
                         for i, source in enumerate(result['sources'][:3]):
-                            score = source['similarity_score']
+                            score_type = source['score_type']
+                            score = source[f'{score_type}_score']
                             category = source['category']
-                            print(f"   {i+1}. {category} (relevance: {score:.3f})")
+                            print(f"   {i+1}. {category} ({score_type}: {score:.3f})")
                 else:
                     print(f" Error: {result['error']}")
                 
@@ -269,6 +697,10 @@ class RAGSystem:
             print(f"   Documents: {stats.get('total_documents', 0)}")
             print(f"   Collection: {stats.get('collection_name', 'unknown')}")
             print(f"   Embedding model: {stats.get('embedding_model', 'unknown')}")
+            summary = stats.get('summary')
+            if summary:
+                print(f"   Chunks per category: {summary['category_counts']}")
+                print(f"   Chunk sizes (chars): {summary['chunk_size_histogram']}")
         
         # Model info
         if self.query_engine:
@@ -288,6 +720,7 @@ class RAGSystem:
             "initialized": self.is_initialized,
             "data_path": self.data_path,
             "vector_db_path": self.vector_db_path,
+            "index_path": self.index_path,
             "model_name": self.model_name,
             "ollama_url": self.ollama_url
         }
@@ -315,6 +748,30 @@ def main():
                        help="Ollama server URL")
     parser.add_argument("--recreate-db", action="store_true",
                        help="Force recreate vector database")
+    parser.add_argument("--validation-queries", type=str,
+                       help="File with queries a rebuilt database must answer before it goes live")
+    parser.add_argument("--update-db", action="store_true",
+                       help="Incrementally sync the vector database with the training data")
+    parser.add_argument("--embedding-workers", type=int, default=1,
+                       help="Worker processes used to embed chunks when building the database")
+    parser.add_argument("--embedding-batch-size", type=int, default=64,
+                       help="Chunks per embedding batch when building the database")
+    parser.add_argument("--embedding-cache-dir", default="cache/embeddings",
+                       help="Persistent chunk embedding cache (empty string disables it)")
+    parser.add_argument("--vector-backend", choices=["chroma", "hnsw", "quantized"], default="chroma",
+                       help="Vector index backend")
+    parser.add_argument("--quantization", choices=["int8", "float16"], default="int8",
+                       help="Vector code type of the quantized backend")
+    parser.add_argument("--encoder", choices=["torch", "onnx"], default="torch",
+                       help="Embedding runtime: sentence-transformers or ONNX Runtime")
+    parser.add_argument("--encoder-int8", action="store_true",
+                       help="Use the int8 quantized ONNX model")
+    parser.add_argument("--encoder-threads", type=int,
+                       help="CPU threads of the ONNX Runtime session")
+    parser.add_argument("--compare-encoders", type=str,
+                       help="File with texts used to check ONNX parity and latency against PyTorch")
+    parser.add_argument("--benchmark-search", type=str,
+                       help="File with queries used to measure vector search latency")
     parser.add_argument("--chunk-size", type=int, default=1000,
                        help="Text chunk size")
     parser.add_argument("--chunk-overlap", type=int, default=200,
@@ -323,23 +780,97 @@ def main():
                        help="Single query to process")
     parser.add_argument("--batch-queries", type=str,
                        help="File with queries to process in batch")
+    parser.add_argument("--reranker-model", type=str,
+                       help="Cross-encoder model used to re-rank retrieved chunks")
+    parser.add_argument("--rerank-top-n", type=int, default=3,
+                       help="Number of chunks kept after re-ranking")
+    parser.add_argument("--context-window", type=int, default=8192,
+                       help="Model context window in tokens")
+    parser.add_argument("--tokenizer", type=str,
+                       help="Hugging Face tokenizer of the model for exact token counts")
+    parser.add_argument("--batch-workers", type=int, default=1,
+                       help="Number of concurrent generations in batch mode")
+    parser.add_argument("--retrieval-workers", type=int, default=1,
+                       help="Number of concurrent retrievals in batch mode")
+    parser.add_argument("--batch-as-completed", action="store_true",
+                       help="Print batch results as they complete instead of in input order")
     
     args = parser.parse_args()
     
+    if args.compare_encoders:
+        # Encoder comparison needs neither the vector store nor the LLM
+        with open(args.compare_encoders, 'r') as f:
+            texts = [line.strip() for line in f if line.strip()]
+        
+        reference = create_encoder("all-MiniLM-L6-v2", "torch")
+        candidate = create_encoder("all-MiniLM-L6-v2", "onnx", quantized=args.encoder_int8,
+                                   threads=args.encoder_threads)
+        report = compare_encoders(reference, candidate, texts)
+        label = "ONNX int8" if args.encoder_int8 else "ONNX"
+        print(f"\n {label} vs PyTorch encoder ({report['texts']} texts):")
+        print(f"   Cosine similarity: min {report['cosine_min']:.5f}, mean {report['cosine_mean']:.5f} "
+              f"(max abs diff {report['max_abs_diff']:.2e})")
+        print(f"   PyTorch: p50 {report['reference_ms_p50']:.2f} ms, p95 {report['reference_ms_p95']:.2f} ms")
+        print(f"   {label}: p50 {report['candidate_ms_p50']:.2f} ms, p95 {report['candidate_ms_p95']:.2f} ms "
+              f"({report['speedup_p50']:.2f}x)")
+        return
+    
+    if args.benchmark_search:
+        # Search benchmark only needs the vector store (no LLM)
+        with open(args.benchmark_search, 'r') as f:
+            queries = [line.strip() for line in f if line.strip()]
+        
+        backend_options = {"quantization": args.quantization} if args.vector_backend == "quantized" else {}
+        encoder_options = {"quantized": args.encoder_int8, "threads": args.encoder_threads} \
+            if args.encoder == "onnx" else {}
+        manager = VectorStoreManager(persist_directory=current_build(args.vector_db_path), backend=args.vector_backend,
+                                     backend_options=backend_options, encoder=args.encoder,
+                                     encoder_options=encoder_options)
+        if not manager.load_vectorstore():
+            print(f" No {args.vector_backend} vector store at {args.vector_db_path}")
+            sys.exit(1)
+        
+        report = manager.benchmark_search(queries)
+        print(f"\n Search benchmark ({args.vector_backend}, {report['searches']} searches, k={report['k']}):")
+        print(f"   p50: {report['latency_ms_p50']:.2f} ms, p95: {report['latency_ms_p95']:.2f} ms, "
+              f"{report['queries_per_second']:.1f} queries/s")
+        print(f"   Peak RSS: {report['peak_rss_mb']} MB")
+        print(f"   Backend: {report['backend']}")
+        return
+    
     # Create RAG system
     rag = RAGSystem(
         data_path=args.data_path,
         vector_db_path=args.vector_db_path,
         model_name=args.model_name,
-        ollama_url=args.ollama_url
+        ollama_url=args.ollama_url,
+        reranker_model=args.reranker_model,
+        rerank_top_n=args.rerank_top_n,
+        context_window=args.context_window,
+        tokenizer_name=args.tokenizer,
+        embedding_workers=args.embedding_workers,
+        embedding_batch_size=args.embedding_batch_size,
+        embedding_cache_dir=args.embedding_cache_dir or None,
+        vector_backend=args.vector_backend,
+        vector_quantization=args.quantization,
+        encoder=args.encoder,
+        encoder_int8=args.encoder_int8,
+        encoder_threads=args.encoder_threads
     )
     
+    validation_queries = None
+    if args.validation_queries:
+        with open(args.validation_queries, 'r') as f:
+            validation_queries = [line.strip() for line in f if line.strip()]
+    
     # Setup system
     print("Initializing RAG system...")
     success = rag.setup(
         force_recreate_db=args.recreate_db,
         chunk_size=args.chunk_size,
-        chunk_overlap=args.chunk_overlap
+        chunk_overlap=args.chunk_overlap,
+        incremental=args.update_db,
+        validation_queries=validation_queries
     )
     
     if not success:
@@ -368,15 +899,31 @@ def main():
             queries = [line.strip() for line in f if line.strip()]
         
         print(f"\n Processing {len(queries)} queries...")
-        results = rag.batch_query(queries)
         
-        for i, result in enumerate(results):
+        def print_result(i: int, result: Dict[str, Any]):
             print(f"\n--- Query {i+1} ---")
-            print(f"Q: {result['query']}")
+            print(f"Q: {result.get('query', queries[i])}")
             if result["success"]:
                 print(f"A: {result['response']}")
             else:
                 print(f"Error: {result['error']}")
+        
+        start_time = time.perf_counter()
+        results = rag.batch_query(
+            queries,
+            max_workers=args.batch_workers,
+            retrieval_workers=args.retrieval_workers,
+            on_result=print_result if args.batch_as_completed else None
+        )
+        elapsed = time.perf_counter() - start_time
+        
+        if not args.batch_as_completed:
+            for i, result in enumerate(results):
+                print_result(i, result)
+        
+        succeeded = sum(1 for result in results if result.get("success"))
+        print(f"\n Batch complete: {succeeded}/{len(results)} succeeded in {elapsed:.1f}s "
+              f"({len(results) / elapsed if elapsed > 0 else 0.0:.2f} queries/s)")
     
     else:
         # Interactive mode
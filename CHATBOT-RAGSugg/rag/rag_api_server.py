@@ -2,20 +2,317 @@
 from fastapi import FastAPI, UploadFile, Form , File
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from PyPDF2 import PdfReader
+from fastapi.concurrency import run_in_threadpool
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from datetime import datetime
 import os
 import uuid
+import asyncio
+import functools
+import threading
+import multiprocessing
+import json
+import hashlib
+from typing import Optional, Tuple
 from docx import Document
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from fastapi import HTTPException
 
 
 
-from setup_and_run import run_rag_on_text
+from main_rag import RAGSystem
+from index_builds import current_build
+from response_cache import ResponseCache
+from text_extraction import ExtractedTextCache, extract_upload_text
+from setup_and_run import arun_rag_on_text, astream_rag_on_text
 
-app = FastAPI()
 EXPORT_DIR = "exports"
 os.makedirs(EXPORT_DIR, exist_ok=True)
+
+# RAG configuration (override through environment variables per deployment)
+RAG_DATA_PATH = os.getenv("RAG_DATA_PATH", "processed_data/training_data.json")
+RAG_VECTOR_DB_PATH = os.getenv("RAG_VECTOR_DB_PATH", "chroma_db")
+RAG_MODEL_NAME = os.getenv("RAG_MODEL_NAME", "mistral:latest")
+RAG_OLLAMA_URL = os.getenv("RAG_OLLAMA_URL", "http://127.0.0.1:11434")
+RAG_OLLAMA_CONNECT_TIMEOUT = float(os.getenv("RAG_OLLAMA_CONNECT_TIMEOUT", "10"))
+RAG_OLLAMA_READ_TIMEOUT = float(os.getenv("RAG_OLLAMA_READ_TIMEOUT", "120"))
+RAG_RERANKER_MODEL = os.getenv("RAG_RERANKER_MODEL") or None
+RAG_RERANK_TOP_N = int(os.getenv("RAG_RERANK_TOP_N", "3"))
+RAG_CONTEXT_WINDOW = int(os.getenv("RAG_CONTEXT_WINDOW", "8192"))
+RAG_TOKENIZER = os.getenv("RAG_TOKENIZER") or None
+RAG_VECTOR_BACKEND = os.getenv("RAG_VECTOR_BACKEND", "chroma")
+RAG_VECTOR_QUANTIZATION = os.getenv("RAG_VECTOR_QUANTIZATION", "int8")
+# Embedding runtime: "torch" or "onnx" (optionally int8, with its own thread count)
+RAG_ENCODER = os.getenv("RAG_ENCODER", "torch")
+RAG_ENCODER_INT8 = os.getenv("RAG_ENCODER_INT8", "0") == "1"
+RAG_ENCODER_THREADS = int(os.getenv("RAG_ENCODER_THREADS", "0")) or None
+# Seconds between checks for a rebuilt vector database swapped in by
+# `main_rag.py --recreate-db` (0 disables automatic reloads)
+RAG_INDEX_WATCH_INTERVAL = float(os.getenv("RAG_INDEX_WATCH_INTERVAL", "10"))
+
+# Concurrency: max requests processed at once, and worker threads for
+# CPU-bound stages (PDF parsing, embedding/retrieval, DOCX export)
+RAG_MAX_CONCURRENCY = int(os.getenv("RAG_MAX_CONCURRENCY", "4"))
+RAG_CPU_WORKERS = int(os.getenv("RAG_CPU_WORKERS", str(min(4, os.cpu_count() or 1))))
+RAG_OLLAMA_POOL_SIZE = int(os.getenv("RAG_OLLAMA_POOL_SIZE", str(max(RAG_MAX_CONCURRENCY, RAG_CPU_WORKERS))))
+
+cpu_executor = ThreadPoolExecutor(max_workers=RAG_CPU_WORKERS, thread_name_prefix="rag-cpu")
+request_slots = asyncio.Semaphore(RAG_MAX_CONCURRENCY)
+
+# Response cache for repeated prompt + document requests
+RAG_RESPONSE_CACHE = os.getenv("RAG_RESPONSE_CACHE", "1") == "1"
+RAG_RESPONSE_CACHE_PATH = os.getenv("RAG_RESPONSE_CACHE_PATH", "cache/response_cache.sqlite")
+RAG_RESPONSE_CACHE_TTL = int(os.getenv("RAG_RESPONSE_CACHE_TTL", str(24 * 3600)))
+
+response_cache = ResponseCache(
+    db_path=RAG_RESPONSE_CACHE_PATH,
+    ttl_seconds=RAG_RESPONSE_CACHE_TTL
+) if RAG_RESPONSE_CACHE else None
+
+# Extracted text cache so repeat uploads of the same file skip parsing
+RAG_TEXT_CACHE_DIR = os.getenv("RAG_TEXT_CACHE_DIR", "cache/extracted_text")
+RAG_TEXT_CACHE_MAX_MB = int(os.getenv("RAG_TEXT_CACHE_MAX_MB", "200"))
+
+text_cache = ExtractedTextCache(
+    cache_dir=RAG_TEXT_CACHE_DIR,
+    max_bytes=RAG_TEXT_CACHE_MAX_MB * 1024 * 1024
+) if RAG_TEXT_CACHE_MAX_MB > 0 else None
+
+# Page-parallel PDF extraction for large uploads (RAG_PDF_WORKERS=0 disables it)
+RAG_PDF_WORKERS = int(os.getenv("RAG_PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+RAG_PDF_MIN_PARALLEL_PAGES = int(os.getenv("RAG_PDF_MIN_PARALLEL_PAGES", "32"))
+RAG_PDF_PAGES_PER_TASK = int(os.getenv("RAG_PDF_PAGES_PER_TASK", "16"))
+RAG_PDF_TIME_BUDGET = float(os.getenv("RAG_PDF_TIME_BUDGET", "60"))
+
+# Spawned (not forked) workers so they do not inherit the loaded models
+pdf_process_pool = ProcessPoolExecutor(
+    max_workers=RAG_PDF_WORKERS,
+    mp_context=multiprocessing.get_context("spawn")
+) if RAG_PDF_WORKERS > 1 else None
+
+pdf_options = {
+    "process_pool": pdf_process_pool,
+    "min_parallel_pages": RAG_PDF_MIN_PARALLEL_PAGES,
+    "pages_per_task": RAG_PDF_PAGES_PER_TASK,
+    "time_budget": RAG_PDF_TIME_BUDGET if RAG_PDF_TIME_BUDGET > 0 else None
+}
+
+
+class RAGState:
+    """
+    Holds the shared RAGSystem that is built once and reused by every request
+    """
+
+    def __init__(self):
+        self.rag = None
+        self.ready = False
+        self.error = None
+        self.loaded_at = None
+        self.reloading = False
+        self._lock = threading.Lock()
+        self._failed_index = None
+        self._stop_watch = threading.Event()
+        # Requests running per RAGSystem; replaced systems are closed once idle
+        self._in_flight = {}
+        self._retired = set()
+        self._refs_lock = threading.Lock()
+        self.loop = None
+
+    def _build(self) -> RAGSystem:
+        """Build and set up a new RAGSystem (blocking)"""
+        rag = RAGSystem(
+            data_path=RAG_DATA_PATH,
+            vector_db_path=RAG_VECTOR_DB_PATH,
+            model_name=RAG_MODEL_NAME,
+            ollama_url=RAG_OLLAMA_URL,
+            response_cache=response_cache,
+            ollama_pool_size=RAG_OLLAMA_POOL_SIZE,
+            ollama_connect_timeout=RAG_OLLAMA_CONNECT_TIMEOUT,
+            ollama_read_timeout=RAG_OLLAMA_READ_TIMEOUT,
+            reranker_model=RAG_RERANKER_MODEL,
+            rerank_top_n=RAG_RERANK_TOP_N,
+            context_window=RAG_CONTEXT_WINDOW,
+            tokenizer_name=RAG_TOKENIZER,
+            vector_backend=RAG_VECTOR_BACKEND,
+            vector_quantization=RAG_VECTOR_QUANTIZATION,
+            encoder=RAG_ENCODER,
+            encoder_int8=RAG_ENCODER_INT8,
+            encoder_threads=RAG_ENCODER_THREADS
+        )
+        if not rag.setup(force_recreate_db=False):
+            raise RuntimeError("Failed to set up RAG system.")
+        return rag
+
+    def load(self) -> bool:
+        """
+        Build the RAG system and mark the server ready
+
+        Returns:
+            True if the system is warm, False otherwise
+        """
+        try:
+            self.rag = self._build()
+            self.ready = True
+            self.error = None
+            self.loaded_at = datetime.now().isoformat()
+        except Exception as e:
+            self.ready = False
+            self.error = str(e)
+            print(f"Error warming up RAG system: {self.error}")
+        return self.ready
+
+    def reload(self) -> bool:
+        """
+        Build a fresh RAG system and swap it in once it is ready.
+        Requests already running keep using the previous instance.
+        Cached responses are dropped since the index may have changed.
+
+        Returns:
+            True if the new system was swapped in, False otherwise
+        """
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("A reload is already in progress")
+
+        self.reloading = True
+        try:
+            new_rag = self._build()
+            old_rag, self.rag = self.rag, new_rag
+            if old_rag is not None:
+                self._retire(old_rag)
+            if response_cache:
+                response_cache.invalidate()
+            self.ready = True
+            self.error = None
+            self.loaded_at = datetime.now().isoformat()
+            return True
+        except Exception as e:
+            # Keep serving with the previous system if there is one
+            self.error = str(e)
+            print(f"Error reloading RAG system: {self.error}")
+            return False
+        finally:
+            self.reloading = False
+            self._lock.release()
+
+    @asynccontextmanager
+    async def use(self):
+        """
+        Pin the current RAGSystem for the duration of one request, so a
+        reload does not close it while the request is still using it
+        """
+        with self._refs_lock:
+            rag = self.rag
+            if rag is not None:
+                self._in_flight[rag] = self._in_flight.get(rag, 0) + 1
+        try:
+            yield rag
+        finally:
+            if rag is not None:
+                await self._release(rag)
+
+    async def _release(self, rag: RAGSystem) -> None:
+        with self._refs_lock:
+            self._in_flight[rag] -= 1
+            if self._in_flight[rag]:
+                return
+            del self._in_flight[rag]
+            if rag not in self._retired:
+                return
+            self._retired.remove(rag)
+        await close_rag(rag)
+
+    def _retire(self, rag: RAGSystem) -> None:
+        """Close a replaced system now, or after its last request if some are running"""
+        with self._refs_lock:
+            if self._in_flight.get(rag):
+                self._retired.add(rag)
+                return
+        if self.loop is not None:
+            # reload() runs in a worker thread; the async client belongs to the event loop
+            asyncio.run_coroutine_threadsafe(close_rag(rag), self.loop)
+            return
+
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is None:
+            # No server loop (reload() called outside the app): close synchronously
+            asyncio.run(close_rag(rag))
+        else:
+            running_loop.create_task(close_rag(rag))
+
+    def watch_index(self, interval: float) -> None:
+        """
+        Reload when a rebuild swaps a new vector database in (blocking; run
+        in a thread). The swap is atomic and the previous build stays on disk,
+        so requests running on the old system finish normally.
+        """
+        while not self._stop_watch.wait(interval):
+            rag = self.rag
+            if rag is None or self.reloading:
+                continue
+
+            live_index = current_build(RAG_VECTOR_DB_PATH)
+            if live_index == rag.index_path or live_index == self._failed_index:
+                continue
+
+            print(f"Vector database changed to {live_index}; reloading RAG system...")
+            try:
+                if not self.reload():
+                    # Do not retry the same build on every check
+                    self._failed_index = live_index
+            except RuntimeError:
+                pass  # A reload is already in progress
+
+    def start_watching(self, interval: float) -> None:
+        if interval > 0:
+            threading.Thread(target=self.watch_index, args=(interval,), name="rag-index-watch", daemon=True).start()
+
+    def stop_watching(self) -> None:
+        self._stop_watch.set()
+
+    def status(self) -> dict:
+        return {
+            "ready": self.ready,
+            "reloading": self.reloading,
+            "loaded_at": self.loaded_at,
+            "index_path": self.rag.index_path if self.rag else None,
+            "error": self.error
+        }
+
+
+async def close_rag(rag: RAGSystem) -> None:
+    """Close the connection pools of a RAGSystem's query engine"""
+    if rag.query_engine:
+        await rag.query_engine.aclose()
+        rag.query_engine.close()
+
+
+rag_state = RAGState()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm up the shared RAG system before serving traffic
+    rag_state.loop = asyncio.get_running_loop()
+    await run_in_threadpool(rag_state.load)
+    rag_state.start_watching(RAG_INDEX_WATCH_INTERVAL)
+    yield
+    rag_state.stop_watching()
+    if rag_state.rag:
+        await close_rag(rag_state.rag)
+    # The loop is closing: systems retired after this point are closed synchronously
+    rag_state.loop = None
+    if response_cache:
+        response_cache.close()
+    cpu_executor.shutdown(wait=False)
+    if pdf_process_pool:
+        pdf_process_pool.shutdown(wait=False, cancel_futures=True)
+
+
+app = FastAPI(lifespan=lifespan)
 # Allow CORS for BC/JS/ControlAddIn access
 app.add_middleware(
     CORSMiddleware,
@@ -26,36 +323,140 @@ app.add_middleware(
 
 from fastapi import File
 
+
+async def run_cpu_bound(func, *args, **kwargs):
+    """Run a blocking function on the bounded CPU executor"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(cpu_executor, functools.partial(func, *args, **kwargs))
+
+
+async def _prepare_upload(file) -> Tuple[str, Optional[str]]:
+    """
+    Read and extract an uploaded file.
+    Returns the extracted text and the hash to cache the answer under
+    (None when there is no file or only part of it could be extracted).
+    """
+    if not file:
+        return "", None
+    contents = await file.read()
+    document_hash = hashlib.sha256(contents).hexdigest()
+    context, complete = await run_cpu_bound(extract_upload_text, file.filename, contents,
+                                            cache=text_cache, content_hash=document_hash,
+                                            **pdf_options)
+    if not complete:
+        # The answer is based on part of the file: do not cache it under the file's hash
+        document_hash = None
+    return context, document_hash
+
+
+def format_sse(event: dict) -> str:
+    """Format a streaming event as a Server-Sent Events message"""
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+@app.get("/copilot/ready")
+async def ready():
+    status_code = 200 if rag_state.ready else 503
+    return JSONResponse(status_code=status_code, content=rag_state.status())
+
+
+@app.get("/copilot/cache-stats")
+async def cache_stats():
+    return {
+        "responses": {"enabled": True, **response_cache.get_stats()} if response_cache else {"enabled": False},
+        "extracted_text": {"enabled": True, **text_cache.get_stats()} if text_cache else {"enabled": False}
+    }
+
+
+@app.post("/copilot/reload")
+async def reload_rag():
+    try:
+        reloaded = await run_in_threadpool(rag_state.reload)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    status_code = 200 if reloaded else 500
+    return JSONResponse(status_code=status_code, content={
+        "success": reloaded,
+        **rag_state.status()
+    })
+
+
 @app.post("/copilot/rag-process")
 async def rag_process(prompt: str = Form(...), file: UploadFile = File(None)):
-    try:
-        context = ""
-        if file and file.filename.endswith(".pdf"):
-            reader = PdfReader(file.file)
-            context = "\n\n".join([page.extract_text() or "" for page in reader.pages])
-            file.file.seek(0)
-        elif file and file.filename.endswith(".txt"):
-            contents = await file.read()
-            context = contents.decode("utf-8")
+    async with rag_state.use() as rag:
+        if not rag_state.ready or rag is None:
+            return JSONResponse(status_code=503, content={
+                "success": False,
+                "error": "RAG system is not ready yet"
+            })
 
-        # Call your existing RAG pipeline
-        result_text = run_rag_on_text(prompt, context)
+        async with request_slots:
+            try:
+                context, document_hash = await _prepare_upload(file)
 
-        # Save the result as a docx file
-        docx_filename = save_response_as_docx(result_text)
+                # Call your existing RAG pipeline
+                result_text = await arun_rag_on_text(prompt, context, rag=rag, executor=cpu_executor,
+                                                     document_hash=document_hash)
 
-        return {
-            "success": True,
-            "response_text": result_text,
-            "filename": docx_filename  # Return the file name for download link later
-        }
+                # Save the result as a docx file
+                docx_filename = await run_cpu_bound(save_response_as_docx, result_text)
+
+                return {
+                    "success": True,
+                    "response_text": result_text,
+                    "filename": docx_filename  # Return the file name for download link later
+                }
 
+            except Exception as e:
+                return JSONResponse(status_code=500, content={
+                    "success": False,
+                    "error": str(e)
+                })
+
+@app.post("/copilot/rag-process-stream")
+async def rag_process_stream(prompt: str = Form(...), file: UploadFile = File(None)):
+    """
+    Streaming variant of /copilot/rag-process (Server-Sent Events).
+    Sends a "sources" event first, then one "token" event per generated
+    piece of text, and finally "done" (with the DOCX filename) or "error".
+    """
+    if not rag_state.ready or rag_state.rag is None:
+        return JSONResponse(status_code=503, content={
+            "success": False,
+            "error": "RAG system is not ready yet"
+        })
+
+    # The upload is closed once the handler returns, so extract it up front
+    try:
+        context, document_hash = await _prepare_upload(file)
     except Exception as e:
         return JSONResponse(status_code=500, content={
             "success": False,
             "error": str(e)
         })
-    
+
+    async def event_stream():
+        # Pinned inside the generator: released when the stream ends or the client disconnects
+        async with rag_state.use() as rag, request_slots:
+            try:
+                async for event in astream_rag_on_text(prompt, context, rag=rag, executor=cpu_executor,
+                                                       document_hash=document_hash):
+                    if event["type"] == "done":
+                        # Export once the full answer is known
+                        event["filename"] = await run_cpu_bound(save_response_as_docx, event["response"])
+                    event.pop("context_used", None)
+                    yield format_sse(event)
+
+            except Exception as e:
+                yield format_sse({"type": "error", "success": False, "error": str(e)})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.get("/copilot/download-docx/{filename}")
 async def download_docx(filename: str):
     filepath = os.path.join(EXPORT_DIR, filename)
@@ -0,0 +1,144 @@
+"""
+Re-ranker for RAG System
+Scores retrieved chunks against the query with a small cross-encoder
+"""
+
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Tuple
+import numpy as np
+from langchain.docstore.document import Document
+
+
+class CrossEncoderReranker:
+    """
+    Batched CPU cross-encoder re-ranking with a per (query, chunk) score cache
+    """
+
+    def __init__(self,
+                 model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2",
+                 top_n: int = 3,
+                 fetch_k: int = 20,
+                 batch_size: int = 32,
+                 cache_size: int = 4096):
+        """
+        Initialize the re-ranker
+
+        Args:
+            model_name: Cross-encoder model name
+            top_n: Number of chunks kept after re-ranking
+            fetch_k: Number of candidates retrieved for re-ranking
+            batch_size: Batch size of the cross-encoder call
+            cache_size: Number of (query, chunk) scores kept in memory
+        """
+        from sentence_transformers import CrossEncoder
+
+        self.model_name = model_name
+        self.top_n = top_n
+        self.fetch_k = fetch_k
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+
+        print(f"Loading re-ranking model: {model_name}")
+        self.model = CrossEncoder(model_name, device="cpu")
+
+        self._scores = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, query: str, doc: Document) -> Tuple[str, str]:
+        chunk_id = doc.metadata.get('chunk_id') or doc.page_content
+        return (" ".join(query.split()), chunk_id)
+
+    def rerank(self, query: str, results: List[tuple], top_n: int = None) -> List[Tuple[Document, float]]:
+        """
+        Re-order candidates by cross-encoder relevance
+
+        Args:
+            query: User query
+            results: Candidate (document, score) pairs from the first stage
+            top_n: Number of chunks to keep (defaults to self.top_n)
+
+        Returns:
+            List of (document, first-stage score) pairs, best first; each
+            document carries its relevance in metadata['rerank_score']
+        """
+        return self.rerank_batch([query], [results], top_n=top_n)[0]
+
+    def rerank_batch(self, queries: List[str], results_list: List[List[tuple]],
+                     top_n: int = None) -> List[List[Tuple[Document, float]]]:
+        """
+        Re-rank the candidates of several queries with one cross-encoder call
+
+        The cross-encoder outputs logits (often negative for ms-marco models);
+        they are squashed with a sigmoid into a 0-1 rerank_score stored in a
+        copy of each document's metadata. The first-stage scores are kept as
+        the pair scores, so score thresholds keep their meaning.
+
+        Args:
+            queries: User queries
+            results_list: Candidate (document, score) pairs per query
+            top_n: Number of chunks kept per query (defaults to self.top_n)
+
+        Returns:
+            Re-ranked (document, first-stage score) pairs per query
+        """
+        top_n = top_n or self.top_n
+
+        candidates = [(q, i, doc) for q, (query, results) in enumerate(zip(queries, results_list))
+                      for i, (doc, _) in enumerate(results)]
+        keys = [self._key(queries[q], doc) for q, _, doc in candidates]
+        scores = [None] * len(candidates)
+
+        with self._lock:
+            for n, key in enumerate(keys):
+                score = self._scores.get(key)
+                if score is not None:
+                    self._scores.move_to_end(key)
+                    scores[n] = score
+                    self.hits += 1
+                else:
+                    self.misses += 1
+
+        # Score every uncached pair in one batched call
+        missing = [n for n, score in enumerate(scores) if score is None]
+        if missing:
+            pairs = [(queries[candidates[n][0]], candidates[n][2].page_content) for n in missing]
+            logits = np.asarray(self.model.predict(pairs, batch_size=self.batch_size, show_progress_bar=False),
+                                dtype=np.float64)
+            new_scores = 1.0 / (1.0 + np.exp(-logits))
+
+            with self._lock:
+                for n, score in zip(missing, new_scores):
+                    scores[n] = float(score)
+                    self._scores[keys[n]] = scores[n]
+                while len(self._scores) > self.cache_size:
+                    self._scores.popitem(last=False)
+
+        reranked = [[] for _ in queries]
+        for (q, i, doc), score in zip(candidates, scores):
+            reranked[q].append((score, i, doc))
+
+        output = []
+        for q, ranked in enumerate(reranked):
+            ranked.sort(key=lambda item: item[0], reverse=True)
+            output.append([
+                (Document(page_content=doc.page_content, metadata={**doc.metadata, 'rerank_score': score}),
+                 results_list[q][i][1])
+                for score, i, doc in ranked[:top_n]
+            ])
+        return output
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'model_name': self.model_name,
+                'top_n': self.top_n,
+                'fetch_k': self.fetch_k,
+                'cache_hits': self.hits,
+                'cache_misses': self.misses,
+                'cache_hit_rate': self.hits / lookups if lookups else 0.0,
+                'cached_scores': len(self._scores)
+            }
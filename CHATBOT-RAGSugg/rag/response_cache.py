@@ -0,0 +1,193 @@
+"""
+Response Cache for RAG System
+Caches generated answers for repeated prompt + document requests
+(in-memory LRU with TTL, backed by SQLite so entries survive restarts)
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+
+class ResponseCache:
+    """
+    Two-level (memory + SQLite) cache of RAG query results
+    """
+
+    def __init__(self,
+                 db_path: str = "cache/response_cache.sqlite",
+                 max_memory_entries: int = 256,
+                 max_disk_entries: int = 5000,
+                 ttl_seconds: int = 24 * 3600):
+        """
+        Initialize the response cache
+
+        Args:
+            db_path: Path to the SQLite file backing the cache
+            max_memory_entries: Maximum number of results kept in memory (LRU)
+            max_disk_entries: Maximum number of results kept on disk
+            ttl_seconds: How long a cached result stays valid
+        """
+        self.db_path = db_path
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl_seconds = ttl_seconds
+
+        self._memory = OrderedDict()  # key -> (expires_at, result)
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, result TEXT NOT NULL, "
+            "created_at REAL NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute("DELETE FROM responses WHERE expires_at < ?", (time.time(),))
+        self._conn.commit()
+
+    @staticmethod
+    def normalize_prompt(prompt: str) -> str:
+        """Normalize a prompt so trivial differences (case, spacing) hit the same entry"""
+        return " ".join(prompt.lower().split())
+
+    @staticmethod
+    def make_key(prompt: str,
+                 document_hash: Optional[str],
+                 model_name: str,
+                 k: int,
+                 options: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Build the cache key for a request
+
+        Args:
+            prompt: User prompt
+            document_hash: SHA-256 of the uploaded file content (None if no file)
+            model_name: LLM model name
+            k: Number of context chunks retrieved
+            options: Context/generation options that change the answer
+
+        Returns:
+            Hex digest identifying the request
+        """
+        key_data = {
+            "prompt": ResponseCache.normalize_prompt(prompt),
+            "document_hash": document_hash,
+            "model_name": model_name,
+            "k": k,
+            "options": options or {}
+        }
+        payload = json.dumps(key_data, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached result
+
+        Args:
+            key: Key from make_key
+
+        Returns:
+            The cached result (marked with "cached": True) or None
+        """
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, result = entry
+                if expires_at >= now:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return {**result, "cached": True}
+                del self._memory[key]
+
+            row = self._conn.execute(
+                "SELECT result, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None or row[1] < now:
+                self.misses += 1
+                return None
+
+            result = json.loads(row[0])
+            self._remember(key, row[1], result)
+            self.hits += 1
+            return {**result, "cached": True}
+
+    def set(self, key: str, result: Dict[str, Any]) -> None:
+        """
+        Store a result
+
+        Args:
+            key: Key from make_key
+            result: Query result to cache
+        """
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        result = {k: v for k, v in result.items() if k != "cached"}
+
+        with self._lock:
+            self._remember(key, expires_at, result)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, result, created_at, expires_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(result, default=str), now, expires_at)
+            )
+            # Keep the disk cache bounded (oldest entries go first)
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_disk_entries,)
+            )
+            self._conn.commit()
+
+    def _remember(self, key: str, expires_at: float, result: Dict[str, Any]) -> None:
+        """Put an entry in the in-memory LRU (caller holds the lock)"""
+        self._memory[key] = (expires_at, result)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def invalidate(self) -> None:
+        """Drop every cached result (e.g. after the vector store is rebuilt)"""
+        with self._lock:
+            self._memory.clear()
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+        print("Response cache invalidated")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics
+
+        Returns:
+            Dictionary with hit/miss counters and entry counts
+        """
+        with self._lock:
+            disk_entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_entries": disk_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "db_path": self.db_path
+            }
+
+    def close(self) -> None:
+        """Close the SQLite connection"""
+        with self._lock:
+            self._conn.close()
@@ -3,13 +3,14 @@ Setup and Run Script for RAG System
 Handles initial setup, testing, and running the RAG system
 """
 
-import os
 import sys
 import subprocess
-import json
+import logging
+from typing import Optional, AsyncIterator
+from concurrent.futures import Executor
 from main_rag import RAGSystem
-from pathlib import Path
-from document_loader import load_training_data
+
+logger = logging.getLogger(__name__)
 
 
 def check_python_version():
@@ -62,41 +63,86 @@ def check_ollama():
         return False
 
 
-def run_rag_on_text(prompt: str, additional_context: str = "") -> str:
+def run_rag_on_text(prompt: str, additional_context: str = "",
+                    rag: Optional[RAGSystem] = None,
+                    document_hash: Optional[str] = None) -> str:
     """
     Entry point for external apps (FastAPI, AL) to query the RAG pipeline.
     Accepts a prompt and optional extra context.
     Returns AI-generated response.
+
+    Args:
+        prompt: User prompt
+        additional_context: Extra text (e.g. extracted PDF content); it is
+                            chunked and only its parts relevant to the prompt
+                            are added to the context
+        rag: Already initialized RAGSystem to reuse. When omitted a new
+             system is built and set up for this single call.
+        document_hash: SHA-256 of the uploaded file (used for response caching)
     """
-    print(f"[DEBUG] Prompt: {prompt[:100]}")
-    print(f"[DEBUG] Context preview: {additional_context[:500]}")
+    logger.debug("RAG request: prompt %d chars, upload context %d chars", len(prompt), len(additional_context))
     try:
-        rag = RAGSystem()
-        print("Training data exists:", os.path.exists("processed_data/training_data.json"))
-        from document_loader import load_training_data
-
-        try:
-            docs = load_training_data("processed_data/training_data.json")
-            print(f"Loaded {len(docs)} documents")
-        except Exception as e:
-            print("Error loading documents:", e)
+        if rag is None:
+            rag = RAGSystem()
+            setup_success = rag.setup(force_recreate_db=False)
 
-        setup_success = rag.setup(force_recreate_db=False)
+            if not setup_success:
+                return "Failed to set up RAG system."
 
-        if not setup_success:
-            return "Failed to set up RAG system."
+        result = rag.query(prompt,
+                           document_hash=document_hash,
+                           upload_text=additional_context or None)
+        return _result_to_text(result)
+    except Exception as e:
+        return f"Exception during RAG run: {e}"
 
-        full_prompt = f"{prompt}\n\nPDF Content:\n{additional_context}".strip()
-        result = rag.query(full_prompt)
 
-        if result.get("success"):
-            return result.get("response", "No response generated.")
-        else:
-            return f"Query failed: {result.get('error', 'Unknown error')}"
+async def arun_rag_on_text(prompt: str, additional_context: str = "",
+                           rag: RAGSystem = None,
+                           executor: Optional[Executor] = None,
+                           document_hash: Optional[str] = None) -> str:
+    """
+    Async variant of run_rag_on_text for the API server.
+    Requires an already initialized RAGSystem; retrieval runs on the given
+    executor and generation uses the async Ollama client.
+    """
+    logger.debug("RAG request: prompt %d chars, upload context %d chars", len(prompt), len(additional_context))
+    try:
+        result = await rag.aquery(prompt,
+                                  executor=executor,
+                                  document_hash=document_hash,
+                                  upload_text=additional_context or None)
+        return _result_to_text(result)
     except Exception as e:
         return f"Exception during RAG run: {e}"
 
-    
+
+async def astream_rag_on_text(prompt: str, additional_context: str = "",
+                              rag: RAGSystem = None,
+                              executor: Optional[Executor] = None,
+                              document_hash: Optional[str] = None) -> AsyncIterator[dict]:
+    """
+    Streaming variant of arun_rag_on_text.
+    Yields the RAGSystem streaming events (sources, tokens, done/error).
+    """
+    logger.debug("RAG stream request: prompt %d chars, upload context %d chars", len(prompt), len(additional_context))
+    try:
+        async for event in rag.aquery_stream(prompt,
+                                             executor=executor,
+                                             document_hash=document_hash,
+                                             upload_text=additional_context or None):
+            yield event
+    except Exception as e:
+        yield {"type": "error", "success": False, "error": f"Exception during RAG run: {e}"}
+
+
+def _result_to_text(result: dict) -> str:
+    """Turn a RAGSystem query result into the text returned to callers"""
+    if result.get("success"):
+        return result.get("response", "No response generated.")
+    else:
+        return f"Query failed: {result.get('error', 'Unknown error')}"
+
 
 def main():
     """Main setup function"""
@@ -0,0 +1,9 @@
+"""
+Shared test setup: the rag modules import each other by module name, so the
+rag directory is put on the import path
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
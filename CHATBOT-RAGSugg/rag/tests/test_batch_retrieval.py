@@ -0,0 +1,118 @@
+"""
+Tests that batched query embedding and batched retrieval give the same
+per-query results as the single-query path
+"""
+
+import hashlib
+import numpy as np
+import pytest
+from langchain.docstore.document import Document
+import vector_store
+from vector_store import VectorStoreManager
+from context_retriever import ContextRetriever
+
+
+class HashingEmbeddings:
+    """Deterministic bag-of-words embeddings (unit length), counting calls"""
+
+    dim = 64
+
+    def __init__(self):
+        self.query_calls = 0
+        self.document_calls = 0
+
+    def _embed(self, text):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in text.lower().split():
+            vector[int(hashlib.md5(word.encode("utf-8")).hexdigest(), 16) % self.dim] += 1.0
+        return (vector / max(np.linalg.norm(vector), 1e-12)).tolist()
+
+    def embed_documents(self, texts):
+        self.document_calls += 1
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        self.query_calls += 1
+        return self._embed(text)
+
+
+TOPICS = ["tax", "capital", "pension", "invoice", "mortgage", "dividend", "payroll", "audit"]
+
+QUERIES = [
+    "how is capital gains tax computed",
+    "pension contributions and payroll",
+    "mortgage interest deduction",
+    "audit of invoice records",
+]
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.setattr(vector_store, "create_encoder", lambda *args, **kwargs: HashingEmbeddings())
+    manager = VectorStoreManager(persist_directory=str(tmp_path / "db"), backend="quantized",
+                                 embedding_cache_dir=None)
+    documents = [
+        Document(page_content=f"{TOPICS[i % 8]} {TOPICS[(i * 3) % 8]} note {i} about {TOPICS[(i * 5) % 8]} rules",
+                 metadata={"chunk_id": f"doc{i}_chunk_0", "parent_doc_id": f"doc{i}", "chunk_index": 0,
+                           "source": "test", "category": TOPICS[i % 8]})
+        for i in range(40)
+    ]
+    manager.create_vectorstore(documents)
+    yield manager
+    manager.vectorstore.close()
+
+
+def hit_list(results):
+    return [(doc.metadata["chunk_id"], pytest.approx(score, abs=1e-6)) for doc, score in results]
+
+
+def test_embed_queries_matches_embed_query(manager):
+    batched = manager.embed_queries(QUERIES)
+    manager.query_cache = vector_store.QueryEmbeddingCache()
+    single = [manager.embed_query(query) for query in QUERIES]
+
+    assert np.allclose(batched, single)
+
+
+def test_embed_queries_encodes_only_cache_misses_in_one_call(manager):
+    manager.embed_query(QUERIES[0])
+    calls_before = manager.embeddings.document_calls
+
+    manager.embed_queries(QUERIES)
+
+    assert manager.embeddings.document_calls == calls_before + 1
+    assert manager.get_query_cache_stats()["entries"] == len(QUERIES)
+
+
+def test_batch_search_matches_single_search(manager):
+    batched = manager.similarity_search_batch_with_score(QUERIES, k=5)
+
+    for query, results in zip(QUERIES, batched):
+        assert hit_list(results) == hit_list(manager.similarity_search_with_score(query, k=5))
+
+
+@pytest.mark.parametrize("options", [
+    {"mode": "dense"},
+    {"mode": "hybrid"},
+    {"mode": "keyword"},
+    {"mode": "dense", "min_score_threshold": 0.3},
+    {"mode": "dense", "expand": "parent", "max_context_length": 300},
+])
+def test_retrieve_context_batch_matches_retrieve_context(manager, options):
+    retriever = ContextRetriever(manager)
+
+    batched = retriever.retrieve_context_batch(QUERIES, k=4, **options)
+    single = [retriever.retrieve_context(query, k=4, **options) for query in QUERIES]
+
+    assert batched == single
+
+
+def test_retrieve_context_batch_reports_similarity_scores(manager):
+    retriever = ContextRetriever(manager)
+
+    result = retriever.retrieve_context_batch(QUERIES[:1], k=3)[0]
+
+    assert [source["score_type"] for source in result["sources"]] == ["similarity"] * 3
+    scores = [source["similarity_score"] for source in result["sources"]]
+    assert scores == sorted(scores, reverse=True)
+    assert all(-1.0 <= score <= 1.0 for score in scores)
@@ -0,0 +1,107 @@
+"""
+Tests for blue/green index builds
+"""
+
+import os
+import pytest
+import index_builds
+from index_builds import (builds_directory, current_build, list_builds, new_build_directory,
+                          pointer_file, prune_builds, swap_in, LEGACY_BUILD_NAME)
+
+
+def make_build(live_path, marker):
+    path = new_build_directory(live_path)
+    with open(os.path.join(path, "marker.txt"), "w") as f:
+        f.write(marker)
+    return path
+
+
+def no_symlink(*args, **kwargs):
+    raise OSError("symbolic links not permitted")
+
+
+def live_marker(live_path):
+    with open(os.path.join(current_build(live_path), "marker.txt")) as f:
+        return f.read()
+
+
+@pytest.fixture
+def live_path(tmp_path):
+    return str(tmp_path / "chroma_db")
+
+
+def test_swap_in_points_live_path_at_build(live_path):
+    build = make_build(live_path, "one")
+
+    swap_in(live_path, build)
+
+    assert os.path.islink(live_path)
+    assert current_build(live_path) == os.path.realpath(build)
+    assert live_marker(live_path) == "one"
+
+
+def test_swap_in_moves_plain_directory_aside(live_path):
+    os.makedirs(live_path)
+    with open(os.path.join(live_path, "marker.txt"), "w") as f:
+        f.write("legacy")
+    build = make_build(live_path, "new")
+
+    swap_in(live_path, build)
+
+    assert live_marker(live_path) == "new"
+    legacy = os.path.join(builds_directory(live_path), LEGACY_BUILD_NAME)
+    with open(os.path.join(legacy, "marker.txt")) as f:
+        assert f.read() == "legacy"
+
+
+def test_swap_in_keeps_only_newest_builds(live_path):
+    builds = [make_build(live_path, str(n)) for n in range(4)]
+
+    for build in builds:
+        swap_in(live_path, build, keep=2)
+
+    assert list_builds(live_path) == builds[-2:]
+    assert live_marker(live_path) == "3"
+
+
+def test_prune_builds_never_deletes_live_build(live_path):
+    builds = [make_build(live_path, str(n)) for n in range(3)]
+    swap_in(live_path, builds[0], keep=3)
+
+    prune_builds(live_path, keep=1)
+
+    assert builds[0] in list_builds(live_path)
+    assert builds[2] in list_builds(live_path)
+    assert builds[1] not in list_builds(live_path)
+
+
+def test_swap_in_falls_back_to_pointer_file_without_symlinks(live_path, monkeypatch):
+    first = make_build(live_path, "first")
+    swap_in(live_path, first)
+    monkeypatch.setattr(index_builds.os, "symlink", no_symlink)
+    second = make_build(live_path, "second")
+
+    swap_in(live_path, second)
+
+    assert not os.path.lexists(live_path)
+    assert os.path.isfile(pointer_file(live_path))
+    assert current_build(live_path) == os.path.realpath(second)
+    assert live_marker(live_path) == "second"
+
+
+def test_symlink_swap_replaces_stale_pointer_file(live_path, monkeypatch):
+    monkeypatch.setattr(index_builds.os, "symlink", no_symlink)
+    swap_in(live_path, make_build(live_path, "pointer"))
+    monkeypatch.undo()
+
+    swap_in(live_path, make_build(live_path, "symlink"))
+
+    assert os.path.islink(live_path)
+    assert not os.path.exists(pointer_file(live_path))
+    assert live_marker(live_path) == "symlink"
+
+
+def test_current_build_of_plain_directory_is_itself(live_path):
+    os.makedirs(live_path)
+
+    assert current_build(live_path) == os.path.realpath(live_path)
@@ -0,0 +1,106 @@
+"""
+Tests for the index manifest diff used by incremental syncs
+"""
+
+from langchain.docstore.document import Document
+from index_manifest import IndexManifest, has_unique_chunk_ids
+
+
+def make_doc(chunk_id, text, **metadata):
+    return Document(page_content=text, metadata={"chunk_id": chunk_id, **metadata})
+
+
+def base_documents():
+    return [
+        make_doc("a", "first chunk", source="s1"),
+        make_doc("b", "second chunk", source="s1"),
+        make_doc("c", "third chunk", source="s2"),
+    ]
+
+
+def test_diff_classifies_every_change_type():
+    manifest = IndexManifest.from_documents(base_documents(), "model")
+    documents = [
+        make_doc("a", "first chunk", source="s1"),          # unchanged
+        make_doc("b", "second chunk, edited", source="s1"),  # text changed
+        make_doc("c", "third chunk", source="renamed"),      # metadata changed
+        make_doc("d", "fourth chunk", source="s2"),          # new
+    ]
+
+    diff = manifest.diff(documents)
+
+    assert diff == {
+        "added": ["d"],
+        "changed": ["b"],
+        "metadata_changed": ["c"],
+        "removed": [],
+        "unchanged": ["a"],
+    }
+
+
+def test_diff_reports_removed_chunks():
+    manifest = IndexManifest.from_documents(base_documents(), "model")
+
+    diff = manifest.diff(base_documents()[:1])
+
+    assert diff["unchanged"] == ["a"]
+    assert sorted(diff["removed"]) == ["b", "c"]
+
+
+def test_metadata_key_order_does_not_count_as_change():
+    manifest = IndexManifest.from_documents([make_doc("a", "text", x=1, y=2)], "model")
+    reordered = Document(page_content="text", metadata={"y": 2, "x": 1, "chunk_id": "a"})
+
+    assert manifest.diff([reordered])["unchanged"] == ["a"]
+
+
+def test_save_and_load_round_trip(tmp_path):
+    path = str(tmp_path / "manifest.json")
+    IndexManifest.from_documents(base_documents(), "model").save(path)
+
+    loaded = IndexManifest.load(path)
+
+    assert loaded.embedding_model == "model"
+    assert loaded.diff(base_documents())["unchanged"] == ["a", "b", "c"]
+
+
+def test_load_missing_or_corrupt_manifest_returns_none(tmp_path):
+    path = tmp_path / "manifest.json"
+    assert IndexManifest.load(str(path)) is None
+
+    path.write_text("{not json")
+    assert IndexManifest.load(str(path)) is None
+
+
+def test_has_unique_chunk_ids():
+    assert has_unique_chunk_ids(base_documents())
+    assert not has_unique_chunk_ids(base_documents() + [make_doc("a", "duplicate")])
+    assert not has_unique_chunk_ids([Document(page_content="no id", metadata={})])
+
+
+class ConstantEmbeddings:
+    def embed_documents(self, texts):
+        return [[1.0, 0.0, 0.0] for _ in texts]
+
+    def embed_query(self, text):
+        return [1.0, 0.0, 0.0]
+
+
+def test_embedding_variant_change_forces_rebuild(tmp_path, monkeypatch):
+    import vector_store
+    monkeypatch.setattr(vector_store, "create_encoder", lambda *args, **kwargs: ConstantEmbeddings())
+    persist_directory = str(tmp_path / "db")
+
+    manager = vector_store.VectorStoreManager(persist_directory=persist_directory, backend="quantized",
+                                              embedding_cache_dir=None)
+    manager.create_vectorstore(base_documents())
+    assert manager.can_sync(base_documents())
+    manager.vectorstore.close()
+
+    # Same model, int8 ONNX encoder: the stored embeddings no longer match
+    int8_manager = vector_store.VectorStoreManager(persist_directory=persist_directory, backend="quantized",
+                                                   embedding_cache_dir=None, encoder="onnx",
+                                                   encoder_options={"quantized": True})
+    int8_manager.load_vectorstore()
+    assert not int8_manager.can_sync(base_documents())
+    int8_manager.vectorstore.close()
@@ -0,0 +1,121 @@
+"""
+Tests for the BM25 keyword index and reciprocal rank fusion
+"""
+
+import pytest
+from langchain.docstore.document import Document
+from keyword_index import BM25Index, reciprocal_rank_fusion
+
+
+def make_doc(chunk_id, text, **metadata):
+    return Document(page_content=text, metadata={"chunk_id": chunk_id, **metadata})
+
+
+def build_index():
+    index = BM25Index()
+    index.add_documents([
+        make_doc("a", "WACC is the weighted average cost of capital", category="finance"),
+        make_doc("b", "Self-employment tax covers social security", category="tax"),
+        make_doc("c", "Capital gains tax applies when assets are sold", category="tax"),
+    ])
+    return index
+
+
+def ranked_ids(results):
+    return [doc.metadata["chunk_id"] for doc, _ in results]
+
+
+def test_search_ranks_exact_terms_first():
+    index = build_index()
+
+    results = index.search("WACC capital", k=3)
+
+    assert ranked_ids(results)[0] == "a"
+    assert all(score > 0 for _, score in results)
+
+
+def test_search_applies_metadata_filter():
+    index = build_index()
+
+    results = index.search("capital", k=3, filter_dict={"category": "tax"})
+
+    assert ranked_ids(results) == ["c"]
+
+
+def test_remove_drops_postings():
+    index = build_index()
+
+    index.remove(["a"])
+
+    assert len(index) == 2
+    assert index.search("WACC", k=3) == []
+    assert "wacc" not in index.postings
+    assert ranked_ids(index.search("capital", k=3)) == ["c"]
+
+
+def test_remove_then_add_replaces_changed_chunk():
+    index = build_index()
+
+    index.remove(["b"])
+    index.add_documents([make_doc("b", "Estimated quarterly payments for freelancers")])
+
+    assert len(index) == 3
+    assert index.search("security", k=3) == []
+    assert ranked_ids(index.search("freelancers", k=3)) == ["b"]
+    assert ranked_ids(index.search("quarterly", k=5)).count("b") == 1
+
+
+def test_remove_ignores_unknown_ids():
+    index = build_index()
+
+    index.remove(["missing"])
+
+    assert len(index) == 3
+
+
+def test_save_compacts_removed_documents(tmp_path):
+    index = build_index()
+    index.remove(["a"])
+    path = str(tmp_path / "keyword_index.json")
+
+    index.save(path)
+    loaded = BM25Index.load(path)
+
+    assert len(loaded) == 2
+    assert len(loaded.documents) == 2
+    assert ranked_ids(loaded.search("capital", k=3)) == ["c"]
+    loaded.remove(["c"])
+    assert loaded.search("capital", k=3) == []
+
+
+def test_scores_match_fresh_index_after_remove():
+    index = build_index()
+    index.remove(["a"])
+    fresh = BM25Index()
+    fresh.add_documents([doc for doc in build_index().documents if doc.metadata["chunk_id"] != "a"])
+
+    expected = fresh.search("tax capital", k=3)
+    actual = index.search("tax capital", k=3)
+
+    assert ranked_ids(actual) == ranked_ids(expected)
+    assert [score for _, score in actual] == pytest.approx([score for _, score in expected])
+
+
+def test_reciprocal_rank_fusion_prefers_documents_in_both_rankings():
+    a, b, c = make_doc("a", "alpha"), make_doc("b", "beta"), make_doc("c", "gamma")
+    dense = [(a, 0.9), (b, 0.8)]
+    keyword = [(c, 7.0), (b, 5.0)]
+
+    fused = reciprocal_rank_fusion([dense, keyword], k=3, rrf_k=60)
+
+    assert ranked_ids(fused)[0] == "b"
+    assert set(ranked_ids(fused)) == {"a", "b", "c"}
+    assert fused[0][1] == pytest.approx(1 / 62 + 1 / 62)
+
+
+def test_reciprocal_rank_fusion_truncates_to_k():
+    docs = [make_doc(str(i), f"text {i}") for i in range(5)]
+
+    fused = reciprocal_rank_fusion([[(doc, 1.0) for doc in docs]], k=2)
+
+    assert ranked_ids(fused) == ["0", "1"]
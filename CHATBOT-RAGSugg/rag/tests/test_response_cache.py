@@ -0,0 +1,62 @@
+"""
+Tests for the response cache
+"""
+
+import pytest
+from response_cache import ResponseCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResponseCache(db_path=str(tmp_path / "responses.sqlite"), max_memory_entries=2)
+    yield cache
+    cache.close()
+
+
+def test_key_ignores_case_and_spacing():
+    assert ResponseCache.make_key("What is  WACC?", None, "m", 5) == ResponseCache.make_key("what is wacc?", None, "m", 5)
+    assert ResponseCache.make_key("What is WACC?", None, "m", 5) != ResponseCache.make_key("What is WACC?", "abc", "m", 5)
+
+
+def test_set_and_get_marks_result_cached(cache):
+    key = ResponseCache.make_key("question", None, "m", 5)
+
+    cache.set(key, {"response": "answer", "cached": False})
+
+    assert cache.get(key) == {"response": "answer", "cached": True}
+
+
+def test_entries_evicted_from_memory_are_read_from_disk(cache):
+    keys = [ResponseCache.make_key(f"question {n}", None, "m", 5) for n in range(3)]
+    for n, key in enumerate(keys):
+        cache.set(key, {"response": str(n)})
+
+    assert cache.get_stats()["memory_entries"] == 2
+    assert cache.get(keys[0])["response"] == "0"
+
+
+def test_invalidate_clears_memory_and_disk(cache, tmp_path):
+    key = ResponseCache.make_key("question", None, "m", 5)
+    cache.set(key, {"response": "answer"})
+
+    cache.invalidate()
+
+    assert cache.get(key) is None
+    stats = cache.get_stats()
+    assert stats["memory_entries"] == 0
+    assert stats["disk_entries"] == 0
+
+    reopened = ResponseCache(db_path=str(tmp_path / "responses.sqlite"))
+    assert reopened.get(key) is None
+    reopened.close()
+
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = ResponseCache(db_path=str(tmp_path / "responses.sqlite"), ttl_seconds=-1)
+    key = ResponseCache.make_key("question", None, "m", 5)
+
+    cache.set(key, {"response": "answer"})
+
+    assert cache.get(key) is None
+    assert cache.get_stats()["misses"] == 1
+    cache.close()
@@ -0,0 +1,118 @@
+"""
+Tests for the quantized vector backend
+"""
+
+import numpy as np
+import pytest
+from langchain.docstore.document import Document
+from vector_backends import QuantizedBackend
+
+
+def random_vectors(n, dim=32, seed=0):
+    vectors = np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def build_backend(path, vectors, quantization="int8"):
+    backend = QuantizedBackend(str(path), quantization=quantization)
+    backend.create()
+    ids = [f"chunk_{i}" for i in range(len(vectors))]
+    documents = [Document(page_content=f"text {i}", metadata={"chunk_id": ids[i], "group": i % 2})
+                 for i in range(len(vectors))]
+    backend.upsert(ids, vectors.tolist(), documents)
+    return backend
+
+
+@pytest.mark.parametrize("quantization", ["int8", "float16"])
+def test_rescored_recall_is_high(tmp_path, quantization):
+    backend = build_backend(tmp_path, random_vectors(500), quantization)
+
+    recall = backend.evaluate_recall(k=10, sample_size=100)
+
+    assert recall["queries"] == 100
+    assert recall["recall_rescored"] >= 0.95
+    assert recall["recall_rescored"] >= recall["recall_scan"]
+    backend.close()
+
+
+def test_search_returns_exact_distances_closest_first(tmp_path):
+    vectors = random_vectors(200)
+    backend = build_backend(tmp_path, vectors)
+
+    hits = backend.search_by_vector([vectors[7].tolist()], k=5)[0]
+
+    assert hits[0][0].metadata["chunk_id"] == "chunk_7"
+    assert hits[0][1] == pytest.approx(0.0, abs=1e-6)
+    distances = [distance for _, distance in hits]
+    assert distances == sorted(distances)
+    backend.close()
+
+
+def test_deleted_and_replaced_chunks_are_not_returned(tmp_path):
+    vectors = random_vectors(100)
+    backend = build_backend(tmp_path, vectors)
+
+    backend.delete(["chunk_3"])
+    backend.upsert(["chunk_4"], [vectors[50].tolist()], [Document(page_content="moved", metadata={})])
+
+    found = [doc.page_content for doc, _ in backend.search_by_vector([vectors[3].tolist()], k=100)[0]]
+    assert "text 3" not in found
+    assert "text 4" not in found
+    assert found.count("moved") == 1
+    assert backend.count() == 99
+    backend.close()
+
+
+def test_filtered_search_only_returns_matching_rows(tmp_path):
+    vectors = random_vectors(50)
+    backend = build_backend(tmp_path, vectors)
+
+    hits = backend.search_by_vector([vectors[0].tolist()], k=10, filter_dict={"group": 1})[0]
+
+    assert hits
+    assert all(doc.metadata["group"] == 1 for doc, _ in hits)
+    backend.close()
+
+
+def test_persisted_index_gives_same_results(tmp_path):
+    vectors = random_vectors(300)
+    backend = build_backend(tmp_path, vectors)
+    backend.delete(["chunk_0"])
+    backend.persist()
+    expected = backend.search_by_vector(vectors[:5].tolist(), k=5)
+    backend.close()
+
+    loaded = QuantizedBackend(str(tmp_path))
+    assert loaded.load()
+    actual = loaded.search_by_vector(vectors[:5].tolist(), k=5)
+
+    assert loaded.count() == 299
+    for expected_hits, actual_hits in zip(expected, actual):
+        assert [doc.page_content for doc, _ in actual_hits] == [doc.page_content for doc, _ in expected_hits]
+    loaded.close()
+
+
+def test_unknown_quantization_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        QuantizedBackend(str(tmp_path), quantization="int4")
+
+
+def test_int8_range_is_refitted_when_new_vectors_fall_outside_it(tmp_path):
+    # A tiny first batch fits a narrow range; the large second batch must not be clipped into it
+    first = random_vectors(3, seed=1) * 0.1
+    second = random_vectors(500, seed=2)
+    backend = build_backend(tmp_path, first)
+    ids = [f"more_{i}" for i in range(len(second))]
+    backend.upsert(ids, second.tolist(), [Document(page_content=chunk_id, metadata={}) for chunk_id in ids])
+
+    assert np.all(backend._offset <= second.min(axis=0))
+    recall = backend.evaluate_recall(k=10, sample_size=100)
+    assert recall["recall_scan"] >= 0.8
+    assert recall["recall_rescored"] >= 0.95
+
+    backend.persist()
+    backend.close()
+    loaded = QuantizedBackend(str(tmp_path))
+    assert loaded.load()
+    assert np.allclose(loaded._offset, backend._offset)
+    loaded.close()
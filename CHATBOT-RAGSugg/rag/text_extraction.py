@@ -0,0 +1,286 @@
+"""
+Text Extraction for uploaded documents
+Extracts per-page text from PDF/TXT uploads and caches it by content hash
+"""
+
+import os
+import io
+import time
+import json
+import hashlib
+import threading
+from concurrent.futures import Executor, wait
+from typing import List, Dict, Any, Optional, Tuple
+from PyPDF2 import PdfReader
+
+
+class ExtractedTextCache:
+    """
+    Content-addressed, size-bounded disk cache of extracted page text
+    """
+
+    def __init__(self,
+                 cache_dir: str = "cache/extracted_text",
+                 max_bytes: int = 200 * 1024 * 1024):
+        """
+        Initialize the extracted text cache
+
+        Args:
+            cache_dir: Directory holding one JSON file per document
+            max_bytes: Maximum total size of the cache on disk; least
+                       recently used documents are evicted first
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, content_hash: str, file_type: str) -> str:
+        return os.path.join(self.cache_dir, f"{content_hash}.{file_type}.json")
+
+    def get(self, content_hash: str, file_type: str) -> Optional[List[str]]:
+        """
+        Look up the extracted pages of a document
+
+        Args:
+            content_hash: SHA-256 of the file content
+            file_type: File extension the text was extracted as ("pdf", "txt")
+
+        Returns:
+            List of page texts, or None if not cached
+        """
+        path = self._path(content_hash, file_type)
+        with self._lock:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    pages = json.load(f)["pages"]
+            except (OSError, ValueError, KeyError):
+                self.misses += 1
+                return None
+
+            # Mark as recently used for eviction
+            os.utime(path, None)
+            self.hits += 1
+            return pages
+
+    def set(self, content_hash: str, file_type: str, pages: List[str]) -> None:
+        """
+        Store the extracted pages of a document
+
+        Args:
+            content_hash: SHA-256 of the file content
+            file_type: File extension the text was extracted as ("pdf", "txt")
+            pages: Extracted text, one entry per page
+        """
+        path = self._path(content_hash, file_type)
+        tmp_path = f"{path}.tmp"
+        with self._lock:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"pages": pages}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+            self._evict()
+
+    def _evict(self) -> None:
+        """Remove least recently used entries until under max_bytes (caller holds the lock)"""
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        entries.sort()
+        while total > self.max_bytes and entries:
+            _, size, path = entries.pop(0)
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics
+
+        Returns:
+            Dictionary with hit/miss counters and disk usage
+        """
+        with self._lock:
+            files = [os.path.join(self.cache_dir, name)
+                     for name in os.listdir(self.cache_dir) if name.endswith(".json")]
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "documents": len(files),
+                "size_bytes": sum(os.path.getsize(path) for path in files),
+                "max_bytes": self.max_bytes,
+                "cache_dir": self.cache_dir
+            }
+
+
+def _extract_page_range(data: bytes, start: int, end: int,
+                        deadline: Optional[float] = None) -> Tuple[List[str], bool]:
+    """
+    Extract pages [start, end) of a PDF (runs inside a worker process)
+
+    Each task parses the document again from the pickled bytes (a PdfReader
+    cannot be shared across processes), so the parse cost is paid per task.
+
+    Args:
+        deadline: time.time() after which no further page is started
+
+    Returns:
+        Tuple of (page texts, with "" for pages skipped at the deadline;
+        whether every page of the range was extracted)
+    """
+    reader = PdfReader(io.BytesIO(data))
+    pages = []
+    for i in range(start, end):
+        if deadline is not None and time.time() > deadline:
+            return pages + [""] * (end - i), False
+        pages.append(reader.pages[i].extract_text() or "")
+    return pages, True
+
+
+def extract_pdf_pages(data: bytes,
+                      process_pool: Optional[Executor] = None,
+                      min_parallel_pages: int = 32,
+                      pages_per_task: int = 16,
+                      time_budget: Optional[float] = None) -> Tuple[List[str], bool]:
+    """
+    Extract the text of every page of a PDF
+
+    Large documents are split into page ranges that are extracted in
+    parallel on the process pool; small ones are extracted sequentially
+    since pool overhead would dominate.
+
+    The time budget is enforced per page: queued tasks are cancelled and
+    running tasks stop before their next page once the deadline passes, so a
+    single very slow page can still overrun the budget by its own duration.
+
+    Args:
+        data: PDF content
+        process_pool: Pool used for page-parallel extraction (None = sequential)
+        min_parallel_pages: Documents with fewer pages are extracted sequentially
+        pages_per_task: Number of pages in each parallel task
+        time_budget: Maximum seconds to spend on the document (None = no limit)
+
+    Returns:
+        Tuple of (page texts in page order, whether every page was extracted).
+        Pages not extracted within the time budget are left empty.
+    """
+    started = time.monotonic()
+    reader = PdfReader(io.BytesIO(data))
+    page_count = len(reader.pages)
+
+    if process_pool is None or page_count < min_parallel_pages:
+        pages = []
+        for page in reader.pages:
+            if time_budget is not None and time.monotonic() - started > time_budget:
+                print(f"PDF extraction stopped after {len(pages)}/{page_count} pages (time budget {time_budget}s)")
+                return pages + [""] * (page_count - len(pages)), False
+            pages.append(page.extract_text() or "")
+        return pages, True
+
+    ranges = [(start, min(start + pages_per_task, page_count))
+              for start in range(0, page_count, pages_per_task)]
+    remaining = None
+    deadline = None
+    if time_budget is not None:
+        remaining = max(0.0, time_budget - (time.monotonic() - started))
+        # Wall clock, since the deadline is checked in other processes
+        deadline = time.time() + remaining
+    futures = [process_pool.submit(_extract_page_range, data, start, end, deadline) for start, end in ranges]
+
+    # Running tasks return shortly after the deadline; give them a moment to do so
+    done, not_done = wait(futures, timeout=remaining + 1.0 if remaining is not None else None)
+    for future in not_done:
+        future.cancel()
+
+    pages = []
+    incomplete_ranges = len(not_done)
+    for future, (start, end) in zip(futures, ranges):
+        if future in done:
+            range_pages, range_complete = future.result()
+            pages.extend(range_pages)
+            incomplete_ranges += not range_complete
+        else:
+            pages.extend([""] * (end - start))
+
+    if incomplete_ranges:
+        print(f"PDF extraction incomplete: {incomplete_ranges}/{len(ranges)} page ranges exceeded the time budget ({time_budget}s)")
+
+    return pages, not incomplete_ranges
+
+
+def extract_upload_pages(filename: str,
+                         data: bytes,
+                         cache: Optional[ExtractedTextCache] = None,
+                         content_hash: Optional[str] = None,
+                         **pdf_options) -> Tuple[List[str], bool]:
+    """
+    Extract the per-page text of an uploaded PDF/TXT file
+
+    Args:
+        filename: Uploaded file name (its extension selects the parser)
+        data: File content
+        cache: Optional cache; a repeat upload skips parsing entirely
+        content_hash: SHA-256 of data (computed if not given)
+        **pdf_options: Options for extract_pdf_pages (process_pool, time_budget, ...)
+
+    Returns:
+        Tuple of (page texts, [] for unsupported file types; whether every
+        page was extracted within the time budget)
+    """
+    if filename.endswith(".pdf"):
+        file_type = "pdf"
+    elif filename.endswith(".txt"):
+        file_type = "txt"
+    else:
+        return [], True
+
+    if cache:
+        content_hash = content_hash or hashlib.sha256(data).hexdigest()
+        pages = cache.get(content_hash, file_type)
+        if pages is not None:
+            return pages, True
+
+    complete = True
+    if file_type == "pdf":
+        pages, complete = extract_pdf_pages(data, **pdf_options)
+    else:
+        pages = [data.decode("utf-8")]
+
+    # Partial extractions (time budget exceeded) are not cached
+    if cache and complete:
+        cache.set(content_hash, file_type, pages)
+
+    return pages, complete
+
+
+def extract_upload_text(filename: str,
+                        data: bytes,
+                        cache: Optional[ExtractedTextCache] = None,
+                        content_hash: Optional[str] = None,
+                        **pdf_options) -> Tuple[str, bool]:
+    """
+    Extract the text of an uploaded PDF/TXT file ("" for other types)
+
+    Returns:
+        Tuple of (text, whether it is complete; False when the time budget
+        cut the extraction short)
+    """
+    pages, complete = extract_upload_pages(filename, data, cache, content_hash, **pdf_options)
+    return "\n\n".join(pages), complete
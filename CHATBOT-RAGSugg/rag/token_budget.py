@@ -0,0 +1,101 @@
+"""
+Token Counting for RAG System
+Counts prompt tokens with the model's tokenizer, or a calibrated estimator
+"""
+
+import threading
+from typing import Optional
+
+
+class TokenCounter:
+    """
+    Token counts for prompt budgeting
+
+    With a Hugging Face tokenizer name the counts are exact. Without one,
+    tokens are estimated from the character count, and the characters per
+    token ratio is calibrated from the prompt_eval_count Ollama reports.
+    """
+
+    def __init__(self,
+                 tokenizer_name: Optional[str] = None,
+                 chars_per_token: float = 3.5,
+                 calibration_weight: float = 0.1):
+        """
+        Initialize the counter
+
+        Args:
+            tokenizer_name: Hugging Face tokenizer of the served model
+                            (e.g. "mistralai/Mistral-7B-Instruct-v0.2")
+            chars_per_token: Initial characters per token of the estimator
+            calibration_weight: Weight of each new observation in the
+                                moving average of chars_per_token
+        """
+        self.tokenizer_name = tokenizer_name
+        self.chars_per_token = chars_per_token
+        self.calibration_weight = calibration_weight
+        self.calibration_samples = 0
+        self._lock = threading.Lock()
+
+        self.tokenizer = None
+        if tokenizer_name:
+            try:
+                from transformers import AutoTokenizer
+                self.tokenizer = AutoTokenizer.from_pretrained(tokenizer_name)
+                print(f"Loaded tokenizer: {tokenizer_name}")
+            except Exception as e:
+                print(f"Could not load tokenizer '{tokenizer_name}', estimating tokens instead: {str(e)}")
+
+    @property
+    def exact(self) -> bool:
+        return self.tokenizer is not None
+
+    def count(self, text: str) -> int:
+        """Number of tokens in text"""
+        if not text:
+            return 0
+        if self.tokenizer is not None:
+            return len(self.tokenizer.encode(text, add_special_tokens=False))
+        return int(len(text) / self.chars_per_token + 0.999)
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """
+        Cut text to at most max_tokens tokens
+
+        Cuts prefer a paragraph boundary (context chunks are joined with a
+        blank line), then a word boundary.
+        """
+        if max_tokens <= 0:
+            return ""
+        if self.count(text) <= max_tokens:
+            return text
+
+        # Leave room for the "..." marker
+        max_tokens -= 1
+        if self.tokenizer is not None:
+            ids = self.tokenizer.encode(text, add_special_tokens=False)[:max_tokens]
+            cut = self.tokenizer.decode(ids)
+        else:
+            cut = text[:int(max_tokens * self.chars_per_token)]
+
+        paragraph_end = cut.rfind("\n\n")
+        if paragraph_end > len(cut) // 2:
+            return cut[:paragraph_end]
+        return cut.rsplit(" ", 1)[0] + "..."
+
+    def calibrate(self, text: str, actual_tokens: int) -> None:
+        """
+        Update the estimator with the real token count of a prompt
+
+        Observations far from the current ratio are ignored: Ollama only
+        counts the tokens it had to evaluate, so a prompt prefix reused from
+        its cache makes prompt_eval_count smaller than the prompt.
+        """
+        if self.tokenizer is not None or not text or actual_tokens <= 0:
+            return
+
+        observed = len(text) / actual_tokens
+        with self._lock:
+            if not 0.5 < observed / self.chars_per_token < 2.0:
+                return
+            self.chars_per_token += self.calibration_weight * (observed - self.chars_per_token)
+            self.calibration_samples += 1
@@ -0,0 +1,132 @@
+"""
+Upload Index for RAG System
+Ephemeral in-memory vector index over an uploaded document, so only the
+upload chunks relevant to the question reach the prompt
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List, Tuple, Optional
+import numpy as np
+from langchain.docstore.document import Document
+from chunking_processor import DocumentChunkProcessor
+from vector_store import VectorStoreManager
+
+
+class UploadIndex:
+    """
+    Chunks and embeddings of a single uploaded document
+    """
+
+    def __init__(self, chunks: List[Document], embeddings: np.ndarray):
+        """
+        Initialize the upload index
+
+        Args:
+            chunks: Chunked upload documents
+            embeddings: Matrix of chunk embeddings (one row per chunk)
+        """
+        self.chunks = chunks
+        self.embeddings = embeddings
+
+    def search(self, query_embedding: List[float], k: int = 3) -> List[Tuple[Document, float]]:
+        """
+        Find the upload chunks closest to a query
+
+        Args:
+            query_embedding: Embedded query
+            k: Number of chunks to return
+
+        Returns:
+            List of (chunk, squared L2 distance) pairs, closest first
+            (same score convention as Chroma's default l2 space)
+        """
+        if not self.chunks or k <= 0:
+            return []
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        distances = np.sum((self.embeddings - query) ** 2, axis=1)
+
+        k = min(k, len(self.chunks))
+        top = np.argpartition(distances, k - 1)[:k]
+        top = top[np.argsort(distances[top])]
+
+        return [(self.chunks[i], float(distances[i])) for i in top]
+
+
+class UploadIndexCache:
+    """
+    Builds upload indexes and keeps the most recent ones per file hash
+    """
+
+    def __init__(self,
+                 vector_store_manager: VectorStoreManager,
+                 chunk_size: int = 1000,
+                 chunk_overlap: int = 200,
+                 max_indexes: int = 16):
+        """
+        Initialize the upload index cache
+
+        Args:
+            vector_store_manager: Provides the embedding model
+            chunk_size: Size of upload chunks
+            chunk_overlap: Overlap between upload chunks
+            max_indexes: Number of upload indexes kept in memory (LRU)
+        """
+        self.vector_store = vector_store_manager
+        self.processor = DocumentChunkProcessor(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap
+        )
+        self.max_indexes = max_indexes
+        self._indexes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_index(self, text: str, upload_id: Optional[str] = None) -> UploadIndex:
+        """
+        Get the index for an uploaded document, building it if needed
+
+        Args:
+            text: Extracted upload text
+            upload_id: Stable identifier (e.g. SHA-256 of the file); the
+                       hash of the text is used when not given
+
+        Returns:
+            UploadIndex for the document
+        """
+        upload_id = upload_id or hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+        with self._lock:
+            index = self._indexes.get(upload_id)
+            if index is not None:
+                self._indexes.move_to_end(upload_id)
+                return index
+
+        index = self._build(text, upload_id)
+
+        with self._lock:
+            self._indexes[upload_id] = index
+            self._indexes.move_to_end(upload_id)
+            while len(self._indexes) > self.max_indexes:
+                self._indexes.popitem(last=False)
+
+        return index
+
+    def _build(self, text: str, upload_id: str) -> UploadIndex:
+        """Chunk and embed an uploaded document"""
+        doc = Document(
+            page_content=text,
+            metadata={
+                'id': f"upload_{upload_id[:12]}",
+                'source': 'uploaded_document',
+                'category': 'upload'
+            }
+        )
+        chunks = self.processor.process_documents([doc])
+
+        if not chunks:
+            return UploadIndex([], np.zeros((0, 0), dtype=np.float32))
+
+        embeddings = self.vector_store.embed_documents([chunk.page_content for chunk in chunks])
+        return UploadIndex(chunks, np.asarray(embeddings, dtype=np.float32))
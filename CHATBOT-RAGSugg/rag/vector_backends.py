@@ -0,0 +1,752 @@
+"""
+Vector Backends for RAG System
+Storage/search engines behind VectorStoreManager: Chroma, or in-process
+indexes (HNSW, or int8/float16 quantized scan with exact re-scoring) over
+memory-mapped vectors with a SQLite sidecar for chunk text and metadata
+"""
+
+import os
+import json
+import sqlite3
+import threading
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+from langchain.docstore.document import Document
+
+
+class VectorBackend:
+    """
+    Interface of a vector storage/search engine
+
+    Scores are squared L2 distances (lower is closer), matching Chroma's
+    default space, so both backends are interchangeable for the retriever.
+    """
+
+    name = "base"
+
+    def create(self) -> None:
+        """Start a new, empty index at the backend's location"""
+        raise NotImplementedError
+
+    def load(self) -> bool:
+        """Open an existing index; returns False if there is none or it is empty"""
+        raise NotImplementedError
+
+    def upsert(self, ids: List[str], embeddings: List[List[float]], documents: List[Document]) -> None:
+        """Insert or replace chunks with pre-computed embeddings"""
+        raise NotImplementedError
+
+    def update_metadata(self, ids: List[str], metadatas: List[Dict[str, Any]]) -> None:
+        """Replace the metadata of stored chunks without touching their vectors"""
+        raise NotImplementedError
+
+    def delete(self, ids: List[str]) -> None:
+        """Remove chunks"""
+        raise NotImplementedError
+
+    def search_by_vector(self,
+                         query_embeddings: List[List[float]],
+                         k: int = 5,
+                         filter_dict: Optional[Dict[str, Any]] = None) -> List[List[Tuple[Document, float]]]:
+        """
+        Nearest neighbours of each query vector
+
+        Returns:
+            One list of (document, distance) pairs per query, closest first
+        """
+        raise NotImplementedError
+
+    def search_with_embeddings(self,
+                               query_embedding: List[float],
+                               k: int = 20,
+                               filter_dict: Optional[Dict[str, Any]] = None) -> Tuple[List[Tuple[Document, float]], np.ndarray]:
+        """
+        Nearest neighbours of a query vector, with the stored vectors of the hits
+
+        Returns:
+            Tuple of ((document, distance) pairs, matrix of hit embeddings)
+        """
+        raise NotImplementedError
+
+    def count(self) -> int:
+        raise NotImplementedError
+
+    def persist(self) -> None:
+        """Flush pending writes to disk"""
+
+    def close(self) -> None:
+        """Release open handles"""
+
+    def destroy(self) -> None:
+        """Release handles and drop the index data (before its directory is deleted)"""
+        self.close()
+
+    def evaluate_recall(self, k: int = 10, sample_size: int = 200) -> Optional[Dict[str, Any]]:
+        """Recall@k of an approximate search against exact search (None for exact backends)"""
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, "count": self.count()}
+
+
+def _documents_from_rows(texts: List[str], metadatas: List[Optional[Dict[str, Any]]]) -> List[Document]:
+    return [Document(page_content=text, metadata=metadata or {}) for text, metadata in zip(texts, metadatas)]
+
+
+class ChromaBackend(VectorBackend):
+    """
+    Chroma collection (persistent, via LangChain's Chroma wrapper)
+    """
+
+    name = "chroma"
+
+    def __init__(self, collection_name: str, persist_directory: str, embedding_function: Any):
+        """
+        Initialize the backend
+
+        Args:
+            collection_name: Chroma collection name
+            persist_directory: Chroma storage directory
+            embedding_function: Embedding model handed to the Chroma wrapper
+        """
+        self.collection_name = collection_name
+        self.persist_directory = persist_directory
+        self.embedding_function = embedding_function
+        self.store = None
+
+    def _open(self) -> None:
+        from langchain_community.vectorstores import Chroma
+
+        self.store = Chroma(
+            collection_name=self.collection_name,
+            embedding_function=self.embedding_function,
+            persist_directory=self.persist_directory
+        )
+
+    def create(self) -> None:
+        self._open()
+
+    def load(self) -> bool:
+        self._open()
+        return self.count() > 0
+
+    def upsert(self, ids: List[str], embeddings: List[List[float]], documents: List[Document],
+               batch_size: int = 1000) -> None:
+        collection = self.store._collection
+        for start in range(0, len(ids), batch_size):
+            end = start + batch_size
+            collection.upsert(
+                ids=ids[start:end],
+                embeddings=embeddings[start:end],
+                metadatas=[doc.metadata for doc in documents[start:end]],
+                documents=[doc.page_content for doc in documents[start:end]]
+            )
+
+    def update_metadata(self, ids: List[str], metadatas: List[Dict[str, Any]]) -> None:
+        self.store._collection.update(ids=ids, metadatas=metadatas)
+
+    def delete(self, ids: List[str]) -> None:
+        self.store._collection.delete(ids=ids)
+
+    def search_by_vector(self, query_embeddings, k=5, filter_dict=None):
+        results = self.store._collection.query(
+            query_embeddings=query_embeddings,
+            n_results=k,
+            where=filter_dict or None,
+            include=["documents", "metadatas", "distances"]
+        )
+        return [
+            list(zip(_documents_from_rows(texts, metadatas), distances))
+            for texts, metadatas, distances in zip(results["documents"],
+                                                   results["metadatas"],
+                                                   results["distances"])
+        ]
+
+    def search_with_embeddings(self, query_embedding, k=20, filter_dict=None):
+        results = self.store._collection.query(
+            query_embeddings=[query_embedding],
+            n_results=k,
+            where=filter_dict or None,
+            include=["documents", "metadatas", "distances", "embeddings"]
+        )
+        scored_docs = list(zip(_documents_from_rows(results["documents"][0], results["metadatas"][0]),
+                               results["distances"][0]))
+        return scored_docs, np.asarray(results["embeddings"][0], dtype=np.float32)
+
+    def count(self) -> int:
+        return self.store._collection.count() if self.store else 0
+
+    def persist(self) -> None:
+        self.store.persist()
+
+    def close(self) -> None:
+        self.store = None
+
+    def destroy(self) -> None:
+        if self.store:
+            self.store._client.reset()
+            self.store = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, "count": self.count(), "collection_name": self.collection_name}
+
+
+class MemmapBackend(VectorBackend):
+    """
+    Base of the in-process backends: vectors in an append-only memory-mapped
+    float32 file, chunk text and metadata in a SQLite sidecar
+
+    Every stored vector gets a new row number. Replaced and deleted chunks
+    are removed from the search structure and their rows are no longer
+    referenced. Subclasses provide the search structure over the rows.
+    """
+
+    name = "memmap"
+
+    def __init__(self, persist_directory: str):
+        """
+        Initialize the backend
+
+        Args:
+            persist_directory: Directory holding the index files
+        """
+        self.persist_directory = persist_directory
+
+        self.vectors_path = os.path.join(persist_directory, f"{self.name}_vectors.f32")
+        self.docstore_path = os.path.join(persist_directory, f"{self.name}_docstore.sqlite")
+        self.meta_path = os.path.join(persist_directory, f"{self.name}_meta.json")
+
+        self._lock = threading.RLock()
+        self._conn = None
+        self._vectors = None
+        self.dim = None
+        self.next_row = 0
+        self.id_to_row: Dict[str, int] = {}
+
+    # Search structure hooks (caller holds the lock)
+
+    def _index_files(self) -> List[str]:
+        """Files of the search structure, removed by create()"""
+        return []
+
+    def _index_reset(self) -> None:
+        raise NotImplementedError
+
+    def _index_add(self, vectors: np.ndarray, rows: np.ndarray) -> None:
+        raise NotImplementedError
+
+    def _index_remove(self, rows: List[int]) -> None:
+        raise NotImplementedError
+
+    def _index_knn(self, queries: np.ndarray, k: int) -> List[List[Tuple[int, float]]]:
+        raise NotImplementedError
+
+    def _index_save(self) -> Dict[str, Any]:
+        """Persist the search structure, returning what it needs in the meta file"""
+        return {}
+
+    def _index_load(self, meta: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def _index_stats(self) -> Dict[str, Any]:
+        return {}
+
+    # Storage
+
+    def _connect(self) -> None:
+        self._conn = sqlite3.connect(self.docstore_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            "row INTEGER PRIMARY KEY, chunk_id TEXT NOT NULL UNIQUE, "
+            "content TEXT NOT NULL, metadata TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def _get_vectors(self) -> Optional[np.memmap]:
+        """Map the vector file (caller holds the lock)"""
+        if self._vectors is None and self.next_row:
+            self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r",
+                                      shape=(self.next_row, self.dim))
+        return self._vectors
+
+    def create(self) -> None:
+        with self._lock:
+            self.close()
+            os.makedirs(self.persist_directory, exist_ok=True)
+            for path in [self.vectors_path, self.docstore_path, self.meta_path] + self._index_files():
+                if os.path.exists(path):
+                    os.remove(path)
+            self._connect()
+            self.dim = None
+            self.next_row = 0
+            self.id_to_row = {}
+            self._index_reset()
+
+    def load(self) -> bool:
+        with self._lock:
+            if not os.path.exists(self.meta_path):
+                return False
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+
+            self.close()
+            self.dim = meta["dim"]
+            self.next_row = 0
+            if self.dim and os.path.exists(self.vectors_path):
+                self.next_row = os.path.getsize(self.vectors_path) // (self.dim * 4)
+            self._connect()
+            self.id_to_row = dict(self._conn.execute("SELECT chunk_id, row FROM chunks"))
+            self._index_reset()
+
+            if self.dim:
+                self._index_load(meta)
+            return self.count() > 0
+
+    def upsert(self, ids: List[str], embeddings: List[List[float]], documents: List[Document]) -> None:
+        if not ids:
+            return
+        vectors = np.asarray(embeddings, dtype=np.float32)
+
+        with self._lock:
+            if self.dim is None:
+                self.dim = int(vectors.shape[1])
+
+            # Replaced chunks: drop their old rows from the search structure
+            old_rows = [self.id_to_row[chunk_id] for chunk_id in ids if chunk_id in self.id_to_row]
+            if old_rows:
+                self._index_remove(old_rows)
+
+            rows = np.arange(self.next_row, self.next_row + len(ids))
+            with open(self.vectors_path, "ab") as f:
+                f.write(vectors.tobytes())
+            self.next_row += len(ids)
+            self._vectors = None
+
+            self._index_add(vectors, rows)
+
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO chunks (row, chunk_id, content, metadata) VALUES (?, ?, ?, ?)",
+                [(int(row), chunk_id, doc.page_content, json.dumps(doc.metadata, ensure_ascii=False))
+                 for row, chunk_id, doc in zip(rows, ids, documents)]
+            )
+            self._conn.commit()
+            for row, chunk_id in zip(rows, ids):
+                self.id_to_row[chunk_id] = int(row)
+
+    def update_metadata(self, ids: List[str], metadatas: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE chunks SET metadata = ? WHERE chunk_id = ?",
+                [(json.dumps(metadata, ensure_ascii=False), chunk_id) for chunk_id, metadata in zip(ids, metadatas)]
+            )
+            self._conn.commit()
+
+    def delete(self, ids: List[str]) -> None:
+        with self._lock:
+            rows = [self.id_to_row.pop(chunk_id) for chunk_id in ids if chunk_id in self.id_to_row]
+            if rows:
+                self._index_remove(rows)
+            self._conn.executemany("DELETE FROM chunks WHERE chunk_id = ?", [(chunk_id,) for chunk_id in ids])
+            self._conn.commit()
+
+    def _fetch(self, rows: List[int]) -> Dict[int, Document]:
+        """Load the documents stored at rows (caller holds the lock)"""
+        if not rows:
+            return {}
+        placeholders = ",".join("?" * len(rows))
+        cursor = self._conn.execute(
+            f"SELECT row, content, metadata FROM chunks WHERE row IN ({placeholders})", rows
+        )
+        return {row: Document(page_content=content, metadata=json.loads(metadata))
+                for row, content, metadata in cursor}
+
+    def _filtered_rows(self, filter_dict: Dict[str, Any]) -> np.ndarray:
+        """Rows whose metadata matches every key/value of the filter (caller holds the lock)"""
+        clauses = " AND ".join("json_extract(metadata, ?) = ?" for _ in filter_dict)
+        params = []
+        for key, value in filter_dict.items():
+            params.extend([f'$."{key}"', value])
+        cursor = self._conn.execute(f"SELECT row FROM chunks WHERE {clauses}", params)
+        return np.fromiter((row for (row,) in cursor), dtype=np.int64)
+
+    def _exact_knn(self, queries: np.ndarray, rows: np.ndarray, k: int) -> List[List[Tuple[int, float]]]:
+        """Exact squared L2 neighbours among the given rows (caller holds the lock)"""
+        if not len(rows):
+            return [[] for _ in queries]
+        candidates = self._get_vectors()[rows]
+        results = []
+        for query in queries:
+            distances = np.sum((candidates - query) ** 2, axis=1)
+            top = np.argsort(distances)[:k]
+            results.append([(int(rows[i]), float(distances[i])) for i in top])
+        return results
+
+    def _knn(self, queries: np.ndarray, k: int,
+             filter_dict: Optional[Dict[str, Any]]) -> List[List[Tuple[int, float]]]:
+        """(row, distance) neighbours per query (caller holds the lock)"""
+        if filter_dict:
+            # Filtered queries scan the matching rows exactly
+            return self._exact_knn(queries, self._filtered_rows(filter_dict), k)
+
+        k = min(k, self.count())
+        if k <= 0:
+            return [[] for _ in queries]
+        return self._index_knn(queries, k)
+
+    def search_by_vector(self, query_embeddings, k=5, filter_dict=None):
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        with self._lock:
+            if not self.count():
+                return [[] for _ in query_embeddings]
+            neighbours = self._knn(queries, k, filter_dict)
+            docs = self._fetch(sorted({row for hits in neighbours for row, _ in hits}))
+        return [[(docs[row], distance) for row, distance in hits if row in docs] for hits in neighbours]
+
+    def search_with_embeddings(self, query_embedding, k=20, filter_dict=None):
+        query = np.asarray([query_embedding], dtype=np.float32)
+        with self._lock:
+            if not self.count():
+                return [], np.zeros((0, 0), dtype=np.float32)
+            hits = self._knn(query, k, filter_dict)[0]
+            docs = self._fetch([row for row, _ in hits])
+            hits = [(row, distance) for row, distance in hits if row in docs]
+            embeddings = np.array(self._get_vectors()[[row for row, _ in hits]], dtype=np.float32)
+        return [(docs[row], distance) for row, distance in hits], embeddings
+
+    def count(self) -> int:
+        return len(self.id_to_row)
+
+    def persist(self) -> None:
+        with self._lock:
+            meta = {"dim": self.dim, "next_row": self.next_row, **self._index_save()}
+            tmp_path = f"{self.meta_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            os.replace(tmp_path, self.meta_path)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self._vectors = None
+
+    def stats(self) -> Dict[str, Any]:
+        def size(path):
+            return os.path.getsize(path) if os.path.exists(path) else 0
+
+        return {
+            "backend": self.name,
+            "count": self.count(),
+            "dim": self.dim,
+            "stored_rows": self.next_row,
+            "vector_bytes": size(self.vectors_path),
+            "docstore_bytes": size(self.docstore_path),
+            **self._index_stats()
+        }
+
+
+class HNSWBackend(MemmapBackend):
+    """
+    In-process HNSW graph (hnswlib) over the memory-mapped vectors; row
+    numbers are the graph labels
+    """
+
+    name = "hnsw"
+
+    def __init__(self,
+                 persist_directory: str,
+                 m: int = 16,
+                 ef_construction: int = 200,
+                 ef_search: int = 64,
+                 threads: int = 1):
+        """
+        Initialize the backend
+
+        Args:
+            persist_directory: Directory holding the index files
+            m: HNSW graph degree
+            ef_construction: Candidate list size while building
+            ef_search: Candidate list size while searching (raised to k if smaller)
+            threads: Threads used by hnswlib for batched adds and queries
+        """
+        super().__init__(persist_directory)
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.threads = threads
+        self.index_path = os.path.join(persist_directory, "hnsw_index.bin")
+        self._index = None
+
+    def _index_files(self) -> List[str]:
+        return [self.index_path]
+
+    def _index_reset(self) -> None:
+        self._index = None
+
+    def _index_add(self, vectors: np.ndarray, rows: np.ndarray) -> None:
+        import hnswlib
+
+        if self._index is None:
+            self._index = hnswlib.Index(space="l2", dim=self.dim)
+            self._index.init_index(max_elements=max(1024, len(rows) * 2),
+                                   ef_construction=self.ef_construction, M=self.m)
+            self._index.set_num_threads(self.threads)
+
+        needed = self._index.get_current_count() + len(rows)
+        if needed > self._index.get_max_elements():
+            self._index.resize_index(max(needed, self._index.get_max_elements() * 2))
+        self._index.add_items(vectors, rows)
+
+    def _index_remove(self, rows: List[int]) -> None:
+        for row in rows:
+            self._index.mark_deleted(row)
+
+    def _index_knn(self, queries: np.ndarray, k: int) -> List[List[Tuple[int, float]]]:
+        self._index.set_ef(max(self.ef_search, k))
+        labels, distances = self._index.knn_query(queries, k=k)
+        return [[(int(row), float(distance)) for row, distance in zip(row_labels, row_distances)]
+                for row_labels, row_distances in zip(labels, distances)]
+
+    def _index_save(self) -> Dict[str, Any]:
+        if self._index is not None:
+            self._index.save_index(self.index_path)
+        return {"m": self.m, "ef_construction": self.ef_construction}
+
+    def _index_load(self, meta: Dict[str, Any]) -> None:
+        import hnswlib
+
+        self._index = hnswlib.Index(space="l2", dim=self.dim)
+        self._index.load_index(self.index_path)
+        self._index.set_num_threads(self.threads)
+
+    def close(self) -> None:
+        with self._lock:
+            super().close()
+            self._index = None
+
+    def _index_stats(self) -> Dict[str, Any]:
+        return {
+            "m": self.m,
+            "ef_search": self.ef_search,
+            "index_bytes": os.path.getsize(self.index_path) if os.path.exists(self.index_path) else 0
+        }
+
+
+class QuantizedBackend(MemmapBackend):
+    """
+    Flat scan over int8 (or float16) codes held in memory, then exact float32
+    re-scoring of the best candidates from the memory-mapped vectors
+
+    int8 codes use per-dimension affine scalar quantization fitted on the
+    stored vectors. It is refitted over every live vector, and all codes
+    re-encoded, whenever new vectors fall outside the fitted range.
+    """
+
+    name = "quantized"
+
+    def __init__(self,
+                 persist_directory: str,
+                 quantization: str = "int8",
+                 rescore_factor: int = 4,
+                 scan_block_size: int = 16384):
+        """
+        Initialize the backend
+
+        Args:
+            persist_directory: Directory holding the index files
+            quantization: "int8" (4x smaller than float32) or "float16" (2x)
+            rescore_factor: Candidates re-scored exactly per result (k * factor)
+            scan_block_size: Rows decoded at a time during the candidate scan
+        """
+        if quantization not in ("int8", "float16"):
+            raise ValueError(f"Unknown quantization '{quantization}' (expected 'int8' or 'float16')")
+        super().__init__(persist_directory)
+        self.quantization = quantization
+        self.rescore_factor = rescore_factor
+        self.scan_block_size = scan_block_size
+
+        self._codes = None
+        self._alive = None
+        self._offset = None
+        self._scale = None
+        self.build_recall = None
+
+    def _index_reset(self) -> None:
+        self._codes = None
+        self._alive = None
+        self._offset = None
+        self._scale = None
+        self.build_recall = None
+
+    def _encode(self, vectors: np.ndarray) -> np.ndarray:
+        if self.quantization == "float16":
+            return vectors.astype(np.float16)
+        codes = np.rint((vectors - self._offset) / self._scale) - 128
+        return np.clip(codes, -128, 127).astype(np.int8)
+
+    def _in_range(self, vectors: np.ndarray) -> bool:
+        """Whether vectors encode without clipping (within half a step of the fitted range)"""
+        return bool(np.all(vectors >= self._offset - self._scale / 2)
+                    and np.all(vectors <= self._offset + self._scale * 255.5))
+
+    def _refit(self) -> None:
+        """Fit the int8 range on every live vector and re-encode all rows"""
+        vectors = self._get_vectors()
+        low, high = None, None
+        for start in range(0, self.next_row, self.scan_block_size):
+            end = start + self.scan_block_size
+            block = np.asarray(vectors[start:end])[self._alive[start:end]]
+            if not len(block):
+                continue
+            low = block.min(axis=0) if low is None else np.minimum(low, block.min(axis=0))
+            high = block.max(axis=0) if high is None else np.maximum(high, block.max(axis=0))
+
+        self._offset = low.astype(np.float32)
+        self._scale = np.maximum((high - low) / 255, 1e-12).astype(np.float32)
+        self._codes = np.concatenate([
+            self._encode(np.asarray(vectors[start:start + self.scan_block_size]))
+            for start in range(0, self.next_row, self.scan_block_size)
+        ])
+
+    def _index_add(self, vectors: np.ndarray, rows: np.ndarray) -> None:
+        alive = np.ones(len(rows), dtype=bool)
+        self._alive = alive if self._alive is None else np.concatenate([self._alive, alive])
+
+        if self.quantization == "int8" and (self._offset is None or not self._in_range(vectors)):
+            # The new rows are already in the vector file
+            self._refit()
+            return
+
+        codes = self._encode(vectors)
+        self._codes = codes if self._codes is None else np.concatenate([self._codes, codes])
+
+    def _index_remove(self, rows: List[int]) -> None:
+        self._alive[rows] = False
+
+    def _scan(self, query: np.ndarray, n_candidates: int) -> np.ndarray:
+        """Rows of the n_candidates closest codes (approximate distances)"""
+        if self.quantization == "int8":
+            # Compare in code space, weighting each dimension by its scale
+            query_code = (query - self._offset) / self._scale - 128
+            weights = self._scale ** 2
+        else:
+            query_code = query
+
+        distances = np.empty(len(self._codes), dtype=np.float32)
+        for start in range(0, len(self._codes), self.scan_block_size):
+            block = self._codes[start:start + self.scan_block_size].astype(np.float32) - query_code
+            if self.quantization == "int8":
+                distances[start:start + len(block)] = (block ** 2) @ weights
+            else:
+                distances[start:start + len(block)] = np.einsum("ij,ij->i", block, block)
+        distances[~self._alive] = np.inf
+
+        n_candidates = min(n_candidates, int(self._alive.sum()))
+        candidates = np.argpartition(distances, n_candidates - 1)[:n_candidates]
+        return candidates[np.argsort(distances[candidates])]
+
+    def _index_knn(self, queries: np.ndarray, k: int, rescore: bool = True) -> List[List[Tuple[int, float]]]:
+        results = []
+        for query in queries:
+            candidates = self._scan(query, k * self.rescore_factor if rescore else k)
+            if rescore:
+                results.append(self._exact_knn(query[None, :], np.sort(candidates), k)[0])
+            else:
+                results.append([(int(row), 0.0) for row in candidates[:k]])
+        return results
+
+    def evaluate_recall(self, k: int = 10, sample_size: int = 200, seed: int = 0) -> Optional[Dict[str, Any]]:
+        """
+        Recall@k of the quantized search against an exact float32 search
+
+        Stored vectors are used as sample queries.
+
+        Returns:
+            Recall of the code scan alone and after exact re-scoring
+        """
+        with self._lock:
+            if self._alive is None or not self._alive.any():
+                return None
+            alive_rows = np.flatnonzero(self._alive)
+            k = min(k, len(alive_rows))
+            rng = np.random.default_rng(seed)
+            sample = rng.choice(alive_rows, size=min(sample_size, len(alive_rows)), replace=False)
+            queries = np.array(self._get_vectors()[np.sort(sample)], dtype=np.float32)
+
+            exact = self._exact_knn(queries, alive_rows, k)
+            scan_only = self._index_knn(queries, k, rescore=False)
+            rescored = self._index_knn(queries, k)
+
+        def recall(results):
+            hits = sum(len({row for row, _ in truth} & {row for row, _ in found})
+                       for truth, found in zip(exact, results))
+            return hits / (len(queries) * k)
+
+        self.build_recall = {
+            "k": k,
+            "queries": len(queries),
+            "recall_scan": recall(scan_only),
+            "recall_rescored": recall(rescored)
+        }
+        return self.build_recall
+
+    def _index_save(self) -> Dict[str, Any]:
+        meta = {"quantization": self.quantization, "build_recall": self.build_recall}
+        if self._offset is not None:
+            meta["offset"] = self._offset.tolist()
+            meta["scale"] = self._scale.tolist()
+        return meta
+
+    def _index_load(self, meta: Dict[str, Any]) -> None:
+        if meta.get("quantization", self.quantization) != self.quantization:
+            raise ValueError(f"Index was built with {meta['quantization']} quantization, not {self.quantization}")
+        if "offset" in meta:
+            self._offset = np.asarray(meta["offset"], dtype=np.float32)
+            self._scale = np.asarray(meta["scale"], dtype=np.float32)
+        self.build_recall = meta.get("build_recall")
+
+        # Codes are rebuilt from the float vectors rather than stored twice
+        vectors = self._get_vectors()
+        self._codes = np.concatenate([
+            self._encode(np.asarray(vectors[start:start + self.scan_block_size]))
+            for start in range(0, self.next_row, self.scan_block_size)
+        ]) if self.next_row else None
+        self._alive = np.zeros(self.next_row, dtype=bool)
+        self._alive[list(self.id_to_row.values())] = True
+
+    def _index_stats(self) -> Dict[str, Any]:
+        return {
+            "quantization": self.quantization,
+            "rescore_factor": self.rescore_factor,
+            "code_bytes": int(self._codes.nbytes) if self._codes is not None else 0,
+            "build_recall": self.build_recall
+        }
+
+
+VECTOR_BACKENDS = ("chroma", "hnsw", "quantized")
+
+
+def create_backend(name: str,
+                   collection_name: str,
+                   persist_directory: str,
+                   embedding_function: Any,
+                   **options) -> VectorBackend:
+    """
+    Build a backend by name
+
+    Args:
+        name: "chroma", "hnsw" or "quantized"
+        collection_name: Chroma collection name
+        persist_directory: Index directory
+        embedding_function: Embedding model (used by the Chroma wrapper)
+        **options: Backend specific options (e.g. m, ef_search for hnsw;
+                   quantization, rescore_factor for quantized)
+    """
+    if name == "chroma":
+        return ChromaBackend(collection_name, persist_directory, embedding_function)
+    if name == "hnsw":
+        return HNSWBackend(persist_directory, **options)
+    if name == "quantized":
+        return QuantizedBackend(persist_directory, **options)
+    raise ValueError(f"Unknown vector backend '{name}' (expected one of {VECTOR_BACKENDS})")
@@ -1,36 +1,149 @@
 """
 Vector Store Manager for RAG System
-Handles ChromaDB vector storage and embeddings
+Handles vector storage (Chroma or an in-process HNSW index) and embeddings
 """
 
 import os
 import json
 import shutil
-from typing import List, Optional, Dict, Any
+import time
+import uuid
+import logging
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Dict, Any, Tuple
+import numpy as np
 from langchain.docstore.document import Document
-from langchain_community.embeddings import SentenceTransformerEmbeddings
-from langchain_community.vectorstores import Chroma
 from chunking_processor import process_training_data
+from keyword_index import BM25Index
+from chunk_index import ChunkAdjacencyIndex
+from index_manifest import IndexManifest, has_unique_chunk_ids
+from embedding_builder import EmbeddingBuilder
+from embedding_cache import EmbeddingCache
+from encoders import create_encoder, embedding_variant
+from collection_summary import CollectionSummary
+from vector_backends import VectorBackend, create_backend
+
+logger = logging.getLogger(__name__)
+
+
+class QueryEmbeddingCache:
+    """
+    Bounded LRU cache of query embeddings
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(query: str, model_name: str) -> Tuple[str, str]:
+        """Key on the embedding model and the whitespace-normalized query"""
+        return (model_name, " ".join(query.split()))
+
+    def get(self, key: Tuple[str, str]) -> Optional[List[float]]:
+        with self._lock:
+            embedding = self._entries.get(key)
+            if embedding is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return embedding
+
+    def set(self, key: Tuple[str, str], embedding: List[float]) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = embedding
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries
+            }
 
 
 class VectorStoreManager:
     """
-    Manages ChromaDB vector store for RAG system
+    Manages the vector store for RAG system
     """
 
     def __init__(self, 
                  collection_name: str = "financial_qa_collection",
                  persist_directory: str = "chroma_db",
-                 embedding_model: str = "all-MiniLM-L6-v2"):
+                 embedding_model: str = "all-MiniLM-L6-v2",
+                 query_cache_size: int = 1024,
+                 embedding_batch_size: int = 64,
+                 embedding_workers: int = 1,
+                 embedding_cache_dir: Optional[str] = "cache/embeddings",
+                 backend: str = "chroma",
+                 backend_options: Optional[Dict[str, Any]] = None,
+                 encoder: str = "torch",
+                 encoder_options: Optional[Dict[str, Any]] = None,
+                 chunk_overlap: int = 200):
         self.collection_name = collection_name
         self.persist_directory = persist_directory
         self.embedding_model_name = embedding_model
 
-        print(f"Loading embedding model: {embedding_model}")
-        self.embeddings = SentenceTransformerEmbeddings(model_name=embedding_model)
+        print(f"Loading embedding model: {embedding_model} ({encoder})")
+        encoder_options = encoder_options or {}
+        self.encoder_name = encoder
+        self.embeddings = create_encoder(embedding_model, encoder, **encoder_options)
+        # Caches are keyed by the embeddings the encoder produces (int8 ONNX differs slightly)
+        self.embedding_variant = embedding_variant(embedding_model, encoder, encoder_options.get("quantized", False))
+        self.query_cache = QueryEmbeddingCache(max_entries=query_cache_size)
+        # Chunk embeddings persisted by (model, text hash) so rebuilds skip unchanged text
+        self.embedding_cache = EmbeddingCache(embedding_cache_dir, self.embedding_variant) if embedding_cache_dir else None
+        # Worker processes split the CPU threads between them
+        onnx_options = None
+        if encoder == "onnx":
+            onnx_options = {key: value for key, value in encoder_options.items() if key != "threads"}
+        # Index builds embed chunks in batches, optionally across worker processes
+        self.embedding_builder = EmbeddingBuilder(
+            embedding_model,
+            embeddings=self.embeddings,
+            batch_size=embedding_batch_size,
+            workers=embedding_workers,
+            cache=self.embedding_cache,
+            onnx_options=onnx_options
+        )
+        self.backend_name = backend
+        self.backend_options = backend_options or {}
+        # Opened backend (VectorBackend), set by create_vectorstore/load_vectorstore
         self.vectorstore = None
+        self.keyword_index = None
+        self.keyword_index_path = os.path.join(persist_directory, "keyword_index.json")
+        self.chunk_index = None
+        # Overlap the chunks were split with, bounding the overlap the adjacency index looks for
+        self.chunk_overlap = chunk_overlap
+        self.chunk_index_path = os.path.join(persist_directory, "chunk_adjacency.json")
+        self.manifest_path = os.path.join(persist_directory, "manifest.json")
+        # Counts and size histogram of the stored chunks, kept next to metadata.json
+        self.summary = None
+        self.summary_path = os.path.join(persist_directory, "collection_summary.json")
+
+    def _new_backend(self) -> VectorBackend:
+        return create_backend(
+            self.backend_name,
+            self.collection_name,
+            self.persist_directory,
+            self.embeddings,
+            **self.backend_options
+        )
 
-    def create_vectorstore(self, documents: List[Document]) -> Chroma:
+    def create_vectorstore(self, documents: List[Document]) -> VectorBackend:
         """
         Create a new vector store from documents
         """
@@ -38,23 +151,165 @@ class VectorStoreManager:
 
         # Assume caller manages deleting old data if needed — do NOT delete here.
 
-        self.vectorstore = Chroma.from_documents(
-            documents=documents,
-            embedding=self.embeddings,
-            collection_name=self.collection_name,
-            persist_directory=self.persist_directory
-        )
+        # Store chunks under their deterministic chunk_id so later syncs can upsert them
+        unique_ids = has_unique_chunk_ids(documents)
+        if unique_ids:
+            ids = [doc.metadata['chunk_id'] for doc in documents]
+        else:
+            print("Warning: chunk ids are not unique; incremental updates will rebuild the whole store.")
+            ids = [str(uuid.uuid4()) for _ in documents]
+
+        embeddings = self.embedding_builder.embed([doc.page_content for doc in documents])
+
+        self.vectorstore = self._new_backend()
+        self.vectorstore.create()
+        self.vectorstore.upsert(ids, embeddings, documents)
+
+        # Approximate backends report how close their results are to exact search
+        recall = self.vectorstore.evaluate_recall()
+        if recall:
+            print(f"Index recall@{recall['k']} over {recall['queries']} sample queries: "
+                  f"{recall['recall_scan']:.3f} before re-scoring, {recall['recall_rescored']:.3f} after")
         self.vectorstore.persist()
 
+        self._build_side_indexes(documents)
+
+        if unique_ids:
+            IndexManifest.from_documents(documents, self.embedding_variant).save(self.manifest_path)
+        self.summary = CollectionSummary.from_documents(
+            ids, documents, self.embedding_variant, len(embeddings[0]) if embeddings else None
+        )
+        self.summary.save(self.summary_path)
+
         metadata_path = os.path.join(self.persist_directory, "metadata.json")
         with open(metadata_path, "w") as f:
-            json.dump({"status": "complete"}, f)
+            json.dump({"status": "complete", "backend": self.backend_name}, f)
 
         print(f"Vector store created and persisted to {self.persist_directory}")
         return self.vectorstore
 
+    def _build_side_indexes(self, documents: List[Document]) -> None:
+        """Build and persist the keyword and chunk adjacency indexes (no embeddings needed)"""
+        # Lexical index over the same chunks, for keyword and hybrid retrieval
+        self.keyword_index = BM25Index()
+        self.keyword_index.add_documents(documents)
+        self.keyword_index.save(self.keyword_index_path)
+
+        # parent_doc_id -> ordered chunks, for neighbour/parent expansion
+        self.chunk_index = ChunkAdjacencyIndex(max_overlap=self.chunk_overlap)
+        self.chunk_index.add_documents(documents)
+        self.chunk_index.save(self.chunk_index_path)
+
+    def _sync_side_indexes(self, documents: List[Document], diff: Dict[str, List[str]]) -> None:
+        """Bring the keyword and chunk adjacency indexes in line with a sync diff"""
+        if self.keyword_index is None or self.chunk_index is None:
+            self._build_side_indexes(documents)
+            return
+
+        # Changed chunks are removed first so they are not indexed twice
+        replaced = diff["changed"] + diff["metadata_changed"]
+        self.keyword_index.remove(replaced + diff["removed"])
+        new_ids = set(diff["added"] + replaced)
+        self.keyword_index.add_documents([doc for doc in documents if doc.metadata['chunk_id'] in new_ids])
+        self.keyword_index.save(self.keyword_index_path)
+
+        # Re-index only the parents that gained, lost or changed chunks
+        touched = set(diff["added"] + diff["changed"] + diff["metadata_changed"] + diff["removed"])
+        parents = {location[0] for location in map(self.chunk_index.locate, touched) if location}
+        parents.update(doc.metadata.get('parent_doc_id') for doc in documents
+                       if doc.metadata['chunk_id'] in touched)
+        parents.discard(None)
+
+        self.chunk_index.remove_parents(list(parents))
+        self.chunk_index.add_documents([doc for doc in documents if doc.metadata.get('parent_doc_id') in parents])
+        self.chunk_index.save(self.chunk_index_path)
+
+    def _sync_manifest(self, documents: List[Document]) -> Optional[IndexManifest]:
+        """Manifest to diff documents against, or None if the store must be rebuilt"""
+        manifest = IndexManifest.load(self.manifest_path) if self.vectorstore else None
+        if (manifest is None or manifest.embedding_model != self.embedding_variant
+                or not has_unique_chunk_ids(documents)):
+            return None
+        return manifest
+
+    def can_sync(self, documents: List[Document]) -> bool:
+        """Whether sync_documents can update the loaded store to documents incrementally"""
+        return self._sync_manifest(documents) is not None
+
+    def sync_diff(self, documents: List[Document]) -> Optional[Dict[str, List[str]]]:
+        """
+        Chunk ids sync_documents would add, change, update, remove or keep
+        (see IndexManifest.diff), or None if the store cannot be synced
+        """
+        manifest = self._sync_manifest(documents)
+        return manifest.diff(documents) if manifest is not None else None
+
+    def sync_documents(self, documents: List[Document], batch_size: int = 256) -> Dict[str, Any]:
+        """
+        Incrementally bring the vector store in line with a new set of chunks
+
+        Chunks are compared with the manifest by chunk_id and content hash:
+        only new or edited chunks are embedded and upserted, removed ones are
+        deleted and chunks whose metadata alone changed are updated in place.
+        A store that cannot be synced (see can_sync) has to be rebuilt in a
+        new build directory (RAGSystem.rebuild_index).
+
+        Args:
+            documents: Every chunk the store should contain
+            batch_size: Chunks per metadata update batch
 
-    def load_vectorstore(self) -> Optional[Chroma]:
+        Returns:
+            Report with the chunk counts per change type
+
+        Raises:
+            RuntimeError: If the store cannot be synced
+        """
+        started = time.perf_counter()
+        diff = self.sync_diff(documents)
+        if diff is None:
+            raise RuntimeError("Vector store has no usable index manifest; rebuild it instead of syncing")
+
+        by_id = {doc.metadata['chunk_id']: doc for doc in documents}
+
+        if diff["removed"]:
+            self.vectorstore.delete(diff["removed"])
+
+        to_embed = diff["added"] + diff["changed"]
+        if to_embed:
+            embed_docs = [by_id[chunk_id] for chunk_id in to_embed]
+            embeddings = self.embedding_builder.embed([doc.page_content for doc in embed_docs])
+            self.vectorstore.upsert(to_embed, embeddings, embed_docs)
+
+        for start in range(0, len(diff["metadata_changed"]), batch_size):
+            batch = [by_id[chunk_id] for chunk_id in diff["metadata_changed"][start:start + batch_size]]
+            self.vectorstore.update_metadata(
+                [doc.metadata['chunk_id'] for doc in batch],
+                [doc.metadata for doc in batch]
+            )
+
+        if to_embed or diff["removed"] or diff["metadata_changed"]:
+            self.vectorstore.persist()
+            self._sync_side_indexes(documents, diff)
+            IndexManifest.from_documents(documents, self.embedding_variant).save(self.manifest_path)
+        if to_embed or diff["removed"] or diff["metadata_changed"] or self.summary is None:
+            embedding_dim = len(embeddings[0]) if to_embed else getattr(self.summary, "embedding_dim", None)
+            self.summary = CollectionSummary.from_documents(
+                [doc.metadata['chunk_id'] for doc in documents], documents, self.embedding_variant, embedding_dim
+            )
+            self.summary.save(self.summary_path)
+
+        report = {"mode": "incremental", **{key: len(ids) for key, ids in diff.items()}}
+        report["embedded"] = len(to_embed)
+        report["elapsed_seconds"] = time.perf_counter() - started
+
+        print(f"Index sync: {report['added']} added, {report['changed']} changed, "
+              f"{report['metadata_changed']} metadata updated, {report['removed']} removed, "
+              f"{report['unchanged']} unchanged ({report['embedded']} embedded in "
+              f"{report['elapsed_seconds']:.1f}s)")
+        return report
+
+
+    def load_vectorstore(self) -> Optional[VectorBackend]:
         """
         Load existing vector store if valid
         """
@@ -69,16 +324,32 @@ class VectorStoreManager:
             return None
 
         try:
-            print(f"Loading vector store from {self.persist_directory}")
-            self.vectorstore = Chroma(
-                collection_name=self.collection_name,
-                embedding_function=self.embeddings,
-                persist_directory=self.persist_directory
-            )
-            count = self.vectorstore._collection.count()
-            if count == 0:
+            with open(metadata_path, "r") as f:
+                stored_backend = json.load(f).get("backend", "chroma")
+            if stored_backend != self.backend_name:
+                print(f"Vector store at {self.persist_directory} was built with the '{stored_backend}' "
+                      f"backend, not '{self.backend_name}'.")
+                return None
+
+            print(f"Loading {self.backend_name} vector store from {self.persist_directory}")
+            backend = self._new_backend()
+            if not backend.load():
                 print("Vector store is empty.")
                 return None
+            self.vectorstore = backend
+            count = backend.count()
+
+            self.keyword_index = BM25Index.load(self.keyword_index_path)
+            if self.keyword_index is None:
+                print("Keyword index not found; keyword/hybrid retrieval will fall back to vector search.")
+
+            self.chunk_index = ChunkAdjacencyIndex.load(self.chunk_index_path)
+            if self.chunk_index is None:
+                print("Chunk adjacency index not found; context expansion is disabled.")
+
+            self.summary = CollectionSummary.load(self.summary_path)
+            if self.summary is None:
+                print("Collection summary not found; run an index update (--update-db) to build it.")
 
             print(f"Loaded vector store with {count} documents")
             return self.vectorstore
@@ -94,50 +365,261 @@ class VectorStoreManager:
             return
 
         print(f"Adding {len(documents)} documents to existing vector store...")
-        self.vectorstore.add_documents(documents)
+        manifest = IndexManifest.load(self.manifest_path)
+        use_chunk_ids = manifest is not None and has_unique_chunk_ids(documents)
+        if use_chunk_ids:
+            ids = [doc.metadata['chunk_id'] for doc in documents]
+        else:
+            ids = [str(uuid.uuid4()) for _ in documents]
+
+        embeddings = self.embedding_builder.embed([doc.page_content for doc in documents])
+        self.vectorstore.upsert(ids, embeddings, documents)
         self.vectorstore.persist()
+
+        if use_chunk_ids:
+            manifest.hashes.update(IndexManifest.from_documents(documents, self.embedding_variant).hashes)
+            manifest.save(self.manifest_path)
+        if self.keyword_index is not None:
+            if use_chunk_ids:
+                # Upserted ids replace their previous postings
+                self.keyword_index.remove(ids)
+            self.keyword_index.add_documents(documents)
+            self.keyword_index.save(self.keyword_index_path)
+        if self.chunk_index is not None:
+            self.chunk_index.add_documents(documents)
+            self.chunk_index.save(self.chunk_index_path)
+        if self.summary is not None:
+            self.summary.add(ids, documents)
+            self.summary.save(self.summary_path)
         print(f"Successfully added {len(documents)} documents")
 
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single query with the store's embedding model (cached)"""
+        key = QueryEmbeddingCache.make_key(text, self.embedding_variant)
+        embedding = self.query_cache.get(key)
+        if embedding is None:
+            embedding = self.embeddings.embed_query(text)
+            self.query_cache.set(key, embedding)
+        return embedding
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed several queries, encoding only the cache misses in one batch"""
+        keys = [QueryEmbeddingCache.make_key(text, self.embedding_variant) for text in texts]
+        embeddings = [self.query_cache.get(key) for key in keys]
+
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            new_embeddings = self.embed_documents([texts[i] for i in missing])
+            for i, embedding in zip(missing, new_embeddings):
+                embeddings[i] = embedding
+                self.query_cache.set(keys[i], embedding)
+        return embeddings
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed a batch of texts with the store's embedding model"""
+        return self.embeddings.embed_documents(texts)
+
     def similarity_search(self, query: str, k: int = 5,
                           filter_dict: Optional[Dict[str, Any]] = None) -> List[Document]:
         if not self.vectorstore:
             raise ValueError("Vector store not loaded.")
-        print(f"Searching for: '{query}' (top {k} results)")
-        if filter_dict:
-            return self.vectorstore.similarity_search(query=query, k=k, filter=filter_dict)
-        return self.vectorstore.similarity_search(query=query, k=k)
+        logger.debug("Searching for a %d character query (top %d results)", len(query), k)
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(
+            self.embed_query(query), k=k, filter_dict=filter_dict
+        )]
 
     def similarity_search_with_score(self, query: str, k: int = 5,
                                      filter_dict: Optional[Dict[str, Any]] = None) -> List[tuple]:
         if not self.vectorstore:
             raise ValueError("Vector store not loaded.")
-        print(f"Searching with scores for: '{query}' (top {k} results)")
-        if filter_dict:
-            return self.vectorstore.similarity_search_with_score(query=query, k=k, filter=filter_dict)
-        return self.vectorstore.similarity_search_with_score(query=query, k=k)
+        logger.debug("Searching with scores for a %d character query (top %d results)", len(query), k)
+        return self.similarity_search_by_vector_with_score(
+            self.embed_query(query), k=k, filter_dict=filter_dict
+        )
+
+    def has_keyword_index(self) -> bool:
+        return self.keyword_index is not None
+
+    def keyword_search(self, query: str, k: int = 5,
+                       filter_dict: Optional[Dict[str, Any]] = None) -> List[tuple]:
+        """BM25 search over the keyword index (does not use the embedding model)"""
+        if self.keyword_index is None:
+            raise ValueError("Keyword index not loaded.")
+        logger.debug("Keyword searching for a %d character query (top %d results)", len(query), k)
+        return self.keyword_index.search(query, k=k, filter_dict=filter_dict)
+
+    def similarity_search_by_vector_with_score(self, embedding: List[float], k: int = 5,
+                                               filter_dict: Optional[Dict[str, Any]] = None) -> List[tuple]:
+        if not self.vectorstore:
+            raise ValueError("Vector store not loaded.")
+        return self.vectorstore.search_by_vector([embedding], k=k, filter_dict=filter_dict)[0]
+
+    def similarity_search_with_embeddings(self, query: str, k: int = 20,
+                                          filter_dict: Optional[Dict[str, Any]] = None) -> Tuple[List[tuple], np.ndarray, np.ndarray]:
+        """
+        Search and also return the stored embeddings of the hits
+
+        Returns:
+            Tuple of ((document, score) pairs, matrix of hit embeddings
+            (one row per hit), query embedding)
+        """
+        if not self.vectorstore:
+            raise ValueError("Vector store not loaded.")
+        logger.debug("Searching with embeddings for a %d character query (top %d results)", len(query), k)
+
+        query_embedding = self.embed_query(query)
+        scored_docs, embeddings = self.vectorstore.search_with_embeddings(
+            query_embedding, k=k, filter_dict=filter_dict
+        )
+        return scored_docs, embeddings, np.asarray(query_embedding, dtype=np.float32)
+
+    def similarity_search_batch_with_score(self, queries: List[str], k: int = 5,
+                                           filter_dict: Optional[Dict[str, Any]] = None) -> List[List[tuple]]:
+        """
+        Search for several queries at once: one batched embedding call and
+        one backend query for all of them
+
+        Returns:
+            One list of (document, score) pairs per query, in input order
+        """
+        if not self.vectorstore:
+            raise ValueError("Vector store not loaded.")
+        if not queries:
+            return []
+        print(f"Batch searching with scores for {len(queries)} queries (top {k} results)")
+
+        query_embeddings = self.embed_queries(queries)
+        return self.vectorstore.search_by_vector(query_embeddings, k=k, filter_dict=filter_dict)
+
+    def validate_index(self, documents: List[Document], sample_queries: Optional[List[str]] = None,
+                       samples: int = 5, k: int = 5, min_self_recall: float = 0.6) -> Dict[str, Any]:
+        """
+        Check a freshly built store before it is swapped in
+
+        The store must hold every chunk (and agree with its summary), every
+        sample query must return results, and sampled chunks must find
+        themselves in the top k when searched with the start of their text.
+
+        Args:
+            documents: Chunks the store was built from
+            sample_queries: Queries that must return results
+            samples: Chunks used for the self-retrieval check
+            k: Results per validation search
+            min_self_recall: Fraction of sampled chunks that must find themselves
+
+        Returns:
+            Report with "valid" and the "errors" found
+        """
+        errors = []
+        if not self.vectorstore:
+            return {"valid": False, "errors": ["Vector store not loaded"]}
+
+        count = self.vectorstore.count()
+        if count != len(documents):
+            errors.append(f"Store holds {count} chunks, expected {len(documents)}")
+        if self.summary is not None and self.summary.chunk_count != count:
+            errors.append(f"Collection summary counts {self.summary.chunk_count} chunks, store holds {count}")
+
+        sample_queries = sample_queries or []
+        empty_queries = []
+        if sample_queries:
+            results = self.vectorstore.search_by_vector(self.embed_queries(sample_queries), k=k)
+            empty_queries = [query for query, hits in zip(sample_queries, results) if not hits]
+            if empty_queries:
+                errors.append(f"{len(empty_queries)} sample queries returned no results")
+
+        step = max(1, len(documents) // samples)
+        sampled = documents[::step][:samples]
+        found = 0
+        if sampled:
+            results = self.vectorstore.search_by_vector(
+                self.embed_documents([doc.page_content[:300] for doc in sampled]), k=k
+            )
+            found = sum(any(hit.page_content == doc.page_content for hit, _ in hits)
+                        for doc, hits in zip(sampled, results))
+        self_recall = found / len(sampled) if sampled else 0.0
+        if sampled and self_recall < min_self_recall:
+            errors.append(f"Only {found}/{len(sampled)} sampled chunks retrieved themselves")
+
+        return {
+            "valid": not errors,
+            "count": count,
+            "expected_count": len(documents),
+            "sample_queries": len(sample_queries),
+            "empty_queries": empty_queries,
+            "self_recall": self_recall,
+            "errors": errors
+        }
+
+    def benchmark_search(self, queries: List[str], k: int = 5, runs: int = 3) -> Dict[str, Any]:
+        """
+        Measure vector search latency of the loaded backend
+
+        Queries are embedded once up front, so only the backend search is
+        timed. Run it per backend on the same corpus to compare them.
+
+        Args:
+            queries: Sample queries
+            k: Number of results per search
+            runs: Passes over the queries
+
+        Returns:
+            Latency percentiles (ms), queries per second, peak RSS and backend stats
+        """
+        if not self.vectorstore:
+            raise ValueError("Vector store not loaded.")
+
+        embeddings = self.embed_queries(queries)
+        latencies = []
+        for _ in range(runs):
+            for embedding in embeddings:
+                started = time.perf_counter()
+                self.vectorstore.search_by_vector([embedding], k=k)
+                latencies.append((time.perf_counter() - started) * 1000)
+
+        peak_rss_mb = None
+        try:
+            import resource
+            # ru_maxrss is in KB on Linux
+            peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        except ImportError:
+            pass
+
+        latencies = np.asarray(latencies)
+        return {
+            'backend': self.vectorstore.stats(),
+            'searches': len(latencies),
+            'k': k,
+            'latency_ms_p50': float(np.percentile(latencies, 50)),
+            'latency_ms_p95': float(np.percentile(latencies, 95)),
+            'latency_ms_mean': float(latencies.mean()),
+            'queries_per_second': float(len(latencies) / (latencies.sum() / 1000)) if latencies.sum() else 0.0,
+            'peak_rss_mb': peak_rss_mb
+        }
+
+    def get_query_cache_stats(self) -> Dict[str, Any]:
+        return self.query_cache.get_stats()
 
     def get_collection_stats(self) -> Dict[str, Any]:
         if not self.vectorstore:
             return {"error": "Vector store not loaded"}
 
         try:
-            collection = self.vectorstore._collection
-            count = collection.count()
-            sample_docs = self.vectorstore.similarity_search("sample", k=min(10, count))
-            sources = set()
-            categories = set()
-
-            for doc in sample_docs:
-                sources.add(doc.metadata.get('source', 'unknown'))
-                categories.add(doc.metadata.get('category', 'unknown'))
+            # Maintained on every write: no embedding or search needed
+            summary = self.summary.to_stats() if self.summary else None
 
             return {
-                'total_documents': count,
+                'total_documents': self.vectorstore.count(),
                 'collection_name': self.collection_name,
                 'embedding_model': self.embedding_model_name,
+                'encoder': self.encoder_name,
                 'persist_directory': self.persist_directory,
-                'sources': list(sources),
-                'categories': list(categories)
+                'backend': self.vectorstore.stats(),
+                'sources': list(summary['source_counts']) if summary else [],
+                'categories': list(summary['category_counts']) if summary else [],
+                'summary': summary,
+                'query_embedding_cache': self.query_cache.get_stats(),
+                'embedding_cache': self.embedding_cache.get_stats() if self.embedding_cache else None
             }
 
         except Exception as e:
@@ -147,10 +629,13 @@ class VectorStoreManager:
         # Clean up active connection first
         if self.vectorstore:
             try:
-                self.vectorstore._client.reset()
+                self.vectorstore.destroy()
                 self.vectorstore = None
+                self.keyword_index = None
+                self.chunk_index = None
+                self.summary = None
             except Exception as e:
-                print(f"Warning: Failed to reset Chroma client cleanly: {e}")
+                print(f"Warning: Failed to close the vector store cleanly: {e}")
 
         # Remove from disk
         if os.path.exists(self.persist_directory):
@@ -170,7 +655,7 @@ def create_vector_database(input_file: str = "processed_data/training_data.json"
     """
     Initializes the full vector store system
     """
-    manager = VectorStoreManager()
+    manager = VectorStoreManager(chunk_overlap=chunk_overlap)
 
     if not force_recreate:
         existing_store = manager.load_vectorstore()